@@ -1,8 +1,140 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import F
+from django.shortcuts import render
+from django.utils import timezone
+from django.utils.functional import cached_property
 
-from .models import Empleado, EstadoAsistencia, RegistroAsistencia
+from . import auditoria, fichadas
+from .models import (
+    AvisoAsistencia,
+    CambioAsistencia,
+    CierreMes,
+    Empleado,
+    EstadoAsistencia,
+    Fichada,
+    LoteGuardado,
+    PeriodoEmpleo,
+    RegistroAsistencia,
+)
+from .servicios import (
+    MesCerradoError,
+    abrir_periodo,
+    dias_habiles,
+    invalidar_panel_hoy,
+    registrar_cambios,
+    sincronizar_activo,
+    verificar_meses_abiertos,
+)
 
 
+# ─────────────────────────────────────────
+# Utilidades para tablas grandes
+# ─────────────────────────────────────────
+
+class ConteoEstimadoPaginator(Paginator):
+    """
+    Paginador que nunca ejecuta un COUNT(*) completo: cuenta como máximo
+    `tope_conteo` filas (un recorrido acotado del índice). Por encima del
+    tope `truncado` es verdadero, el listado muestra "N+" y las filas
+    siguientes se alcanzan filtrando.
+    """
+    tope_conteo = 10000
+
+    @cached_property
+    def count(self):
+        return min(self._conteo_acotado, self.tope_conteo)
+
+    @cached_property
+    def truncado(self):
+        return self._conteo_acotado > self.tope_conteo
+
+    @cached_property
+    def _conteo_acotado(self):
+        return self.object_list.order_by().values('pk')[:self.tope_conteo + 1].count()
+
+
+class AutocompletarFilter(admin.FieldListFilter):
+    """
+    Filtro por FK que usa el buscador del admin en lugar de listar
+    todos los objetos relacionados en la barra lateral.
+    """
+    template = 'admin/asistencia/filtro_autocompletar.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.app_label = model._meta.app_label
+        self.model_name = model._meta.model_name
+        self.field_name = field.name
+        self.seleccionado = None
+        valor = self.used_parameters.get(self.lookup_kwarg)
+        if valor:
+            try:
+                self.seleccionado = (
+                    field.remote_field.model._default_manager.filter(pk=valor[-1]).first()
+                )
+            except (ValueError, ValidationError):
+                raise IncorrectLookupParameters(f'Valor inválido para {self.title}.')
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.seleccionado is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': 'Todos',
+        }
+
+
+class ReasignarEstadoForm(forms.Form):
+    estado = forms.ModelChoiceField(
+        queryset=EstadoAsistencia.objects.filter(activo=True),
+        label='Nuevo estado',
+    )
+    fecha_desde = forms.DateField(
+        label='Desde', widget=forms.DateInput(attrs={'type': 'date'}),
+    )
+    fecha_hasta = forms.DateField(
+        label='Hasta', widget=forms.DateInput(attrs={'type': 'date'}),
+    )
+
+    def clean(self):
+        datos = super().clean()
+        desde, hasta = datos.get('fecha_desde'), datos.get('fecha_hasta')
+        if desde and hasta and desde > hasta:
+            raise forms.ValidationError('La fecha "Desde" no puede ser posterior a "Hasta".')
+        return datos
+
+
+class RegistroAsistenciaAdminForm(forms.ModelForm):
+    """Como la grilla, no deja mover registros desde ni hacia un mes cerrado."""
+
+    class Meta:
+        model = RegistroAsistencia
+        fields = '__all__'
+
+    def clean(self):
+        datos = super().clean()
+        # `instance` conserva la fecha original hasta después de clean()
+        fechas = [f for f in (datos.get('fecha'), self.instance.fecha) if f]
+        try:
+            verificar_meses_abiertos(fechas)
+        except MesCerradoError as e:
+            raise forms.ValidationError(str(e))
+        return datos
+
+
+# ─────────────────────────────────────────
+# Modelos
+# ─────────────────────────────────────────
+
 @admin.register(EstadoAsistencia)
 class EstadoAsistenciaAdmin(admin.ModelAdmin):
     list_display = ['codigo', 'descripcion', 'orden', 'activo', 'color_fondo']
@@ -11,18 +143,269 @@ class EstadoAsistenciaAdmin(admin.ModelAdmin):
     search_fields = ['codigo', 'descripcion']
 
 
+class PeriodoEmpleoFormSet(forms.BaseInlineFormSet):
+    """Los tramos de un empleado no se superponen: contarían dos veces sus días."""
+
+    def clean(self):
+        super().clean()
+        tramos = sorted(
+            (form.cleaned_data['desde'], form.cleaned_data.get('hasta'))
+            for form in self.forms
+            if form.cleaned_data.get('desde') and not form.cleaned_data.get('DELETE')
+        )
+        for (_, fin), (inicio, _) in zip(tramos, tramos[1:]):
+            if fin is None or fin >= inicio:
+                raise ValidationError('Los períodos de empleo no pueden superponerse.')
+
+
+class PeriodoEmpleoInline(admin.TabularInline):
+    model = PeriodoEmpleo
+    formset = PeriodoEmpleoFormSet
+    extra = 0
+
+
 @admin.register(Empleado)
 class EmpleadoAdmin(admin.ModelAdmin):
     list_display = ['apellido', 'nombre', 'activo', 'fecha_alta']
     list_filter = ['activo']
     ordering = ['apellido', 'nombre']
     search_fields = ['apellido', 'nombre']
+    readonly_fields = ['activo']
+    inlines = [PeriodoEmpleoInline]
+
+    # `activo` se deriva de los períodos; un alta sin períodos empieza hoy
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        empleado = form.instance
+        if not change and not empleado.periodos.exists():
+            abrir_periodo(empleado, timezone.localdate())
+        else:
+            sincronizar_activo(empleado)
+        invalidar_panel_hoy()
+
+
+@admin.register(CierreMes)
+class CierreMesAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'cerrado_por', 'cerrado_en']
+    list_select_related = ['cerrado_por']
+    exclude = ['snapshot']
+    readonly_fields = ['anio', 'mes', 'cerrado_por', 'cerrado_en']
+
+    def has_add_permission(self, request):
+        # Los cierres se generan desde la planilla, con su foto
+        return False
+
+
+@admin.register(LoteGuardado)
+class LoteGuardadoAdmin(admin.ModelAdmin):
+    list_display = ['clave', 'usuario', 'celdas', 'procesado_en']
+    list_select_related = ['usuario']
+    readonly_fields = ['clave', 'usuario', 'celdas', 'procesado_en']
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(CambioAsistencia)
+class CambioAsistenciaAdmin(admin.ModelAdmin):
+    list_display = ['registrado_en', 'usuario', 'empleado', 'fecha', 'estado_anterior', 'estado_nuevo', 'origen']
+    list_filter = ['origen', ('empleado', AutocompletarFilter)]
+    list_select_related = ['usuario', 'empleado', 'estado_anterior', 'estado_nuevo']
+    paginator = ConteoEstimadoPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+    # Registro de solo agregado: no se edita ni se borra desde el admin
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    @property
+    def media(self):
+        campo = CambioAsistencia._meta.get_field('empleado')
+        return super().media + AutocompleteSelect(campo, self.admin_site).media
+
+
+@admin.register(Fichada)
+class FichadaAdmin(admin.ModelAdmin):
+    list_display = ['empleado', 'momento', 'tipo', 'dispositivo', 'recibida_en']
+    list_filter = ['tipo', ('empleado', AutocompletarFilter)]
+    list_select_related = ['empleado']
+    ordering = ['-momento']
+    paginator = ConteoEstimadoPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+    # Eventos crudos del reloj: solo lectura
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    @property
+    def media(self):
+        campo = Fichada._meta.get_field('empleado')
+        return super().media + AutocompleteSelect(campo, self.admin_site).media
+
+
+@admin.register(AvisoAsistencia)
+class AvisoAsistenciaAdmin(admin.ModelAdmin):
+    list_display = ['empleado', 'fecha', 'motivo']
+    list_select_related = ['empleado']
+    autocomplete_fields = ['empleado']
+    ordering = ['-fecha']
+    search_fields = ['empleado__apellido', 'empleado__nombre']
+
+    # Un aviso nuevo o borrado cambia la tardanza derivada de ese día
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            previas = list(
+                AvisoAsistencia.objects.filter(pk=obj.pk).values_list('empleado_id', 'fecha')
+            ) if change else []
+            super().save_model(request, obj, form, change)
+            fichadas.derivar(previas + [(obj.empleado_id, obj.fecha)], request.user)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            fichadas.derivar([(obj.empleado_id, obj.fecha)], request.user)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            celdas = list(queryset.values_list('empleado_id', 'fecha'))
+            super().delete_queryset(request, queryset)
+            fichadas.derivar(celdas, request.user)
 
 
 @admin.register(RegistroAsistencia)
 class RegistroAsistenciaAdmin(admin.ModelAdmin):
     list_display = ['empleado', 'fecha', 'estado', 'observaciones']
-    list_filter = ['fecha', 'estado', 'empleado']
+    list_filter = ['fecha', 'estado', ('empleado', AutocompletarFilter)]
+    list_select_related = ['empleado', 'estado']
+    autocomplete_fields = ['empleado', 'estado']
     ordering = ['-fecha', 'empleado']
     search_fields = ['empleado__apellido', 'empleado__nombre']
-    date_hierarchy = 'fecha'
+    paginator = ConteoEstimadoPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    actions = ['reasignar_estado']
+    form = RegistroAsistenciaAdminForm
+
+    # Las altas, ediciones y bajas desde el admin también pasan por el
+    # punto único de registrar_cambios y respetan los meses cerrados
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            previas = list(
+                RegistroAsistencia.objects.filter(pk=obj.pk).values_list('empleado_id', 'fecha')
+            ) if change else []
+            verificar_meses_abiertos([fecha for _, fecha in previas] + [obj.fecha])
+            anteriores = auditoria.capturar(previas + [(obj.empleado_id, obj.fecha)])
+            if change:
+                obj.version += 1
+            super().save_model(request, obj, form, change)
+            # Si cambió la celda, la anterior queda vacía
+            nuevos = {celda: 0 for celda in previas}
+            nuevos[(obj.empleado_id, obj.fecha)] = obj.estado_id
+            registrar_cambios(nuevos)
+            auditoria.registrar(request.user, CambioAsistencia.ORIGEN_ADMIN, anteriores, nuevos)
+
+    def get_deleted_objects(self, objs, request):
+        # Los registros de meses cerrados se listan como protegidos: la
+        # confirmación no permite borrar
+        borrados, conteo, permisos, protegidos = super().get_deleted_objects(objs, request)
+        cerrados = set(CierreMes.objects.values_list('anio', 'mes'))
+        protegidos = list(protegidos) + [
+            f'{obj} (mes cerrado)' for obj in objs if (obj.fecha.year, obj.fecha.month) in cerrados
+        ]
+        return borrados, conteo, permisos, protegidos
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            verificar_meses_abiertos([obj.fecha])
+            super().delete_model(request, obj)
+            celda = (obj.empleado_id, obj.fecha)
+            registrar_cambios([celda])
+            auditoria.registrar(
+                request.user, CambioAsistencia.ORIGEN_ADMIN, {celda: obj.estado_id}, {celda: 0},
+            )
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            anteriores = {
+                (emp_id, fecha): estado_id
+                for emp_id, fecha, estado_id in queryset.values_list('empleado_id', 'fecha', 'estado_id')
+            }
+            verificar_meses_abiertos([fecha for _, fecha in anteriores])
+            super().delete_queryset(request, queryset)
+            registrar_cambios(anteriores)
+            auditoria.registrar(
+                request.user, CambioAsistencia.ORIGEN_ADMIN,
+                anteriores, dict.fromkeys(anteriores, 0),
+            )
+
+    @property
+    def media(self):
+        # Select2 para el filtro de empleado en el listado
+        campo = RegistroAsistencia._meta.get_field('empleado')
+        return super().media + AutocompleteSelect(campo, self.admin_site).media
+
+    @admin.action(description='Reasignar estado en un rango de fechas')
+    def reasignar_estado(self, request, queryset):
+        if 'aplicar' in request.POST:
+            form = ReasignarEstadoForm(request.POST)
+            if form.is_valid():
+                desde = form.cleaned_data['fecha_desde']
+                hasta = form.cleaned_data['fecha_hasta']
+                # Un único UPDATE sobre el conjunto seleccionado
+                en_rango = queryset.filter(fecha__gte=desde, fecha__lte=hasta)
+                try:
+                    with transaction.atomic():
+                        # Dentro de la transacción que escribe (ver servicios.cerrar_mes)
+                        verificar_meses_abiertos(dias_habiles(desde, hasta))
+                        # Se leen antes: la selección puede depender del estado que cambia
+                        anteriores = {
+                            (emp_id, fecha): estado_id
+                            for emp_id, fecha, estado_id in en_rango.values_list(
+                                'empleado_id', 'fecha', 'estado_id',
+                            )
+                        }
+                        actualizados = en_rango.update(
+                            estado=form.cleaned_data['estado'],
+                            version=F('version') + 1,
+                            updated_at=timezone.now(),
+                        )
+                        registrar_cambios(anteriores)
+                        auditoria.registrar(
+                            request.user, CambioAsistencia.ORIGEN_ADMIN,
+                            anteriores, dict.fromkeys(anteriores, form.cleaned_data['estado'].pk),
+                        )
+                except MesCerradoError as e:
+                    self.message_user(request, str(e), messages.ERROR)
+                    return None
+                self.message_user(
+                    request,
+                    f'{actualizados} registros reasignados a "{form.cleaned_data["estado"]}".',
+                    messages.SUCCESS,
+                )
+                return None
+        else:
+            form = ReasignarEstadoForm()
+
+        return render(request, 'admin/asistencia/reasignar_estado.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Reasignar estado',
+            'opts': self.model._meta,
+            'form': form,
+            'seleccion': request.POST.getlist(admin.helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            'action': request.POST.get('action'),
+        })
@@ -0,0 +1,133 @@
+"""
+Indicadores de ausentismo sobre una matriz densa empleados × días hábiles.
+
+Cada celda guarda un código int8: 0 = sin registro, 1..n = posición del
+estado en la lista de estados. Todos los indicadores se calculan con
+operaciones vectorizadas de NumPy sobre esa matriz.
+"""
+import numpy as np
+
+from . import repositorio
+from .models import EstadoAsistencia
+from .servicios import CODIGOS_AUSENCIA, CODIGOS_TARDANZA, dias_habiles, plantilla
+
+# Umbrales de alerta
+BRADFORD_ALTO = 125
+LUNES_VIERNES_MIN_AUSENCIAS = 3
+LUNES_VIERNES_PCT_ALERTA = 60.0
+TARDANZAS_VENTANA_DIAS = 20
+TARDANZAS_VENTANA_ALERTA = 3
+
+
+def cargar_matriz(desde, hasta):
+    """
+    Devuelve (empleados, dias, codigos_estado, matriz) para el período.
+    `empleados` es una lista de (id, nombre) alineada con las filas y
+    `codigos_estado` la lista de códigos alineada con los valores 1..n.
+    """
+    dias = dias_habiles(desde, hasta)
+    empleados = [(emp.id, str(emp)) for emp in plantilla(desde, hasta)]
+    estados = list(EstadoAsistencia.objects.values_list('id', 'codigo'))
+
+    matriz = np.zeros((len(empleados), len(dias)), dtype=np.int8)
+    if empleados and dias:
+        # Filas mensuales compactas: se decodifican sin recorrer un registro por día
+        ids, corridos, estados_ids = repositorio.matriz_calendario(
+            dias[0], dias[-1], plantilla(desde, hasta).values('pk'),
+        )
+        if ids:
+            columna_de = {dia: j for j, dia in enumerate(corridos)}
+            fila_de = {emp_id: i for i, emp_id in enumerate(ids)}
+            habiles = estados_ids[:, [columna_de[dia] for dia in dias]]
+            # estado_id → posición 1..n (0 queda en 0)
+            tope = max([int(habiles.max())] + [estado_id for estado_id, _ in estados])
+            valor_de = np.zeros(tope + 1, dtype=np.int8)
+            for k, (estado_id, _) in enumerate(estados, 1):
+                valor_de[estado_id] = k
+            presentes = [(i, fila_de[emp_id]) for i, (emp_id, _) in enumerate(empleados) if emp_id in fila_de]
+            if presentes:
+                destino, origen = (list(t) for t in zip(*presentes))
+                matriz[destino] = valor_de[habiles[origen]]
+    return empleados, dias, [codigo for _, codigo in estados], matriz
+
+
+def _mascara(matriz, codigos_estado, codigos):
+    valores = [k for k, codigo in enumerate(codigos_estado, 1) if codigo in codigos]
+    return np.isin(matriz, valores)
+
+
+def _racha_maxima(mascara):
+    """Longitud de la racha más larga de True por fila."""
+    if mascara.shape[1] == 0:
+        return np.zeros(mascara.shape[0], dtype=np.int64)
+    acumulado = np.cumsum(mascara, axis=1)
+    # Valor del acumulado en el último día sin marca, propagado hacia adelante
+    reinicio = np.maximum.accumulate(np.where(mascara, 0, acumulado), axis=1)
+    return (acumulado - reinicio).max(axis=1)
+
+
+def _maximo_en_ventana(mascara, ventana):
+    """Máxima cantidad de True dentro de cualquier ventana de `ventana` días."""
+    if mascara.shape[1] == 0:
+        return np.zeros(mascara.shape[0], dtype=np.int64)
+    acumulado = np.cumsum(mascara, axis=1)
+    if mascara.shape[1] <= ventana:
+        return acumulado[:, -1]
+    return np.maximum(
+        acumulado[:, ventana - 1],
+        (acumulado[:, ventana:] - acumulado[:, :-ventana]).max(axis=1),
+    )
+
+
+def indicadores_ausentismo(desde, hasta):
+    """
+    Factor de Bradford, episodios y racha máxima de ausencia, patrón
+    lunes/viernes y tardanzas reiteradas para cada empleado del período.
+    """
+    empleados, dias, codigos_estado, matriz = cargar_matriz(desde, hasta)
+    ausente = _mascara(matriz, codigos_estado, CODIGOS_AUSENCIA)
+    tarde = _mascara(matriz, codigos_estado, CODIGOS_TARDANZA)
+
+    # Episodio = racha de días de ausencia consecutivos
+    inicio = ausente.copy()
+    inicio[:, 1:] &= ~ausente[:, :-1]
+    episodios = inicio.sum(axis=1)
+    dias_ausencia = ausente.sum(axis=1)
+    bradford = episodios ** 2 * dias_ausencia
+    racha_ausencia = _racha_maxima(ausente)
+
+    dia_semana = np.array([d.weekday() for d in dias], dtype=np.int8)
+    lunes_viernes = ausente[:, (dia_semana == 0) | (dia_semana == 4)].sum(axis=1)
+    pct_lunes_viernes = np.divide(
+        lunes_viernes * 100.0, dias_ausencia,
+        out=np.zeros(len(empleados)), where=dias_ausencia > 0,
+    )
+
+    tardanzas = tarde.sum(axis=1)
+    tardanzas_ventana = _maximo_en_ventana(tarde, TARDANZAS_VENTANA_DIAS)
+
+    resultado = []
+    for i, (emp_id, nombre) in enumerate(empleados):
+        alertas = []
+        if bradford[i] >= BRADFORD_ALTO:
+            alertas.append('Bradford alto')
+        if (dias_ausencia[i] >= LUNES_VIERNES_MIN_AUSENCIAS
+                and pct_lunes_viernes[i] >= LUNES_VIERNES_PCT_ALERTA):
+            alertas.append('Patrón lunes/viernes')
+        if tardanzas_ventana[i] >= TARDANZAS_VENTANA_ALERTA:
+            alertas.append('Tardanzas reiteradas')
+        resultado.append({
+            'empleado_id': emp_id,
+            'empleado': nombre,
+            'dias_ausencia': int(dias_ausencia[i]),
+            'episodios': int(episodios[i]),
+            'bradford': int(bradford[i]),
+            'racha_ausencia': int(racha_ausencia[i]),
+            'ausencias_lunes_viernes': int(lunes_viernes[i]),
+            'pct_lunes_viernes': round(float(pct_lunes_viernes[i]), 1),
+            'tardanzas': int(tardanzas[i]),
+            'tardanzas_ventana': int(tardanzas_ventana[i]),
+            'alertas': alertas,
+        })
+    resultado.sort(key=lambda x: x['bradford'], reverse=True)
+    return {'total_dias_habiles': len(dias), 'empleados': resultado}
@@ -0,0 +1,58 @@
+"""
+Auditoría de cambios de asistencia con escritura diferida.
+
+Quien modifica registros lee primero los estados vigentes con `capturar`
+(una consulta sobre las filas mensuales) y, después de escribir, llama a
+`registrar` con los estados nuevos. Los eventos se acumulan en memoria y se
+insertan con un único bulk_create cuando la transacción se confirma: un
+rollback los descarta junto con los cambios, y el guardado no paga un
+INSERT por celda.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from . import repositorio
+from .models import CambioAsistencia
+
+
+def capturar(celdas):
+    """{(empleado_id, fecha): estado_id} vigente de `celdas` (0 = vacía)."""
+    celdas = set(celdas)
+    if not celdas:
+        return {}
+    fechas = [fecha for _, fecha in celdas]
+    actuales = repositorio.leer_estados(
+        min(fechas), max(fechas), empleado_ids={emp_id for emp_id, _ in celdas},
+    )
+    return {celda: actuales.get(celda, 0) for celda in celdas}
+
+
+def registrar(usuario, origen, anteriores, nuevos):
+    """
+    Agenda los eventos de las celdas cuyo estado cambió. `anteriores` y
+    `nuevos` son {(empleado_id, fecha): estado_id}, con 0 para celda vacía;
+    una celda ausente de `anteriores` se considera vacía.
+    """
+    momento = timezone.now()
+    usuario_id = usuario.pk if usuario is not None and usuario.is_authenticated else None
+    eventos = [
+        CambioAsistencia(
+            usuario_id=usuario_id,
+            empleado_id=emp_id,
+            fecha=fecha,
+            estado_anterior_id=anteriores.get((emp_id, fecha)) or None,
+            estado_nuevo_id=nuevo or None,
+            origen=origen,
+            registrado_en=momento,
+        )
+        for (emp_id, fecha), nuevo in nuevos.items()
+        if (anteriores.get((emp_id, fecha)) or 0) != (nuevo or 0)
+    ]
+    if eventos:
+        # Si el bulk_create falla, Django registra el error y el lote de
+        # auditoría se pierde: los cambios ya se confirmaron y no se deshacen
+        transaction.on_commit(
+            lambda: CambioAsistencia.objects.bulk_create(eventos, batch_size=500),
+            robust=True,
+        )
+    return len(eventos)
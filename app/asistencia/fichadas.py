@@ -0,0 +1,226 @@
+"""
+Ingesta de fichadas del reloj y derivación del estado diario.
+
+`ingerir` valida un lote de eventos, lo inserta con bulk_create (las
+fichadas repetidas se descartan) y deriva solo las celdas empleado × día
+que el lote toca. `derivar` también se invoca sola, por ejemplo al cargar
+o borrar un aviso. Reglas:
+
+- con al menos una fichada en el día decide la primera entrada (o el
+  primer evento si no hay entradas): hasta la hora de entrada más la
+  tolerancia es P; más tarde, TA si hay aviso para ese día y TS si no;
+- solo se escriben celdas vacías o con un estado que el motor deriva
+  (P, TA, TS): lo cargado a mano con otro estado no se pisa, tampoco si
+  se cargó entre la lectura y la escritura;
+- cada escritura incrementa la versión de la celda en la propia sentencia,
+  así la grilla detecta el cambio aunque haya leído la celda un instante
+  antes;
+- los días de meses cerrados o fuera de los períodos de empleo se omiten.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import auditoria, metricas
+from .models import (
+    AvisoAsistencia,
+    CambioAsistencia,
+    CierreMes,
+    Empleado,
+    EstadoAsistencia,
+    Fichada,
+    RegistroAsistencia,
+)
+from .servicios import CODIGO_PRESENTE, en_periodo, periodos_empleo, registrar_cambios
+
+# Eventos por llamada a ingerir (la API y el comando envían lotes menores)
+MAX_EVENTOS_LOTE = 10000
+
+CODIGO_TARDANZA_CON_AVISO = 'TA'
+CODIGO_TARDANZA_SIN_AVISO = 'TS'
+CODIGOS_DERIVADOS = (CODIGO_PRESENTE, CODIGO_TARDANZA_CON_AVISO, CODIGO_TARDANZA_SIN_AVISO)
+
+# Empleados por consulta
+_LOTE_EMPLEADOS = 500
+
+
+def _lotes(ids):
+    ids = sorted(ids)
+    return [ids[i:i + _LOTE_EMPLEADOS] for i in range(0, len(ids), _LOTE_EMPLEADOS)]
+
+
+def _momento(valor):
+    momento = datetime.fromisoformat(valor)
+    if timezone.is_naive(momento):
+        momento = timezone.make_aware(momento)
+    return momento
+
+
+def _hora_limite():
+    hora = time.fromisoformat(settings.FICHADAS_HORA_ENTRADA)
+    tolerancia = timedelta(minutes=settings.FICHADAS_TOLERANCIA_MINUTOS)
+    return (datetime.combine(datetime.min, hora) + tolerancia).time()
+
+
+# ─────────────────────────────────────────
+# Ingesta
+# ─────────────────────────────────────────
+
+def ingerir(eventos, usuario=None):
+    """
+    Guarda un lote de eventos {'empleado_id', 'momento' (ISO 8601; sin zona
+    se toma la local), 'tipo' ('E' o 'S', por omisión 'E'), 'dispositivo'}
+    y deriva los días afectados.
+
+    Devuelve {'recibidas', 'rechazadas', 'celdas'}: eventos válidos,
+    eventos descartados por formato o empleado inexistente y celdas de
+    asistencia escritas.
+    """
+    if len(eventos) > MAX_EVENTOS_LOTE:
+        raise ValueError(f'Un lote no puede superar {MAX_EVENTOS_LOTE} eventos.')
+    recibida_en = timezone.now()
+    filas = []
+    for evento in eventos:
+        try:
+            fila = Fichada(
+                empleado_id=int(evento['empleado_id']),
+                momento=_momento(evento['momento']),
+                tipo=evento.get('tipo') or Fichada.ENTRADA,
+                dispositivo=str(evento.get('dispositivo') or '')[:50],
+                recibida_en=recibida_en,
+            )
+        except (KeyError, TypeError, ValueError):
+            continue
+        if fila.tipo in (Fichada.ENTRADA, Fichada.SALIDA):
+            filas.append(fila)
+
+    existentes = set()
+    for lote in _lotes({f.empleado_id for f in filas}):
+        existentes.update(Empleado.objects.filter(pk__in=lote).values_list('pk', flat=True))
+    filas = [f for f in filas if f.empleado_id in existentes]
+
+    with transaction.atomic():
+        Fichada.objects.bulk_create(filas, batch_size=500, ignore_conflicts=True)
+        escritas = derivar(
+            {(f.empleado_id, timezone.localdate(f.momento)) for f in filas}, usuario,
+        )
+    metricas.incrementar('asistencia_fichadas_total', len(filas), resultado='recibida')
+    metricas.incrementar('asistencia_fichadas_total', len(eventos) - len(filas), resultado='rechazada')
+    return {'recibidas': len(filas), 'rechazadas': len(eventos) - len(filas), 'celdas': escritas}
+
+
+# ─────────────────────────────────────────
+# Derivación
+# ─────────────────────────────────────────
+
+def derivar(celdas, usuario=None):
+    """
+    Recalcula el estado de `celdas` (pares (empleado_id, fecha)) a partir de
+    sus fichadas y avisos. Devuelve la cantidad de celdas escritas.
+    """
+    celdas = set(celdas)
+    anios = {fecha.year for _, fecha in celdas}
+    cerrados = set(CierreMes.objects.filter(anio__in=anios).values_list('anio', 'mes'))
+    celdas = {(e, f) for e, f in celdas if (f.year, f.month) not in cerrados}
+    if not celdas:
+        return 0
+
+    # Una fichada fuera de los períodos de empleo (por ejemplo, tras la baja)
+    # queda guardada pero no marca asistencia
+    desde = min(f for _, f in celdas)
+    hasta = max(f for _, f in celdas)
+    tramos = {}
+    for lote in _lotes({e for e, _ in celdas}):
+        tramos.update(periodos_empleo(desde, hasta, lote))
+    celdas = {(e, f) for e, f in celdas if en_periodo(tramos.get(e, []), f)}
+    if not celdas:
+        return 0
+
+    estados = dict(
+        EstadoAsistencia.objects.filter(codigo__in=CODIGOS_DERIVADOS).values_list('codigo', 'id')
+    )
+    derivables = set(estados.values())
+    inicio = timezone.make_aware(datetime.combine(desde, time.min))
+    fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+
+    primeras, avisos, actuales = {}, set(), {}
+    for lote in _lotes({e for e, _ in celdas}):
+        for emp_id, momento, tipo in Fichada.objects.filter(
+            empleado_id__in=lote, momento__gte=inicio, momento__lt=fin,
+        ).order_by().values_list('empleado_id', 'momento', 'tipo').iterator(chunk_size=10000):
+            celda = (emp_id, timezone.localdate(momento))
+            if celda not in celdas:
+                continue
+            # Las entradas primero; entre ellas, la más temprana
+            clave = (tipo != Fichada.ENTRADA, momento)
+            if celda not in primeras or clave < primeras[celda]:
+                primeras[celda] = clave
+        avisos.update(AvisoAsistencia.objects.filter(
+            empleado_id__in=lote, fecha__gte=desde, fecha__lte=hasta,
+        ).values_list('empleado_id', 'fecha'))
+        actuales.update(
+            ((emp_id, fecha), estado_id)
+            for emp_id, fecha, estado_id in RegistroAsistencia.objects.filter(
+                empleado_id__in=lote, fecha__gte=desde, fecha__lte=hasta,
+            ).values_list('empleado_id', 'fecha', 'estado_id')
+        )
+
+    limite = _hora_limite()
+    nuevos = {}
+    for celda, (_, momento) in primeras.items():
+        if timezone.localtime(momento).time() <= limite:
+            codigo = CODIGO_PRESENTE
+        elif celda in avisos:
+            codigo = CODIGO_TARDANZA_CON_AVISO
+        else:
+            codigo = CODIGO_TARDANZA_SIN_AVISO
+        estado_id = estados.get(codigo)
+        actual = actuales.get(celda)
+        if estado_id is None or actual == estado_id:
+            continue
+        if actual is not None and actual not in derivables:
+            continue
+        nuevos[celda] = estado_id
+    if not nuevos:
+        return 0
+
+    with transaction.atomic():
+        escritas = set()
+        celdas = list(nuevos.items())
+        for i in range(0, len(celdas), _LOTE_EMPLEADOS):
+            escritas |= _escribir(celdas[i:i + _LOTE_EMPLEADOS], derivables)
+        nuevos = {celda: estado_id for celda, estado_id in nuevos.items() if celda in escritas}
+        registrar_cambios(nuevos)
+        auditoria.registrar(usuario, CambioAsistencia.ORIGEN_RELOJ, actuales, nuevos)
+    return len(nuevos)
+
+
+def _escribir(celdas, derivables):
+    """
+    Upsert de celdas ((empleado_id, fecha), estado_id). Una celda existente
+    se actualiza solo si su estado sigue siendo derivable, y su versión se
+    incrementa en la misma sentencia. Devuelve las celdas escritas.
+    """
+    ops = connection.ops
+    tabla = ops.quote_name(RegistroAsistencia._meta.db_table)
+    ahora = ops.adapt_datetimefield_value(timezone.now())
+    sql = f"""
+        INSERT INTO {tabla}
+            (empleado_id, fecha, estado_id, observaciones, version, created_at, updated_at)
+        VALUES {', '.join(["(%s, %s, %s, '', 1, %s, %s)"] * len(celdas))}
+        ON CONFLICT (empleado_id, fecha) DO UPDATE SET
+            estado_id = excluded.estado_id,
+            version = {tabla}.version + 1,
+            updated_at = excluded.updated_at
+        WHERE {tabla}.estado_id IN ({', '.join(['%s'] * len(derivables))})
+        RETURNING empleado_id, fecha
+    """
+    parametros = []
+    for (emp_id, fecha), estado_id in celdas:
+        parametros += [emp_id, ops.adapt_datefield_value(fecha), estado_id, ahora, ahora]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros + sorted(derivables))
+        # La columna `fecha` es de tipo date: el driver ya la convierte
+        return set(cursor.fetchall())
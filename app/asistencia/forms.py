@@ -1,9 +1,23 @@
+from datetime import date
+
 from django import forms
 
 from .models import Empleado, EstadoAsistencia
 
 
 class EmpleadoForm(forms.ModelForm):
+    # Solo al crear: abre el primer período de empleo (ver servicios.abrir_periodo)
+    fecha_ingreso = forms.DateField(
+        label='Fecha de ingreso',
+        initial=date.today,
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}, format='%Y-%m-%d'),
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            del self.fields['fecha_ingreso']
+
     class Meta:
         model = Empleado
         fields = ['nombre', 'apellido', 'notas']
@@ -0,0 +1,18 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from app.asistencia.servicios import huecos_al_dia
+
+
+class Command(BaseCommand):
+    help = (
+        "Extiende el índice de huecos hasta hoy (la primera vez lo calcula "
+        "completo). Programarlo una vez por día, por ejemplo con cron: las "
+        "páginas solo leen el índice."
+    )
+
+    def handle(self, *args, **options):
+        hoy = date.today()
+        huecos_al_dia(hoy)
+        self.stdout.write(self.style.SUCCESS(f"Índice de huecos al día hasta {hoy:%d/%m/%Y}."))
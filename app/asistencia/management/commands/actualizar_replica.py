@@ -0,0 +1,53 @@
+import os
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from app.asistencia.routers import ALIAS_REPLICA
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia la base principal sobre la réplica de reportes con la API de "
+        "backup en línea de SQLite. Con --intervalo se repite indefinidamente."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo', type=int, default=0,
+            help="Segundos entre actualizaciones (0 = una sola vez)",
+        )
+
+    def handle(self, *args, **options):
+        if ALIAS_REPLICA not in connections.databases:
+            raise CommandError(f"No hay una base '{ALIAS_REPLICA}' configurada.")
+        origen = connections['default'].settings_dict
+        destino = connections[ALIAS_REPLICA].settings_dict
+        if 'sqlite3' not in origen['ENGINE'] or 'sqlite3' not in destino['ENGINE']:
+            raise CommandError("La réplica por backup solo está disponible para SQLite.")
+
+        while True:
+            self._copiar(str(origen['NAME']), str(destino['NAME']))
+            if options['intervalo'] <= 0:
+                break
+            time.sleep(options['intervalo'])
+
+    def _copiar(self, origen, destino):
+        inicio = time.time()
+        temporal = destino + '.tmp'
+        fuente = sqlite3.connect(origen)
+        copia = sqlite3.connect(temporal)
+        try:
+            # Por páginas, para no bloquear las escrituras durante toda la copia
+            fuente.backup(copia, pages=1024)
+        finally:
+            copia.close()
+            fuente.close()
+        os.replace(temporal, destino)
+        # La antigüedad de la réplica se mide desde el inicio de la copia
+        os.utime(destino, (inicio, inicio))
+        self.stdout.write(self.style.SUCCESS(
+            f"Réplica actualizada en {time.time() - inicio:.2f} s"
+        ))
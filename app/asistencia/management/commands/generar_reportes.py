@@ -0,0 +1,158 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+
+from app.asistencia import repositorio
+from app.asistencia.models import EstadoAsistencia
+from app.asistencia.reportes import (
+    cobertura,
+    generar_reporte_empleado,
+    inicializar_proceso,
+    nombre_archivo,
+    porcentaje,
+)
+from app.asistencia.routers import presupuesto, usando_replica
+from app.asistencia.servicios import (
+    dias_habiles,
+    estado_a_dict,
+    periodos_empleo,
+    plantilla,
+    rango_mes,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera los reportes HTML imprimibles de asistencia de cada empleado "
+        "para un período, en paralelo. Los reportes ya generados se omiten, "
+        "de modo que una ejecución interrumpida puede reanudarse."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anio', type=int, help="Año del período mensual")
+        parser.add_argument('--mes', type=int, help="Mes del período mensual")
+        parser.add_argument('--desde', type=date.fromisoformat, help="Inicio (AAAA-MM-DD)")
+        parser.add_argument('--hasta', type=date.fromisoformat, help="Fin (AAAA-MM-DD)")
+        parser.add_argument(
+            '--salida', help="Directorio de salida (por defecto reportes/<desde>_<hasta>)",
+        )
+        parser.add_argument(
+            '--procesos', type=int, default=os.cpu_count() or 1,
+            help="Cantidad de procesos (1 = sin pool)",
+        )
+        parser.add_argument(
+            '--forzar', action='store_true',
+            help="Regenerar también los reportes ya existentes",
+        )
+
+    def handle(self, *args, **options):
+        desde, hasta = self._periodo(options)
+        salida = options['salida'] or os.path.join(
+            settings.BASE_DIR, 'reportes', f'{desde.isoformat()}_{hasta.isoformat()}'
+        )
+        os.makedirs(salida, exist_ok=True)
+
+        # Las lecturas van a la réplica de reportes si está al día
+        with usando_replica(presupuesto('generar_reportes')):
+            empleados = [
+                {'id': emp.id, 'nombre': str(emp)}
+                for emp in plantilla(desde, hasta)
+            ]
+            estados = [estado_a_dict(e) for e in EstadoAsistencia.objects.filter(activo=True)]
+            tramos = periodos_empleo(desde, hasta)
+            periodos = {
+                emp['id']: [(d.isoformat(), h.isoformat()) for d, h in tramos.get(emp['id'], [])]
+                for emp in empleados
+            }
+
+            # Filas mensuales compactas de todo el período, agrupadas por empleado
+            registros = {emp['id']: {} for emp in empleados}
+            for (emp_id, fecha), estado_id in repositorio.leer_estados(desde, hasta).items():
+                if emp_id in registros:
+                    registros[emp_id][fecha.isoformat()] = estado_id
+
+        pendientes = [
+            emp for emp in empleados
+            if options['forzar'] or not os.path.exists(os.path.join(salida, nombre_archivo(emp)))
+        ]
+        omitidos = len(empleados) - len(pendientes)
+        if omitidos:
+            self.stdout.write(f"{omitidos} reportes ya existentes, se omiten.")
+
+        trabajos = [
+            {
+                'empleado': emp,
+                'desde': desde.isoformat(),
+                'hasta': hasta.isoformat(),
+                'periodos': periodos[emp['id']],
+                'estados': estados,
+                'registros': registros[emp['id']],
+                'salida': salida,
+            }
+            for emp in pendientes
+        ]
+        self._ejecutar(trabajos, options['procesos'])
+        self._escribir_indice(salida, empleados, registros, tramos, desde, hasta)
+        self.stdout.write(self.style.SUCCESS(
+            f"Reportes de {len(empleados)} empleados en {salida}"
+        ))
+
+    def _periodo(self, options):
+        if options['desde'] or options['hasta']:
+            if not (options['desde'] and options['hasta']):
+                raise CommandError("Indicá --desde y --hasta juntos.")
+            desde, hasta = options['desde'], options['hasta']
+        else:
+            hoy = date.today()
+            anio = options['anio'] or hoy.year
+            mes = options['mes'] or hoy.month
+            try:
+                desde, hasta = rango_mes(anio, mes)
+            except ValueError:
+                raise CommandError(f"Mes inválido: {mes}/{anio}")
+        if desde > hasta:
+            raise CommandError("La fecha de inicio es posterior a la de fin.")
+        return desde, hasta
+
+    def _ejecutar(self, trabajos, procesos):
+        total = len(trabajos)
+        if not total:
+            return
+        if procesos <= 1:
+            for i, trabajo in enumerate(trabajos, 1):
+                generar_reporte_empleado(trabajo)
+                self._progreso(i, total, trabajo)
+            return
+
+        with ProcessPoolExecutor(max_workers=procesos, initializer=inicializar_proceso) as pool:
+            futuros = {pool.submit(generar_reporte_empleado, t): t for t in trabajos}
+            for i, futuro in enumerate(as_completed(futuros), 1):
+                futuro.result()
+                self._progreso(i, total, futuros[futuro])
+
+    def _progreso(self, actual, total, trabajo):
+        self.stdout.write(f"[{actual}/{total}] {trabajo['empleado']['nombre']}")
+
+    def _escribir_indice(self, salida, empleados, registros, tramos, desde, hasta):
+        dias = dias_habiles(desde, hasta)
+        filas = []
+        for emp in empleados:
+            posibles, marcados = cobertura(dias, tramos.get(emp['id'], []), registros[emp['id']])
+            filas.append({
+                'empleado': emp,
+                'archivo': nombre_archivo(emp),
+                'total_marcados': marcados,
+                'cobertura': porcentaje(marcados, len(posibles)),
+            })
+        html = render_to_string('asistencia/reportes/indice.html', {
+            'filas': filas,
+            'desde': desde,
+            'hasta': hasta,
+            'total_dias_habiles': len(dias),
+        })
+        with open(os.path.join(salida, 'index.html'), 'w', encoding='utf-8') as f:
+            f.write(html)
@@ -0,0 +1,62 @@
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.asistencia.fichadas import MAX_EVENTOS_LOTE, ingerir
+
+
+class Command(BaseCommand):
+    help = (
+        "Ingiere fichadas del reloj desde un CSV (empleado_id,momento,tipo[,dispositivo]; "
+        "momento en ISO 8601) y deriva el estado de los días afectados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del CSV, o '-' para leer de la entrada estándar")
+        parser.add_argument(
+            '--lote', type=int, default=5000,
+            help=f"Eventos por transacción (máximo {MAX_EVENTOS_LOTE})",
+        )
+
+    def handle(self, *args, **options):
+        lote = options['lote']
+        if not 0 < lote <= MAX_EVENTOS_LOTE:
+            raise CommandError(f"--lote debe estar entre 1 y {MAX_EVENTOS_LOTE}.")
+
+        archivo = sys.stdin if options['archivo'] == '-' else open(options['archivo'], newline='')
+        totales = {'recibidas': 0, 'rechazadas': 0, 'celdas': 0}
+        inicio = time.perf_counter()
+        try:
+            eventos = []
+            for fila in csv.reader(archivo):
+                # Encabezado o líneas vacías
+                if not fila or not fila[0].strip().isdigit():
+                    continue
+                eventos.append({
+                    'empleado_id': fila[0],
+                    'momento': fila[1] if len(fila) > 1 else '',
+                    'tipo': fila[2].strip() if len(fila) > 2 else '',
+                    'dispositivo': fila[3] if len(fila) > 3 else '',
+                })
+                if len(eventos) == lote:
+                    self._sumar(totales, ingerir(eventos))
+                    eventos = []
+            if eventos:
+                self._sumar(totales, ingerir(eventos))
+        finally:
+            if archivo is not sys.stdin:
+                archivo.close()
+
+        segundos = time.perf_counter() - inicio
+        ritmo = totales['recibidas'] / segundos if segundos else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{totales['recibidas']} fichadas ingeridas ({totales['rechazadas']} rechazadas), "
+            f"{totales['celdas']} celdas actualizadas en {segundos:.1f} s ({ritmo:.0f} eventos/s)."
+        ))
+
+    @staticmethod
+    def _sumar(totales, resultado):
+        for clave in totales:
+            totales[clave] += resultado[clave]
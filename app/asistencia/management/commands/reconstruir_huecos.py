@@ -0,0 +1,17 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from app.asistencia.servicios import reiniciar_huecos
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenera el índice de huecos (días hábiles sin registro dentro de los "
+        "períodos de empleo) hasta hoy. Úsese tras cargar datos por fuera de la "
+        "aplicación; en uso normal lo mantienen las escrituras y actualizar_huecos."
+    )
+
+    def handle(self, *args, **options):
+        huecos = reiniciar_huecos(date.today())
+        self.stdout.write(self.style.SUCCESS(f"{huecos} huecos calculados."))
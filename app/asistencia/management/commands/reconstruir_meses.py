@@ -0,0 +1,22 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app.asistencia.repositorio import reconstruir
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenera las filas mensuales compactas (MesAsistencia) y las "
+        "observaciones a partir de RegistroAsistencia."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=date.fromisoformat, help="Inicio (AAAA-MM-DD)")
+        parser.add_argument('--hasta', type=date.fromisoformat, help="Fin (AAAA-MM-DD)")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            meses = reconstruir(options['desde'], options['hasta'])
+        self.stdout.write(self.style.SUCCESS(f"{meses} meses recalculados."))
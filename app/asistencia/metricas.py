@@ -0,0 +1,332 @@
+"""
+Métricas operativas en el formato de texto de Prometheus.
+
+Cada proceso acumula contadores e histogramas en memoria y, como mucho una
+vez cada VOLCADO_SEGUNDOS, escribe su foto en un archivo propio dentro de
+settings.METRICAS_DIR. /metrics suma la memoria del proceso que atiende y
+las fotos de los demás. Las fotos de procesos ya terminados se suman a un
+archivo acumulado y se borran: los contadores no retroceden y el directorio
+no crece con cada reinicio. Sin METRICAS_DIR solo se ven las métricas del
+proceso que responde.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+try:
+    import fcntl
+except ImportError:  # Windows: las fotos de procesos terminados no se podan
+    fcntl = None
+
+# Segundos mínimos entre dos volcados del mismo proceso
+VOLCADO_SEGUNDOS = 5
+
+# Suma de las fotos de los procesos terminados
+ACUMULADO = 'metricas-acumulado.json'
+
+_CUBETAS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_CUBETAS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+_CUBETAS_CELDAS = (1, 10, 50, 100, 250, 500, 1000)
+
+# nombre: (tipo, descripción, cubetas)
+METRICAS = {
+    'asistencia_requests_total': (
+        'counter', 'Requests atendidos por vista, método y código HTTP.', None,
+    ),
+    'asistencia_request_segundos': (
+        'histogram', 'Duración de los requests por vista.', _CUBETAS_SEGUNDOS,
+    ),
+    'asistencia_consultas_por_request': (
+        'histogram', 'Consultas SQL ejecutadas por request, por vista.', _CUBETAS_CONSULTAS,
+    ),
+    'asistencia_celdas_guardadas': (
+        'histogram', 'Celdas recibidas por llamada a asistencia_guardar.', _CUBETAS_CELDAS,
+    ),
+    'asistencia_conflictos_total': (
+        'counter', 'Celdas no aplicadas porque otra edición las cambió desde que se cargaron.', None,
+    ),
+    'asistencia_sqlite_reintentos_total': (
+        'counter', 'Sentencias reintentadas porque SQLite informó la base bloqueada.', None,
+    ),
+    'asistencia_sqlite_bloqueos_total': (
+        'counter', 'Sentencias que fallaron con la base bloqueada.', None,
+    ),
+    'asistencia_cache_lecturas_total': (
+        'counter', 'Lecturas de caché por familia de clave y resultado (hit/miss).', None,
+    ),
+    'asistencia_fichadas_total': (
+        'counter', 'Fichadas del reloj por resultado (recibida/rechazada).', None,
+    ),
+}
+
+_lock = threading.Lock()
+_contadores = {}
+_histogramas = {}
+_archivo = None
+_ultimo_volcado = 0.0
+
+
+def _clave(nombre, etiquetas):
+    if nombre not in METRICAS:
+        raise KeyError(f'Métrica no declarada: {nombre}')
+    return nombre, tuple(sorted((k, str(v)) for k, v in etiquetas.items()))
+
+
+def incrementar(nombre, valor=1, **etiquetas):
+    clave = _clave(nombre, etiquetas)
+    with _lock:
+        _contadores[clave] = _contadores.get(clave, 0) + valor
+
+
+def observar(nombre, valor, **etiquetas):
+    clave = _clave(nombre, etiquetas)
+    cubetas = METRICAS[nombre][2]
+    with _lock:
+        # Conteo por cubeta (no acumulado), la última es +Inf; luego la suma
+        datos = _histogramas.setdefault(clave, [0] * (len(cubetas) + 1) + [0.0])
+        for i, limite in enumerate(cubetas):
+            if valor <= limite:
+                break
+        else:
+            i = len(cubetas)
+        datos[i] += 1
+        datos[-1] += valor
+
+
+# ─────────────────────────────────────────
+# Volcado entre procesos
+# ─────────────────────────────────────────
+
+def _directorio():
+    directorio = getattr(settings, 'METRICAS_DIR', None)
+    return Path(directorio) if directorio else None
+
+
+def _foto():
+    with _lock:
+        return {
+            'contadores': [[n, list(e), v] for (n, e), v in _contadores.items()],
+            'histogramas': [[n, list(e), list(d)] for (n, e), d in _histogramas.items()],
+        }
+
+
+def volcar(forzar=False):
+    """Escribe la foto del proceso si pasó VOLCADO_SEGUNDOS desde la última."""
+    global _archivo, _ultimo_volcado
+    directorio = _directorio()
+    ahora = time.monotonic()
+    if directorio is None or (not forzar and ahora - _ultimo_volcado < VOLCADO_SEGUNDOS):
+        return
+    _ultimo_volcado = ahora
+    if _archivo is None:
+        # pid + arranque: un pid reutilizado no pisa la foto de otro proceso
+        _archivo = f'metricas-{os.getpid()}-{time.time_ns()}.json'
+    directorio.mkdir(parents=True, exist_ok=True)
+    temporal = directorio / f'{_archivo}.tmp'
+    temporal.write_text(json.dumps(_foto()))
+    os.replace(temporal, directorio / _archivo)
+
+
+def _pid(ruta):
+    """Pid del proceso dueño de la foto, o None si no es la foto de un proceso."""
+    partes = ruta.name.split('-')
+    return int(partes[1]) if len(partes) == 3 and partes[1].isdigit() else None
+
+
+def _vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _leer(ruta):
+    try:
+        return json.loads(ruta.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _podar(directorio):
+    """
+    Suma al ACUMULADO las fotos de los procesos terminados y las borra. El
+    candado evita que dos exportaciones simultáneas sumen la misma foto.
+    """
+    if fcntl is None:
+        return
+    terminadas = [
+        ruta for ruta in directorio.glob('metricas-*.json')
+        if ruta.name != _archivo and _pid(ruta) is not None and not _vivo(_pid(ruta))
+    ]
+    if not terminadas:
+        return
+    with open(directorio / '.acumulado.lock', 'w') as candado:
+        fcntl.flock(candado, fcntl.LOCK_EX)
+        acumulado = directorio / ACUMULADO
+        fotos = [foto for foto in [_leer(acumulado)] if foto is not None]
+        sumadas = []
+        for ruta in terminadas:
+            # Otra exportación pudo haberla sumado mientras se esperaba el candado
+            foto = _leer(ruta)
+            if foto is not None:
+                fotos.append(foto)
+                sumadas.append(ruta)
+        if sumadas:
+            contadores, histogramas = _sumar(fotos)
+            temporal = directorio / f'{ACUMULADO}.tmp'
+            temporal.write_text(json.dumps({
+                'contadores': [[n, list(e), v] for (n, e), v in contadores.items()],
+                'histogramas': [[n, list(e), d] for (n, e), d in histogramas.items()],
+            }))
+            os.replace(temporal, acumulado)
+            for ruta in sumadas:
+                ruta.unlink(missing_ok=True)
+    # Volcados que un proceso dejó a medio escribir al terminar
+    for ruta in directorio.glob('metricas-*.json.tmp'):
+        pid = _pid(ruta)
+        if pid is not None and not _vivo(pid):
+            ruta.unlink(missing_ok=True)
+
+
+def _fotos():
+    """Foto de este proceso (en memoria) más las de los otros procesos."""
+    fotos = [_foto()]
+    directorio = _directorio()
+    if directorio is not None and directorio.is_dir():
+        _podar(directorio)
+        for ruta in directorio.glob('metricas-*.json'):
+            if ruta.name == _archivo:
+                continue
+            foto = _leer(ruta)
+            if foto is not None:
+                fotos.append(foto)
+    return fotos
+
+
+def _sumar(fotos):
+    """({(nombre, etiquetas): valor}, {(nombre, etiquetas): datos}) de todas las fotos."""
+    contadores, histogramas = {}, {}
+    for foto in fotos:
+        for nombre, etiquetas, valor in foto['contadores']:
+            clave = (nombre, tuple(map(tuple, etiquetas)))
+            contadores[clave] = contadores.get(clave, 0) + valor
+        for nombre, etiquetas, datos in foto['histogramas']:
+            clave = (nombre, tuple(map(tuple, etiquetas)))
+            previos = histogramas.get(clave)
+            histogramas[clave] = datos if previos is None else [a + b for a, b in zip(previos, datos)]
+    return contadores, histogramas
+
+
+# ─────────────────────────────────────────
+# Exportación
+# ─────────────────────────────────────────
+
+def _escapar(valor):
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(etiquetas, **extra):
+    pares = list(etiquetas) + list(extra.items())
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in pares) + '}'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def exportar():
+    """Todas las métricas, sumadas entre procesos, en formato de texto."""
+    contadores, histogramas = _sumar(_fotos())
+
+    lineas = []
+    for nombre, (tipo, descripcion, cubetas) in METRICAS.items():
+        lineas.append(f'# HELP {nombre} {descripcion}')
+        lineas.append(f'# TYPE {nombre} {tipo}')
+        if tipo == 'counter':
+            for (n, etiquetas), valor in sorted(contadores.items()):
+                if n == nombre:
+                    lineas.append(f'{nombre}{_etiquetas(etiquetas)} {_numero(valor)}')
+            continue
+        for (n, etiquetas), datos in sorted(histogramas.items()):
+            if n != nombre:
+                continue
+            acumulado = 0
+            for limite, cantidad in zip(list(cubetas) + ['+Inf'], datos[:-1]):
+                acumulado += cantidad
+                lineas.append(
+                    f'{nombre}_bucket{_etiquetas(etiquetas, le=str(limite))} {acumulado}'
+                )
+            lineas.append(f'{nombre}_sum{_etiquetas(etiquetas)} {_numero(datos[-1])}')
+            lineas.append(f'{nombre}_count{_etiquetas(etiquetas)} {acumulado}')
+
+    # Proporción de aciertos de caché por familia, derivada de los contadores
+    lecturas = {}
+    for (n, etiquetas), valor in contadores.items():
+        if n == 'asistencia_cache_lecturas_total':
+            etiquetas = dict(etiquetas)
+            par = lecturas.setdefault(etiquetas['familia'], [0, 0])
+            par[0 if etiquetas['resultado'] == 'hit' else 1] += valor
+    lineas.append('# HELP asistencia_cache_aciertos_ratio Aciertos sobre lecturas de caché, por familia de clave.')
+    lineas.append('# TYPE asistencia_cache_aciertos_ratio gauge')
+    for familia, (aciertos, fallos) in sorted(lecturas.items()):
+        lineas.append(
+            f'asistencia_cache_aciertos_ratio{_etiquetas([("familia", familia)])} '
+            f'{_numero(aciertos / (aciertos + fallos))}'
+        )
+    return '\n'.join(lineas) + '\n'
+
+
+# ─────────────────────────────────────────
+# Caché instrumentada
+# ─────────────────────────────────────────
+
+_FALTANTE = object()
+
+
+def familia_clave(clave):
+    """
+    Agrupa las claves para no crear una serie por clave:
+    'asistencia:historial:12:2025' → 'historial',
+    'template.cache.grilla_leyenda.<hash>' → 'grilla_leyenda'.
+    """
+    if clave.startswith('template.cache.'):
+        return clave.split('.')[2]
+    partes = clave.split(':')
+    return partes[1] if len(partes) > 1 else partes[0]
+
+
+class ConMetricas:
+    """Cuenta aciertos y fallos de lectura por familia de clave."""
+
+    def get(self, key, default=None, version=None):
+        valor = super().get(key, _FALTANTE, version)
+        incrementar(
+            'asistencia_cache_lecturas_total',
+            familia=familia_clave(key),
+            resultado='miss' if valor is _FALTANTE else 'hit',
+        )
+        return default if valor is _FALTANTE else valor
+
+
+class CacheLocalConMetricas(ConMetricas, LocMemCache):
+    """Caché de un solo proceso (pruebas y desarrollo)."""
+
+
+class CacheArchivosConMetricas(ConMetricas, FileBasedCache):
+    """Caché en archivos, compartida por los procesos de un mismo servidor."""
+
+
+class CacheRedisConMetricas(ConMetricas, RedisCache):
+    """Caché en Redis, compartida por todos los servidores."""
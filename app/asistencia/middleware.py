@@ -0,0 +1,127 @@
+import re
+import time
+from contextlib import ExitStack
+
+from django.db import OperationalError, connections
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from . import metricas
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli es opcional
+    brotli = None
+
+acepta_br = re.compile(r'\bbr\b')
+
+
+def usa_token_csrf(request):
+    """
+    Si la vista pidió el token CSRF (get_token o {% csrf_token %}). Django
+    marca la clave al usarlo; CsrfViewMiddleware la vuelve a False después
+    de fijar la cookie, pero no la quita.
+    """
+    return 'CSRF_COOKIE_NEEDS_UPDATE' in request.META
+
+
+class CompresionMiddleware(GZipMiddleware):
+    """
+    Comprime las respuestas con brotli si el cliente lo acepta y, si no,
+    con gzip. No toca respuestas en streaming ni las que ya traen
+    Content-Encoding (por ejemplo, los estáticos precomprimidos).
+
+    Las respuestas que llevan el token CSRF van siempre con gzip:
+    GZipMiddleware agrega relleno aleatorio contra BREACH y brotli no tiene
+    dónde llevarlo.
+    """
+    # Calidad intermedia: casi la tasa de la máxima a una fracción del costo
+    calidad_brotli = 5
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if (
+            brotli is None
+            or not acepta_br.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+            or usa_token_csrf(request)
+        ):
+            return super().process_response(request, response)
+
+        # Mismos criterios que GZipMiddleware
+        if len(response.content) < 200:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        comprimido = brotli.compress(response.content, quality=self.calidad_brotli)
+        if len(comprimido) >= len(response.content):
+            return response
+        response.content = comprimido
+        response.headers['Content-Length'] = str(len(response.content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+
+# Reintentos ante "database is locked" fuera de una transacción
+REINTENTOS_BLOQUEO = 3
+
+_METODOS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+class _EjecucionInstrumentada:
+    """
+    Envoltorio de ejecución de consultas: las cuenta y, si SQLite informa la
+    base bloqueada en modo autocommit, reintenta la sentencia. Dentro de una
+    transacción no se reintenta (lo ya escrito quedaría a medias) y el error
+    se propaga.
+    """
+
+    def __init__(self):
+        self.consultas = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.consultas += 1
+        conexion = context['connection']
+        for intento in range(REINTENTOS_BLOQUEO + 1):
+            try:
+                return execute(sql, params, many, context)
+            except OperationalError as e:
+                if conexion.vendor != 'sqlite' or 'database is locked' not in str(e):
+                    raise
+                if conexion.in_atomic_block or intento == REINTENTOS_BLOQUEO:
+                    metricas.incrementar('asistencia_sqlite_bloqueos_total', base=conexion.alias)
+                    raise
+                metricas.incrementar('asistencia_sqlite_reintentos_total', base=conexion.alias)
+                time.sleep(0.05 * (intento + 1))
+
+
+class MetricasMiddleware:
+    """
+    Cantidad, duración y consultas SQL de cada request, por nombre de vista
+    (ver metricas.py).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        ejecucion = _EjecucionInstrumentada()
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            for alias in connections:
+                pila.enter_context(connections[alias].execute_wrapper(ejecucion))
+            response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        coincidencia = request.resolver_match
+        vista = (coincidencia.url_name if coincidencia else None) or 'sin_ruta'
+        metodo = request.method if request.method in _METODOS else 'otro'
+        metricas.incrementar(
+            'asistencia_requests_total', vista=vista, metodo=metodo, codigo=response.status_code,
+        )
+        metricas.observar('asistencia_request_segundos', duracion, vista=vista)
+        metricas.observar('asistencia_consultas_por_request', ejecucion.consultas, vista=vista)
+        metricas.volcar()
+        return response
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.11 on 2026-10-19 12:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asistencia', '0003_initial_empleados'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CierreMes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.PositiveSmallIntegerField()),
+                ('mes', models.PositiveSmallIntegerField()),
+                ('cerrado_en', models.DateTimeField(auto_now_add=True)),
+                ('snapshot', models.BinaryField()),
+                ('cerrado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cierres_mes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Cierre de Mes',
+                'verbose_name_plural': 'Cierres de Mes',
+                'ordering': ['-anio', '-mes'],
+                'unique_together': {('anio', 'mes')},
+            },
+        ),
+    ]
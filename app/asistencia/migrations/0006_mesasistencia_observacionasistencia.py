@@ -0,0 +1,85 @@
+# Generated by Django 5.2.11 on 2026-10-19 13:26
+
+import calendar
+import struct
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def cargar_meses(apps, schema_editor):
+    """
+    Construye las filas mensuales a partir de los registros existentes, mes
+    a mes: en memoria queda solo el mes en curso.
+    """
+    RegistroAsistencia = apps.get_model('asistencia', 'RegistroAsistencia')
+    MesAsistencia = apps.get_model('asistencia', 'MesAsistencia')
+    ObservacionAsistencia = apps.get_model('asistencia', 'ObservacionAsistencia')
+    formato = struct.Struct('<31H')
+
+    rango = RegistroAsistencia.objects.aggregate(desde=models.Min('fecha'), hasta=models.Max('fecha'))
+    if rango['desde'] is None:
+        return
+    inicio = rango['desde'].replace(day=1)
+    while inicio <= rango['hasta']:
+        fin = inicio.replace(day=calendar.monthrange(inicio.year, inicio.month)[1])
+        meses = {}
+        observaciones = []
+        for emp_id, fecha, estado_id, texto in RegistroAsistencia.objects.filter(
+            fecha__gte=inicio, fecha__lte=fin,
+        ).order_by().values_list(
+            'empleado_id', 'fecha', 'estado_id', 'observaciones',
+        ).iterator(chunk_size=10000):
+            meses.setdefault(emp_id, [0] * 31)[fecha.day - 1] = estado_id
+            if texto:
+                observaciones.append(ObservacionAsistencia(empleado_id=emp_id, fecha=fecha, texto=texto))
+        MesAsistencia.objects.bulk_create(
+            [
+                MesAsistencia(empleado_id=emp_id, inicio=inicio, estados=formato.pack(*estados))
+                for emp_id, estados in meses.items()
+            ],
+            batch_size=500,
+        )
+        ObservacionAsistencia.objects.bulk_create(observaciones, batch_size=500)
+        inicio = fin + timedelta(days=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asistencia', '0005_loteguardado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MesAsistencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('inicio', models.DateField()),
+                ('estados', models.BinaryField(max_length=62)),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meses_asistencia', to='asistencia.empleado')),
+            ],
+            options={
+                'verbose_name': 'Mes de Asistencia',
+                'verbose_name_plural': 'Meses de Asistencia',
+                'indexes': [models.Index(fields=['inicio'], name='asistencia__inicio_53bedf_idx')],
+                'unique_together': {('empleado', 'inicio')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ObservacionAsistencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('texto', models.CharField(max_length=255)),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='observaciones_asistencia', to='asistencia.empleado')),
+            ],
+            options={
+                'verbose_name': 'Observación de Asistencia',
+                'verbose_name_plural': 'Observaciones de Asistencia',
+                'unique_together': {('empleado', 'fecha')},
+            },
+        ),
+        migrations.RunPython(cargar_meses, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.11 on 2026-10-19 13:42
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asistencia', '0006_mesasistencia_observacionasistencia'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CambioAsistencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('origen', models.CharField(choices=[('grilla', 'Grilla'), ('relleno', 'Relleno masivo'), ('admin', 'Administración')], max_length=10)),
+                ('registrado_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cambios_asistencia', to='asistencia.empleado')),
+                ('estado_anterior', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='asistencia.estadoasistencia')),
+                ('estado_nuevo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='asistencia.estadoasistencia')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cambios_asistencia', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Cambio de Asistencia',
+                'verbose_name_plural': 'Cambios de Asistencia',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['empleado', 'fecha'], name='asistencia__emplead_c49835_idx'), models.Index(fields=['fecha'], name='asistencia__fecha_3e2ddc_idx')],
+            },
+        ),
+    ]
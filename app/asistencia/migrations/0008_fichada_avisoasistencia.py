@@ -0,0 +1,51 @@
+# Generated by Django 5.2.11 on 2026-10-19 13:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asistencia', '0007_cambioasistencia'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cambioasistencia',
+            name='origen',
+            field=models.CharField(choices=[('grilla', 'Grilla'), ('relleno', 'Relleno masivo'), ('admin', 'Administración'), ('reloj', 'Reloj de fichadas')], max_length=10),
+        ),
+        migrations.CreateModel(
+            name='AvisoAsistencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('motivo', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='avisos', to='asistencia.empleado')),
+            ],
+            options={
+                'verbose_name': 'Aviso de Asistencia',
+                'verbose_name_plural': 'Avisos de Asistencia',
+                'unique_together': {('empleado', 'fecha')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Fichada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('momento', models.DateTimeField()),
+                ('tipo', models.CharField(choices=[('E', 'Entrada'), ('S', 'Salida')], max_length=1)),
+                ('dispositivo', models.CharField(blank=True, max_length=50)),
+                ('recibida_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fichadas', to='asistencia.empleado')),
+            ],
+            options={
+                'verbose_name': 'Fichada',
+                'verbose_name_plural': 'Fichadas',
+                'unique_together': {('empleado', 'momento', 'tipo')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-19 13:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asistencia', '0008_fichada_avisoasistencia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registroasistencia',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
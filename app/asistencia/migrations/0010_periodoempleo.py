@@ -0,0 +1,58 @@
+# Generated by Django 5.2.11 on 2026-10-19 13:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max, Min
+
+
+def cargar_periodos(apps, schema_editor):
+    """
+    Un período por empleado: desde el alta (o el primer registro, si es
+    anterior) y, para los inactivos, hasta el último registro (o el día en
+    que se desactivaron, si no tienen registros).
+    """
+    Empleado = apps.get_model('asistencia', 'Empleado')
+    PeriodoEmpleo = apps.get_model('asistencia', 'PeriodoEmpleo')
+    RegistroAsistencia = apps.get_model('asistencia', 'RegistroAsistencia')
+
+    extremos = {
+        fila['empleado_id']: (fila['primera'], fila['ultima'])
+        for fila in RegistroAsistencia.objects.order_by().values('empleado_id').annotate(
+            primera=Min('fecha'), ultima=Max('fecha'),
+        )
+    }
+    periodos = []
+    for emp in Empleado.objects.all():
+        primera, ultima = extremos.get(emp.id, (None, None))
+        desde = min(emp.fecha_alta, primera) if primera else emp.fecha_alta
+        hasta = None
+        if not emp.activo:
+            hasta = max(ultima or emp.updated_at.date(), desde)
+        periodos.append(PeriodoEmpleo(empleado_id=emp.id, desde=desde, hasta=hasta))
+    PeriodoEmpleo.objects.bulk_create(periodos, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asistencia', '0009_registroasistencia_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodoEmpleo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('desde', models.DateField()),
+                ('hasta', models.DateField(blank=True, null=True)),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='periodos', to='asistencia.empleado')),
+            ],
+            options={
+                'verbose_name': 'Período de Empleo',
+                'verbose_name_plural': 'Períodos de Empleo',
+                'ordering': ['empleado', 'desde'],
+                'indexes': [models.Index(fields=['desde', 'hasta'], name='asistencia__desde_c544d9_idx')],
+            },
+        ),
+        migrations.RunPython(cargar_periodos, migrations.RunPython.noop),
+    ]
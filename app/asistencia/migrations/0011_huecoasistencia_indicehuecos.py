@@ -0,0 +1,40 @@
+# Generated by Django 5.2.11 on 2026-10-19 14:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asistencia', '0010_periodoempleo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceHuecos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hasta', models.DateField(blank=True, null=True)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Índice de Huecos',
+                'verbose_name_plural': 'Índice de Huecos',
+            },
+        ),
+        migrations.CreateModel(
+            name='HuecoAsistencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='huecos', to='asistencia.empleado')),
+            ],
+            options={
+                'verbose_name': 'Hueco de Asistencia',
+                'verbose_name_plural': 'Huecos de Asistencia',
+                'indexes': [models.Index(fields=['fecha', 'empleado'], name='asistencia__fecha_d43115_idx')],
+                'unique_together': {('empleado', 'fecha')},
+            },
+        ),
+    ]
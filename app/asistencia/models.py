@@ -1,4 +1,10 @@
+import json
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 
 
 class EstadoAsistencia(models.Model):
@@ -38,6 +44,34 @@ class Empleado(models.Model):
         return f"{self.apellido}, {self.nombre}"
 
 
+class PeriodoEmpleo(models.Model):
+    """
+    Tramo en el que un empleado forma parte de la plantilla; `hasta` vacío
+    si sigue vigente. Grillas y estadísticas de un período toman a los
+    empleados con algún tramo superpuesto (ver servicios.plantilla).
+    `Empleado.activo` indica si el último tramo sigue abierto.
+    """
+    empleado = models.ForeignKey(
+        Empleado, on_delete=models.CASCADE, related_name='periodos'
+    )
+    desde = models.DateField()
+    hasta = models.DateField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['empleado', 'desde']
+        indexes = [models.Index(fields=['desde', 'hasta'])]
+        verbose_name = "Período de Empleo"
+        verbose_name_plural = "Períodos de Empleo"
+
+    def __str__(self):
+        hasta = self.hasta.strftime('%d/%m/%Y') if self.hasta else 'vigente'
+        return f"{self.empleado}: {self.desde:%d/%m/%Y} – {hasta}"
+
+    def clean(self):
+        if self.hasta and self.desde and self.hasta < self.desde:
+            raise ValidationError({'hasta': 'El fin del período es anterior a su inicio.'})
+
+
 class RegistroAsistencia(models.Model):
     empleado = models.ForeignKey(
         Empleado, on_delete=models.CASCADE, related_name='asistencias'
@@ -47,6 +81,8 @@ class RegistroAsistencia(models.Model):
         EstadoAsistencia, on_delete=models.PROTECT, related_name='registros'
     )
     observaciones = models.CharField(max_length=255, blank=True)
+    # Crece en cada escritura; la grilla la envía para detectar ediciones concurrentes
+    version = models.PositiveIntegerField(default=1, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -60,3 +96,225 @@ class RegistroAsistencia(models.Model):
             f"{self.empleado.apellido}, {self.empleado.nombre} - "
             f"{self.fecha} - {self.estado.codigo}"
         )
+
+
+class CierreMes(models.Model):
+    """
+    Mes cerrado por liquidación. Guarda una foto inmutable de la grilla y de
+    los totales del período (JSON comprimido con zlib) para servirla sin
+    recalcular y bloquea la edición de los registros de ese mes.
+    """
+    anio = models.PositiveSmallIntegerField()
+    mes = models.PositiveSmallIntegerField()
+    cerrado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='cierres_mes',
+    )
+    cerrado_en = models.DateTimeField(auto_now_add=True)
+    snapshot = models.BinaryField()
+
+    class Meta:
+        unique_together = ('anio', 'mes')
+        ordering = ['-anio', '-mes']
+        verbose_name = "Cierre de Mes"
+        verbose_name_plural = "Cierres de Mes"
+
+    def __str__(self):
+        return f"{self.mes:02d}/{self.anio}"
+
+    @property
+    def datos(self):
+        return json.loads(zlib.decompress(bytes(self.snapshot)))
+
+    @staticmethod
+    def comprimir(datos):
+        return zlib.compress(json.dumps(datos, separators=(',', ':')).encode(), 9)
+
+
+class LoteGuardado(models.Model):
+    """
+    Clave de idempotencia de un lote de celdas ya aplicado desde la grilla.
+    Un reintento con la misma clave se descarta sin volver a escribir.
+    """
+    clave = models.CharField(max_length=64, unique=True)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='lotes_guardado',
+    )
+    celdas = models.PositiveIntegerField(default=0)
+    procesado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Lote Guardado"
+        verbose_name_plural = "Lotes Guardados"
+
+    def __str__(self):
+        return self.clave
+
+
+class MesAsistencia(models.Model):
+    """
+    Representación compacta de la asistencia: una fila por empleado y mes
+    con el estado_id de cada día (0 = sin registro) como 31 enteros uint16
+    little-endian. Se deriva de RegistroAsistencia; ver repositorio.py.
+    """
+    empleado = models.ForeignKey(
+        Empleado, on_delete=models.CASCADE, related_name='meses_asistencia'
+    )
+    # Primer día del mes
+    inicio = models.DateField()
+    estados = models.BinaryField(max_length=62)
+
+    class Meta:
+        unique_together = ('empleado', 'inicio')
+        indexes = [models.Index(fields=['inicio'])]
+        verbose_name = "Mes de Asistencia"
+        verbose_name_plural = "Meses de Asistencia"
+
+    def __str__(self):
+        return f"{self.empleado_id} - {self.inicio:%m/%Y}"
+
+
+class ObservacionAsistencia(models.Model):
+    """Observaciones no vacías de los registros, como tabla dispersa."""
+    empleado = models.ForeignKey(
+        Empleado, on_delete=models.CASCADE, related_name='observaciones_asistencia'
+    )
+    fecha = models.DateField()
+    texto = models.CharField(max_length=255)
+
+    class Meta:
+        unique_together = ('empleado', 'fecha')
+        verbose_name = "Observación de Asistencia"
+        verbose_name_plural = "Observaciones de Asistencia"
+
+    def __str__(self):
+        return f"{self.empleado_id} - {self.fecha}: {self.texto}"
+
+
+class CambioAsistencia(models.Model):
+    """
+    Auditoría de la asistencia: una fila por celda modificada, con el estado
+    anterior y el nuevo (vacío = sin registro). Solo se agregan filas; se
+    escriben en bloque después del commit (ver auditoria.py).
+    """
+    ORIGEN_GRILLA = 'grilla'
+    ORIGEN_RELLENO = 'relleno'
+    ORIGEN_ADMIN = 'admin'
+    ORIGEN_RELOJ = 'reloj'
+    ORIGENES = [
+        (ORIGEN_GRILLA, 'Grilla'),
+        (ORIGEN_RELLENO, 'Relleno masivo'),
+        (ORIGEN_ADMIN, 'Administración'),
+        (ORIGEN_RELOJ, 'Reloj de fichadas'),
+    ]
+
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='cambios_asistencia',
+    )
+    empleado = models.ForeignKey(
+        Empleado, on_delete=models.CASCADE, related_name='cambios_asistencia'
+    )
+    fecha = models.DateField()
+    estado_anterior = models.ForeignKey(
+        EstadoAsistencia, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    estado_nuevo = models.ForeignKey(
+        EstadoAsistencia, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    origen = models.CharField(max_length=10, choices=ORIGENES)
+    registrado_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['empleado', 'fecha']),
+            models.Index(fields=['fecha']),
+        ]
+        verbose_name = "Cambio de Asistencia"
+        verbose_name_plural = "Cambios de Asistencia"
+
+    def __str__(self):
+        return f"{self.empleado_id} - {self.fecha}: {self.estado_anterior_id} → {self.estado_nuevo_id}"
+
+
+class Fichada(models.Model):
+    """
+    Evento crudo del reloj de fichadas (molinete). Solo se agregan filas; la
+    misma fichada recibida dos veces se descarta por la restricción única.
+    El estado del día se deriva en fichadas.py.
+    """
+    ENTRADA = 'E'
+    SALIDA = 'S'
+    TIPOS = [(ENTRADA, 'Entrada'), (SALIDA, 'Salida')]
+
+    empleado = models.ForeignKey(
+        Empleado, on_delete=models.CASCADE, related_name='fichadas'
+    )
+    momento = models.DateTimeField()
+    tipo = models.CharField(max_length=1, choices=TIPOS)
+    dispositivo = models.CharField(max_length=50, blank=True)
+    recibida_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('empleado', 'momento', 'tipo')
+        verbose_name = "Fichada"
+        verbose_name_plural = "Fichadas"
+
+    def __str__(self):
+        return f"{self.empleado_id} - {self.momento:%d/%m/%Y %H:%M} {self.tipo}"
+
+
+class AvisoAsistencia(models.Model):
+    """Aviso previo de un empleado (llegará tarde o faltará) para un día."""
+    empleado = models.ForeignKey(
+        Empleado, on_delete=models.CASCADE, related_name='avisos'
+    )
+    fecha = models.DateField()
+    motivo = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('empleado', 'fecha')
+        verbose_name = "Aviso de Asistencia"
+        verbose_name_plural = "Avisos de Asistencia"
+
+    def __str__(self):
+        return f"{self.empleado} - {self.fecha}"
+
+
+class HuecoAsistencia(models.Model):
+    """
+    Celda sin registro: día hábil dentro de un período de empleo, hasta
+    IndiceHuecos.hasta, en el que el empleado no tiene estado cargado. Se
+    mantiene al escribir (ver servicios.registrar_cambios) para que las
+    consultas de faltantes no tengan que cruzar plantilla, calendario y
+    registros.
+    """
+    empleado = models.ForeignKey(
+        Empleado, on_delete=models.CASCADE, related_name='huecos'
+    )
+    fecha = models.DateField()
+
+    class Meta:
+        unique_together = ('empleado', 'fecha')
+        indexes = [models.Index(fields=['fecha', 'empleado'])]
+        verbose_name = "Hueco de Asistencia"
+        verbose_name_plural = "Huecos de Asistencia"
+
+    def __str__(self):
+        return f"{self.empleado} - {self.fecha}"
+
+
+class IndiceHuecos(models.Model):
+    """Fila única: último día calculado en HuecoAsistencia (vacío = sin calcular)."""
+    hasta = models.DateField(null=True, blank=True)
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Índice de Huecos"
+        verbose_name_plural = "Índice de Huecos"
+
+    def __str__(self):
+        return f"Huecos hasta {self.hasta:%d/%m/%Y}" if self.hasta else "Huecos sin calcular"
@@ -0,0 +1,84 @@
+"""
+Reportes imprimibles de asistencia por empleado.
+
+Las funciones de este módulo no consultan la base de datos: reciben los
+datos ya agrupados para poder ejecutarse en procesos separados.
+"""
+import os
+from datetime import date
+
+from django.template.loader import render_to_string
+
+from .servicios import dias_habiles, en_periodo
+
+
+def nombre_archivo(empleado):
+    return f"empleado_{empleado['id']:05d}.html"
+
+
+def cobertura(dias, periodos, registros):
+    """
+    (días posibles, días marcados) de un empleado: los días hábiles dentro
+    de sus períodos de empleo y, de esos, los que tienen registro. Las
+    marcas de fin de semana o fuera de período no suman.
+    """
+    posibles = [dia for dia in dias if en_periodo(periodos, dia)]
+    return posibles, sum(1 for dia in posibles if dia.isoformat() in registros)
+
+
+def porcentaje(marcados, posibles):
+    return round(marcados / posibles * 100, 1) if posibles else 0
+
+
+def inicializar_proceso():
+    """Inicializador de cada proceso del pool (necesario con 'spawn')."""
+    import django
+    django.setup()
+
+
+def generar_reporte_empleado(trabajo):
+    """
+    Renderiza y escribe el reporte de un empleado. `trabajo` es un dict con
+    `empleado`, `desde`, `hasta`, `periodos` ([(desde_iso, hasta_iso)], los
+    tramos de empleo recortados al rango), `estados`, `registros`
+    ({fecha_iso: estado_id}) y `salida`. Devuelve la ruta escrita.
+    """
+    empleado = trabajo['empleado']
+    estados = trabajo['estados']
+    registros = trabajo['registros']
+    estados_por_id = {e['id']: e for e in estados}
+    periodos = [(date.fromisoformat(d), date.fromisoformat(h)) for d, h in trabajo['periodos']]
+    dias = dias_habiles(date.fromisoformat(trabajo['desde']), date.fromisoformat(trabajo['hasta']))
+    posibles, total_marcados = cobertura(dias, periodos, registros)
+
+    filas = []
+    conteo = {e['id']: 0 for e in estados}
+    for dia in dias:
+        if not en_periodo(periodos, dia):
+            filas.append({'fecha': dia, 'estado': None, 'fuera_de_periodo': True})
+            continue
+        estado_id = registros.get(dia.isoformat())
+        if estado_id in conteo:
+            conteo[estado_id] += 1
+        filas.append({'fecha': dia, 'estado': estados_por_id.get(estado_id)})
+
+    html = render_to_string('asistencia/reportes/empleado.html', {
+        'empleado': empleado,
+        'desde': date.fromisoformat(trabajo['desde']),
+        'hasta': date.fromisoformat(trabajo['hasta']),
+        'filas': filas,
+        'totales': [{'estado': e, 'cantidad': conteo[e['id']]} for e in estados],
+        'total_dias_habiles': len(dias),
+        'dias_posibles': len(posibles),
+        'total_marcados': total_marcados,
+        'sin_registro': len(posibles) - total_marcados,
+        'cobertura': porcentaje(total_marcados, len(posibles)),
+    })
+
+    # Escritura atómica: un archivo existente siempre es un reporte completo
+    ruta = os.path.join(trabajo['salida'], nombre_archivo(empleado))
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        f.write(html)
+    os.replace(temporal, ruta)
+    return ruta
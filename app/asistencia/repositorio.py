@@ -0,0 +1,262 @@
+"""
+Acceso a la asistencia en formato compacto.
+
+RegistroAsistencia (una fila por empleado y día) sigue siendo la tabla en
+la que se escribe. MesAsistencia guarda la misma información como una fila
+por empleado y mes con 31 estados de ancho fijo, y ObservacionAsistencia
+las observaciones no vacías. `sincronizar` las mantiene al día y se invoca
+desde `servicios.registrar_cambios`, dentro de la misma transacción.
+
+Las lecturas de grilla, estadísticas e historial pasan por este módulo.
+"""
+import calendar
+import struct
+from datetime import date, timedelta
+
+import numpy as np
+from django.db.models import CharField
+from django.db.models.functions import Cast, Substr
+
+from .models import MesAsistencia, ObservacionAsistencia, RegistroAsistencia
+
+DIAS_POR_FILA = 31
+_FORMATO = struct.Struct(f'<{DIAS_POR_FILA}H')
+
+# Empleados por consulta al sincronizar
+_LOTE_EMPLEADOS = 500
+
+
+def codificar(estados):
+    """31 estado_id (0 = sin registro) → bytes."""
+    return _FORMATO.pack(*estados)
+
+
+def decodificar(datos):
+    """bytes → tupla de 31 estado_id."""
+    return _FORMATO.unpack(bytes(datos))
+
+
+def meses_entre(desde, hasta):
+    """Primer día de cada mes que se superpone con [desde, hasta]."""
+    meses = []
+    mes = desde.replace(day=1)
+    while mes <= hasta:
+        meses.append(mes)
+        mes = (mes + timedelta(days=DIAS_POR_FILA + 1)).replace(day=1)
+    return meses
+
+
+def _filas(desde, hasta, empleado_ids=None):
+    filas = MesAsistencia.objects.filter(inicio__gte=desde.replace(day=1), inicio__lte=hasta)
+    if empleado_ids is not None:
+        filas = filas.filter(empleado_id__in=empleado_ids)
+    return filas.order_by().values_list('empleado_id', 'inicio', 'estados')
+
+
+# ─────────────────────────────────────────
+# Lecturas
+# ─────────────────────────────────────────
+
+def leer_estados(desde, hasta, empleado_ids=None):
+    """{(empleado_id, fecha): estado_id} de las celdas cargadas del rango."""
+    if empleado_ids is None:
+        lotes = [None]
+    else:
+        # Listas largas de ids se parten para no exceder el límite de parámetros
+        empleado_ids = list(empleado_ids)
+        lotes = [
+            empleado_ids[i:i + _LOTE_EMPLEADOS]
+            for i in range(0, len(empleado_ids), _LOTE_EMPLEADOS)
+        ]
+    celdas = {}
+    for lote in lotes:
+        for emp_id, inicio, datos in _filas(desde, hasta, lote):
+            for i, estado_id in enumerate(decodificar(datos)):
+                if estado_id:
+                    fecha = inicio + timedelta(days=i)
+                    if desde <= fecha <= hasta:
+                        celdas[(emp_id, fecha)] = estado_id
+    return celdas
+
+
+def leer_versiones(desde, hasta, empleado_ids):
+    """
+    {(empleado_id, fecha): version} de las celdas cargadas del rango. Sale de
+    RegistroAsistencia: la grilla editable la necesita para guardar.
+    """
+    empleado_ids = list(empleado_ids)
+    versiones = {}
+    for i in range(0, len(empleado_ids), _LOTE_EMPLEADOS):
+        versiones.update(
+            ((emp_id, fecha), version)
+            for emp_id, fecha, version in RegistroAsistencia.objects.filter(
+                empleado_id__in=empleado_ids[i:i + _LOTE_EMPLEADOS],
+                fecha__gte=desde,
+                fecha__lte=hasta,
+            ).values_list('empleado_id', 'fecha', 'version')
+        )
+    return versiones
+
+
+def leer_observaciones(desde, hasta, empleado_ids=None):
+    """{(empleado_id, fecha): texto} de las celdas con observación."""
+    obs = ObservacionAsistencia.objects.filter(fecha__gte=desde, fecha__lte=hasta)
+    if empleado_ids is not None:
+        obs = obs.filter(empleado_id__in=empleado_ids)
+    return {(e, f): t for e, f, t in obs.values_list('empleado_id', 'fecha', 'texto')}
+
+
+def matriz_calendario(desde, hasta, empleado_ids=None):
+    """
+    Devuelve (empleado_ids, dias, matriz): una matriz uint16 de empleados ×
+    días corridos del rango con el estado_id de cada celda (0 = vacía).
+    Solo incluye empleados con al menos un mes cargado en el rango y, con
+    `empleado_ids` (lista o subconsulta, p. ej. servicios.plantilla), solo
+    esos.
+    """
+    meses = meses_entre(desde, hasta)
+    datos = list(_filas(desde, hasta, empleado_ids))
+    empleado_ids = sorted({emp_id for emp_id, _, _ in datos})
+    fila_de = {emp_id: i for i, emp_id in enumerate(empleado_ids)}
+    mes_de = {mes: j for j, mes in enumerate(meses)}
+
+    cubo = np.zeros((len(empleado_ids), len(meses), DIAS_POR_FILA), dtype=np.uint16)
+    if datos:
+        filas = np.fromiter((fila_de[e] for e, _, _ in datos), dtype=np.int64, count=len(datos))
+        columnas = np.fromiter((mes_de[m] for _, m, _ in datos), dtype=np.int64, count=len(datos))
+        cubo[filas, columnas] = np.frombuffer(
+            b''.join(bytes(b) for _, _, b in datos), dtype='<u2',
+        ).reshape(-1, DIAS_POR_FILA)
+
+    # Posiciones del cubo aplanado que caen dentro del rango
+    dias, posiciones = [], []
+    for j, mes in enumerate(meses):
+        for i in range(calendar.monthrange(mes.year, mes.month)[1]):
+            fecha = mes + timedelta(days=i)
+            if desde <= fecha <= hasta:
+                dias.append(fecha)
+                posiciones.append(j * DIAS_POR_FILA + i)
+    matriz = cubo.reshape(len(empleado_ids), len(meses) * DIAS_POR_FILA)[:, posiciones]
+    return empleado_ids, dias, matriz
+
+
+def _contar(desde, hasta, empleado_ids=None):
+    empleado_ids, _, matriz = matriz_calendario(desde, hasta, empleado_ids)
+    if not matriz.size:
+        return {}
+    ancho = int(matriz.max()) + 1
+    totales = np.bincount(
+        (np.arange(len(empleado_ids))[:, None] * ancho + matriz).ravel(),
+        minlength=len(empleado_ids) * ancho,
+    ).reshape(len(empleado_ids), ancho)
+    filas, estados = np.nonzero(totales[:, 1:])
+    return {
+        (empleado_ids[i], int(k) + 1): int(totales[i, k + 1])
+        for i, k in zip(filas, estados)
+    }
+
+
+def conteos_mensuales(desde, hasta, empleado_ids=None):
+    """
+    Genera (mes, {(empleado_id, estado_id): cantidad}) mes a mes. Cada paso
+    lee solo las filas de ese mes, así la memoria no crece con el rango.
+    """
+    for mes in meses_entre(desde, hasta):
+        fin_mes = mes.replace(day=calendar.monthrange(mes.year, mes.month)[1])
+        yield mes, _contar(max(desde, mes), min(hasta, fin_mes), empleado_ids)
+
+
+def conteos(desde, hasta, empleado_ids=None):
+    """{(empleado_id, estado_id): cantidad} en el rango (ver matriz_calendario)."""
+    totales = {}
+    for _, del_mes in conteos_mensuales(desde, hasta, empleado_ids):
+        for clave, cantidad in del_mes.items():
+            totales[clave] = totales.get(clave, 0) + cantidad
+    return totales
+
+
+# ─────────────────────────────────────────
+# Mantenimiento
+# ─────────────────────────────────────────
+
+def sincronizar(celdas):
+    """
+    Recalcula las filas mensuales y las observaciones de los meses tocados
+    por `celdas` (pares (empleado_id, fecha)) a partir de RegistroAsistencia.
+    Debe invocarse después de escribir, dentro de la misma transacción.
+    """
+    meses_por_empleado = {}
+    for emp_id, fecha in celdas:
+        meses_por_empleado.setdefault(emp_id, set()).add(fecha.replace(day=1))
+    empleado_ids = sorted(meses_por_empleado)
+    for i in range(0, len(empleado_ids), _LOTE_EMPLEADOS):
+        lote = {e: meses_por_empleado[e] for e in empleado_ids[i:i + _LOTE_EMPLEADOS]}
+        _reconstruir_lote(lote)
+
+
+def _reconstruir_lote(meses_por_empleado):
+    # Una consulta por mes, con solo los empleados tocados en ese mes: una
+    # edición vieja junto a una actual no arrastra los meses intermedios
+    por_mes = {}
+    for emp_id, meses in meses_por_empleado.items():
+        for mes in meses:
+            por_mes.setdefault(mes, []).append(emp_id)
+
+    nuevas, observaciones = [], []
+    for mes, ids in sorted(por_mes.items()):
+        fin = mes.replace(day=calendar.monthrange(mes.year, mes.month)[1])
+        estados = {emp_id: [0] * DIAS_POR_FILA for emp_id in ids}
+        # La fecha se lee como texto ISO: evita construir un objeto date por fila
+        for emp_id, dia, estado_id, texto in RegistroAsistencia.objects.filter(
+            empleado_id__in=ids, fecha__gte=mes, fecha__lte=fin,
+        ).order_by().annotate(
+            dia=Cast('fecha', output_field=CharField()),
+        ).values_list('empleado_id', 'dia', 'estado_id', 'observaciones').iterator(chunk_size=10000):
+            estados[emp_id][int(dia[8:10]) - 1] = estado_id
+            if texto:
+                observaciones.append(ObservacionAsistencia(
+                    empleado_id=emp_id, fecha=date.fromisoformat(dia), texto=texto,
+                ))
+
+        # Filas vacías se eliminan: la tabla guarda solo meses con datos
+        MesAsistencia.objects.filter(inicio=mes, empleado_id__in=ids).delete()
+        ObservacionAsistencia.objects.filter(
+            empleado_id__in=ids, fecha__gte=mes, fecha__lte=fin,
+        ).delete()
+        nuevas.extend(
+            MesAsistencia(empleado_id=emp_id, inicio=mes, estados=codificar(fila))
+            for emp_id, fila in estados.items()
+            if any(fila)
+        )
+    MesAsistencia.objects.bulk_create(nuevas, batch_size=500)
+    ObservacionAsistencia.objects.bulk_create(observaciones, batch_size=500)
+
+
+def reconstruir(desde=None, hasta=None):
+    """
+    Regenera la representación compacta completa (o la de un rango de
+    fechas) desde RegistroAsistencia. Devuelve la cantidad de meses recalculados.
+    """
+    registros = RegistroAsistencia.objects.all()
+    if desde:
+        registros = registros.filter(fecha__gte=desde.replace(day=1))
+    if hasta:
+        registros = registros.filter(
+            fecha__lte=hasta.replace(day=calendar.monthrange(hasta.year, hasta.month)[1]),
+        )
+    pares = set(
+        (emp_id, date.fromisoformat(mes + '-01'))
+        for emp_id, mes in registros.order_by()
+        .annotate(mes=Substr(Cast('fecha', output_field=CharField()), 1, 7))
+        .values_list('empleado_id', 'mes')
+        .distinct()
+    )
+    meses = MesAsistencia.objects.all()
+    if desde:
+        meses = meses.filter(inicio__gte=desde.replace(day=1))
+    if hasta:
+        meses = meses.filter(inicio__lte=hasta)
+    # Meses que ya no tienen registros también se recalculan (y se borran)
+    pares.update(meses.values_list('empleado_id', 'inicio'))
+    sincronizar(pares)
+    return len(pares)
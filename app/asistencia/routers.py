@@ -0,0 +1,87 @@
+"""
+Ruteo de lecturas de reportes hacia la réplica de solo lectura.
+
+La réplica (alias `reportes`) es una copia del archivo SQLite principal
+refrescada con `manage.py actualizar_replica`. Las vistas decoradas con
+`lectura_replica` leen de ella siempre que su antigüedad no supere el
+presupuesto configurado en `settings.REPLICA_ANTIGUEDAD_MAXIMA`; si la
+réplica no existe o está vieja, leen de la base principal.
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+ALIAS_REPLICA = 'reportes'
+REPLICA_ANTIGUEDAD_POR_DEFECTO = 5 * 60
+
+# Antigüedad máxima (segundos) aceptada por la operación en curso
+_antiguedad_maxima = ContextVar('asistencia_antiguedad_maxima', default=None)
+
+
+def antiguedad_replica():
+    """Segundos desde la última actualización de la réplica, o None si no hay."""
+    if ALIAS_REPLICA not in settings.DATABASES:
+        return None
+    try:
+        return time.time() - os.path.getmtime(connections[ALIAS_REPLICA].settings_dict['NAME'])
+    except (OSError, TypeError):
+        return None
+
+
+def presupuesto(nombre):
+    return settings.REPLICA_ANTIGUEDAD_MAXIMA.get(nombre, REPLICA_ANTIGUEDAD_POR_DEFECTO)
+
+
+@contextmanager
+def usando_replica(antiguedad_maxima):
+    token = _antiguedad_maxima.set(antiguedad_maxima)
+    try:
+        yield
+    finally:
+        _antiguedad_maxima.reset(token)
+
+
+def en_principal():
+    """
+    Lee de la base principal aunque la vista use la réplica. Lo que se
+    guarda en la caché compartida tiene que salir de acá: registrar_cambios
+    borra la clave al guardar y, si la réplica atrasada la volviera a
+    llenar, el dato viejo duraría todo el TTL.
+    """
+    return usando_replica(None)
+
+
+def lectura_replica(view):
+    """Las lecturas de la vista van a la réplica si está dentro del presupuesto."""
+    @wraps(view)
+    def envoltura(request, *args, **kwargs):
+        with usando_replica(presupuesto(view.__name__)):
+            return view(request, *args, **kwargs)
+    return envoltura
+
+
+class ReportesRouter:
+    def db_for_read(self, model, **hints):
+        maxima = _antiguedad_maxima.get()
+        if maxima is None:
+            return None
+        antiguedad = antiguedad_replica()
+        if antiguedad is not None and antiguedad <= maxima:
+            return ALIAS_REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ambas bases tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica es una copia del archivo principal, ya migrado
+        return db != ALIAS_REPLICA
@@ -0,0 +1,880 @@
+import bisect
+import calendar
+import re
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, Exists, F, Max, Min, OuterRef, Q
+from django.utils import timezone
+
+from . import auditoria, repositorio
+from .models import (
+    CambioAsistencia,
+    CierreMes,
+    Empleado,
+    EstadoAsistencia,
+    HuecoAsistencia,
+    IndiceHuecos,
+    PeriodoEmpleo,
+    RegistroAsistencia,
+)
+from .routers import en_principal
+
+# Tope de días por operación masiva (un año calendario)
+MAX_DIAS_RELLENO = 366
+
+# Códigos de estado con significado propio (ver migración 0002)
+CODIGO_PRESENTE = 'P'
+CODIGOS_AUSENCIA = ('A', 'AA', 'AS')
+CODIGOS_TARDANZA = ('TA', 'TS')
+
+# Historial por empleado y año: se invalida al guardar
+HISTORIAL_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Panel del día en el dashboard: se invalida al guardar
+PANEL_HOY_CACHE_TIMEOUT = 60 * 5
+PANEL_HOY_VENTANA_DIAS = 20
+
+# Celdas por transacción al guardar desde la grilla: cada transacción
+# retiene el bloqueo de escritura de SQLite solo mientras aplica su tramo
+CELDAS_POR_TRANSACCION = 50
+
+# Resumen anual para estadísticas: se invalida al guardar; los cambios de
+# empleados o de estados se ven al vencer
+RESUMEN_ANUAL_CACHE_TIMEOUT = 60 * 60
+
+# Hoja de estilos por estado: la clave incluye la versión, no hace falta invalidar
+ESTILOS_ESTADOS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Pares (empleado, fecha) por DELETE al borrar huecos
+_LOTE_HUECOS = 200
+
+# Los colores se guardan como texto libre; solo se emiten los hexadecimales
+_COLOR_CSS = re.compile(r'^#[0-9a-fA-F]{3,8}$')
+
+
+class MesCerradoError(Exception):
+    """Se intentó modificar registros de un mes ya cerrado."""
+
+
+def dias_habiles(desde, hasta):
+    """Días de lunes a viernes entre `desde` y `hasta`, ambos inclusive."""
+    dias = []
+    dia = desde
+    while dia <= hasta:
+        if dia.weekday() < 5:
+            dias.append(dia)
+        dia += timedelta(days=1)
+    return dias
+
+
+def rango_mes(anio, mes):
+    return date(anio, mes, 1), date(anio, mes, calendar.monthrange(anio, mes)[1])
+
+
+def rango_quincena(anio, mes, numero):
+    """Primera (días 1–15) o segunda (16 a fin de mes) quincena del mes."""
+    desde, hasta = rango_mes(anio, mes)
+    if numero == 1:
+        return desde, desde.replace(day=15)
+    if numero == 2:
+        return desde.replace(day=16), hasta
+    raise ValueError('La quincena debe ser 1 o 2.')
+
+
+def quincena_de(fecha):
+    """(anio, mes, numero) de la quincena que contiene `fecha`."""
+    return fecha.year, fecha.month, 1 if fecha.day <= 15 else 2
+
+
+def estado_a_dict(estado):
+    return {
+        'id': estado.id,
+        'codigo': estado.codigo,
+        'descripcion': estado.descripcion,
+        'color_fondo': estado.color_fondo,
+        'color_texto': estado.color_texto,
+    }
+
+
+def version_estados():
+    """Cambia al crear, editar o borrar un estado; versiona la hoja de estilos."""
+    datos = EstadoAsistencia.objects.aggregate(ultimo=Max('updated_at'), cantidad=Count('id'))
+    ultimo = datos['ultimo']
+    return f"{ultimo.strftime('%Y%m%d%H%M%S%f') if ultimo else 0}-{datos['cantidad']}"
+
+
+def hoja_estilos_estados(version):
+    """
+    Una clase `estado-<id>` por estado con sus colores, para que la grilla
+    pinte las celdas cambiando una clase en lugar de estilos en línea.
+    """
+    def generar():
+        reglas = []
+        for estado in EstadoAsistencia.objects.order_by('id'):
+            fondo = estado.color_fondo if _COLOR_CSS.match(estado.color_fondo) else '#FFFFFF'
+            texto = estado.color_texto if _COLOR_CSS.match(estado.color_texto) else '#000000'
+            reglas.append(
+                f'.estado-{estado.id},.estado-{estado.id} .asistencia-select'
+                f'{{background-color:{fondo};color:{texto}}}'
+            )
+        return '\n'.join(reglas) + '\n'
+
+    return cache.get_or_set(
+        f'asistencia:estados_css:{version}', generar, ESTILOS_ESTADOS_CACHE_TIMEOUT,
+    )
+
+
+# ─────────────────────────────────────────
+# Plantilla (períodos de empleo)
+# ─────────────────────────────────────────
+
+def _periodos_en(desde, hasta):
+    return PeriodoEmpleo.objects.filter(desde__lte=hasta).filter(
+        Q(hasta__isnull=True) | Q(hasta__gte=desde)
+    )
+
+
+def plantilla(desde, hasta):
+    """
+    Empleados con algún período de empleo superpuesto con [desde, hasta].
+    Una sola consulta por rango sobre el índice (desde, hasta); el
+    queryset sirve también como subconsulta de ids.
+    """
+    return Empleado.objects.filter(pk__in=_periodos_en(desde, hasta).values('empleado_id'))
+
+
+def periodos_empleo(desde, hasta, empleado_ids=None):
+    """{empleado_id: [(desde, hasta), ...]} de los tramos, recortados al rango."""
+    periodos = _periodos_en(desde, hasta)
+    if empleado_ids is not None:
+        periodos = periodos.filter(empleado_id__in=empleado_ids)
+    tramos = {}
+    for emp_id, inicio, fin in periodos.order_by('empleado_id', 'desde').values_list(
+        'empleado_id', 'desde', 'hasta',
+    ):
+        tramos.setdefault(emp_id, []).append((max(inicio, desde), min(fin or hasta, hasta)))
+    return tramos
+
+
+def en_periodo(tramos, dia):
+    return any(inicio <= dia <= fin for inicio, fin in tramos)
+
+
+def dias_en_periodo(dias, tramos):
+    """Cuántos de `dias` (ordenados) caen dentro de `tramos`."""
+    return sum(
+        bisect.bisect_right(dias, fin) - bisect.bisect_left(dias, inicio)
+        for inicio, fin in tramos
+    )
+
+
+def abrir_periodo(empleado, desde):
+    """Alta o reingreso. Si el último tramo terminó el día anterior o después, se reabre."""
+    ultimo = empleado.periodos.order_by('-desde').first()
+    if ultimo and (ultimo.hasta is None or ultimo.hasta >= desde - timedelta(days=1)):
+        ultimo.hasta = None
+        ultimo.save(update_fields=['hasta'])
+    else:
+        PeriodoEmpleo.objects.create(empleado=empleado, desde=desde)
+    Empleado.objects.filter(pk=empleado.pk).update(activo=True)
+    empleado.activo = True
+    reconstruir_huecos([empleado.pk], desde)
+
+
+def cerrar_periodo(empleado, hasta):
+    """Baja: el tramo abierto termina en `hasta` (inclusive)."""
+    abierto = empleado.periodos.filter(hasta__isnull=True).order_by('-desde').first()
+    if abierto:
+        abierto.hasta = max(hasta, abierto.desde)
+        abierto.save(update_fields=['hasta'])
+        reconstruir_huecos([empleado.pk], abierto.hasta + timedelta(days=1))
+    Empleado.objects.filter(pk=empleado.pk).update(activo=False)
+    empleado.activo = False
+
+
+def sincronizar_activo(empleado):
+    """Recalcula `activo` y los huecos después de editar los tramos a mano (admin)."""
+    empleado.activo = empleado.periodos.filter(hasta__isnull=True).exists()
+    Empleado.objects.filter(pk=empleado.pk).update(activo=empleado.activo)
+    reconstruir_huecos([empleado.pk])
+
+
+# ─────────────────────────────────────────
+# Cierre de mes
+# ─────────────────────────────────────────
+
+def meses_cerrados(fechas):
+    """{(anio, mes)} de los meses cerrados entre los de `fechas`."""
+    meses = {(f.year, f.month) for f in fechas}
+    if not meses:
+        return set()
+    anios = {anio for anio, _ in meses}
+    return {
+        (anio, mes)
+        for anio, mes in CierreMes.objects.filter(anio__in=anios).values_list('anio', 'mes')
+        if (anio, mes) in meses
+    }
+
+
+def verificar_meses_abiertos(fechas):
+    """Lanza MesCerradoError si alguna de las fechas cae en un mes cerrado."""
+    cerrados = sorted(meses_cerrados(fechas))
+    if cerrados:
+        lista = ', '.join(f'{mes:02d}/{anio}' for anio, mes in cerrados)
+        raise MesCerradoError(f'No se pueden modificar meses cerrados: {lista}.')
+
+
+def cerrar_mes(anio, mes, usuario):
+    """
+    Congela la grilla y los totales del mes en un CierreMes. El cierre se
+    inserta antes de leer la foto y en la misma transacción: un cierre
+    simultáneo del mismo mes falla de entrada, y una edición no puede
+    confirmarse entre la foto y el cierre (las escrituras verifican el mes
+    dentro de su propia transacción).
+    """
+    desde, hasta = rango_mes(anio, mes)
+    dias = dias_habiles(desde, hasta)
+    with transaction.atomic():
+        cierre = CierreMes.objects.create(anio=anio, mes=mes, cerrado_por=usuario, snapshot=b'')
+        cierre.snapshot = CierreMes.comprimir({
+            'matriz': matriz_asistencia(plantilla(desde, hasta), dias),
+            'resumen': resumen_periodo(desde, hasta),
+        })
+        cierre.save(update_fields=['snapshot'])
+    return cierre
+
+
+# ─────────────────────────────────────────
+# Lecturas agregadas
+# ─────────────────────────────────────────
+
+def matriz_asistencia(empleados, dias):
+    """
+    Grilla empleados × días como estructura serializable: una fila por
+    empleado con el id de estado de cada día (0 = sin registro).
+    """
+    estados = [estado_a_dict(e) for e in EstadoAsistencia.objects.filter(activo=True)]
+    empleados = list(empleados)
+    registro_dict = repositorio.leer_estados(
+        dias[0], dias[-1], empleado_ids=[emp.id for emp in empleados],
+    ) if dias else {}
+    return {
+        'dias': [d.isoformat() for d in dias],
+        'estados': estados,
+        'empleados': [{'id': emp.id, 'nombre': str(emp)} for emp in empleados],
+        'celdas': [
+            [registro_dict.get((emp.id, dia), 0) for dia in dias]
+            for emp in empleados
+        ],
+    }
+
+
+def resumen_periodo(fecha_inicio, fecha_fin):
+    """
+    Totales del período por empleado y por estado, contados sobre las filas
+    mensuales compactas. Los conteos llegan mes a mes (ver
+    repositorio.conteos_mensuales) y se acumulan sobre la marcha: la memoria
+    depende de empleados × estados, no de la extensión del período. `meses`
+    trae además los totales por estado de cada mes, alineados con `estados`.
+
+    Entran los empleados de la plantilla del período, y los días posibles
+    de cada uno son solo los días hábiles dentro de sus períodos de empleo.
+    """
+    dias = dias_habiles(fecha_inicio, fecha_fin)
+    total_dias_habiles = len(dias)
+    empleados = list(plantilla(fecha_inicio, fecha_fin))
+    tramos = periodos_empleo(fecha_inicio, fecha_fin)
+    todos_estados = {e.id: e for e in EstadoAsistencia.objects.all()}
+    estados = [e for e in todos_estados.values() if e.activo]
+    total_empleados = len(empleados)
+
+    por_empleado = {}
+    por_estado = {}
+    meses = []
+    for mes, del_mes in repositorio.conteos_mensuales(
+        fecha_inicio, fecha_fin, plantilla(fecha_inicio, fecha_fin).values('pk'),
+    ):
+        por_estado_mes = {}
+        for (emp_id, estado_id), total in del_mes.items():
+            conteo = por_empleado.setdefault(emp_id, {})
+            conteo[estado_id] = conteo.get(estado_id, 0) + total
+            por_estado_mes[estado_id] = por_estado_mes.get(estado_id, 0) + total
+        for estado_id, total in por_estado_mes.items():
+            por_estado[estado_id] = por_estado.get(estado_id, 0) + total
+        fin_mes = mes.replace(day=calendar.monthrange(mes.year, mes.month)[1])
+        dias_mes = dias_habiles(max(fecha_inicio, mes), min(fecha_fin, fin_mes))
+        meses.append({
+            'mes': mes.isoformat(),
+            'dias_habiles': len(dias_mes),
+            'posibles': sum(dias_en_periodo(dias_mes, t) for t in tramos.values()),
+            'conteos': [por_estado_mes.get(e.id, 0) for e in estados],
+        })
+
+    posibles = {emp.id: dias_en_periodo(dias, tramos.get(emp.id, ())) for emp in empleados}
+    total_registros = sum(por_estado.values())
+    total_posibles = sum(posibles.values())
+    cobertura_global = round(total_registros / total_posibles * 100, 1) if total_posibles > 0 else 0
+
+    # ── Distribución global por estado ────────────────────
+    dist_estados = []
+    for estado_id, total in sorted(
+        por_estado.items(), key=lambda item: todos_estados[item[0]].orden
+    ):
+        e = todos_estados[estado_id]
+        pct = round(total / total_registros * 100, 1) if total_registros > 0 else 0
+        dist_estados.append({
+            'estado__id': e.id,
+            'estado__codigo': e.codigo,
+            'estado__descripcion': e.descripcion,
+            'estado__color_fondo': e.color_fondo,
+            'estado__color_texto': e.color_texto,
+            'estado__orden': e.orden,
+            'total': total,
+            'pct': pct,
+        })
+
+    # ── Estadísticas por empleado ──────────────────────────
+    filas = []
+    for emp in empleados:
+        conteo = por_empleado.get(emp.id, {})
+        total_marcados = sum(conteo.values())
+        sin_registro = max(posibles[emp.id] - total_marcados, 0)
+        cobertura = round(total_marcados / posibles[emp.id] * 100, 1) if posibles[emp.id] > 0 else 0
+        filas.append({
+            'empleado_id': emp.id,
+            'empleado': str(emp),
+            # Alineado con `estados`
+            'conteos': [conteo.get(e.id, 0) for e in estados],
+            'total_marcados': total_marcados,
+            'dias_posibles': posibles[emp.id],
+            'sin_registro': sin_registro,
+            'cobertura': cobertura,
+        })
+    filas.sort(key=lambda x: x['cobertura'], reverse=True)
+
+    return {
+        'total_dias_habiles': total_dias_habiles,
+        'total_empleados': total_empleados,
+        'total_registros': total_registros,
+        'total_posibles': total_posibles,
+        'cobertura_global': cobertura_global,
+        'estados': [estado_a_dict(e) for e in estados],
+        'dist_estados': dist_estados,
+        'empleados': filas,
+        'sin_registro_total': sum(f['sin_registro'] for f in filas),
+        'meses': meses,
+    }
+
+
+def _clave_resumen_anual(anio):
+    return f'asistencia:resumen_anual:{anio}'
+
+
+def resumen_anual(anio, hoy):
+    """
+    resumen_periodo del año (hasta `hoy` si es el año en curso), en caché.
+    Lo usan la estadística anual y la comparación interanual. Se calcula
+    sobre la base principal aunque la vista lea de la réplica.
+    """
+    hasta = min(date(anio, 12, 31), hoy)
+    clave = _clave_resumen_anual(anio)
+    guardado = cache.get(clave)
+    # El año en curso se recalcula cuando cambia el día
+    if guardado is None or guardado['hasta'] != hasta.isoformat():
+        with en_principal():
+            resumen = resumen_periodo(date(anio, 1, 1), hasta)
+        guardado = {'hasta': hasta.isoformat(), 'resumen': resumen}
+        cache.set(clave, guardado, RESUMEN_ANUAL_CACHE_TIMEOUT)
+    return guardado['resumen']
+
+
+def _clave_historial(empleado_id, anio):
+    return f'asistencia:historial:{empleado_id}:{anio}'
+
+
+def historial_empleado(empleado_id, anio_desde, anio_hasta):
+    """
+    Registros de un empleado por año como tuplas compactas
+    (ordinal de fecha, estado_id), ordenadas por fecha.
+
+    Los años que no están en caché se leen de las filas mensuales compactas
+    del empleado (doce por año) con una sola consulta a la base principal.
+    """
+    anios = range(anio_desde, anio_hasta + 1)
+    claves = {anio: _clave_historial(empleado_id, anio) for anio in anios}
+    en_cache = cache.get_many(claves.values())
+    historial = {anio: en_cache[clave] for anio, clave in claves.items() if clave in en_cache}
+
+    faltantes = [anio for anio in anios if anio not in historial]
+    if faltantes:
+        leidos = {anio: [] for anio in faltantes}
+        with en_principal():
+            celdas = repositorio.leer_estados(
+                date(faltantes[0], 1, 1), date(faltantes[-1], 12, 31), empleado_ids=[empleado_id],
+            )
+        for (_, fecha), estado_id in sorted(celdas.items()):
+            if fecha.year in leidos:
+                leidos[fecha.year].append((fecha.toordinal(), estado_id))
+        cache.set_many(
+            {claves[anio]: filas for anio, filas in leidos.items()},
+            HISTORIAL_CACHE_TIMEOUT,
+        )
+        historial.update(leidos)
+    return historial
+
+
+def _clave_panel_hoy(fecha):
+    return f'asistencia:panel_hoy:{fecha.isoformat()}'
+
+
+def panel_hoy(hoy):
+    """
+    Conteos por estado de hoy y de la semana en curso, promedio diario de
+    los PANEL_HOY_VENTANA_DIAS días hábiles anteriores y empleados activos
+    sin marcar hoy. Se calcula con una sola lectura de las filas mensuales.
+    """
+    clave = _clave_panel_hoy(hoy)
+    panel = cache.get(clave)
+    if panel is None:
+        panel = _calcular_panel_hoy(hoy)
+        cache.set(clave, panel, PANEL_HOY_CACHE_TIMEOUT)
+    return panel
+
+
+def invalidar_panel_hoy():
+    cache.delete(_clave_panel_hoy(date.today()))
+
+
+def _calcular_panel_hoy(hoy):
+    lunes = hoy - timedelta(days=hoy.weekday())
+    semana = dias_habiles(lunes, hoy)
+    previos = dias_habiles(hoy - timedelta(days=PANEL_HOY_VENTANA_DIAS * 2), hoy - timedelta(days=1))
+    previos = previos[-PANEL_HOY_VENTANA_DIAS:]
+
+    desde = min(previos[0], lunes)
+    empleados = list(plantilla(hoy, hoy))
+    estados = [estado_a_dict(e) for e in EstadoAsistencia.objects.filter(activo=True)]
+    empleado_ids, dias, matriz = repositorio.matriz_calendario(
+        desde, hoy, plantilla(desde, hoy).values('pk'),
+    )
+    columna_de = {dia: j for j, dia in enumerate(dias)}
+    ancho = max([int(matriz.max()) if matriz.size else 0] + [e['id'] for e in estados]) + 1
+
+    def conteo(fechas):
+        valores = matriz[:, [columna_de[d] for d in fechas]].ravel()
+        return np.bincount(valores, minlength=ancho)
+
+    de_hoy = conteo([hoy])
+    de_semana = conteo(semana)
+    promedio = conteo(previos) / len(previos)
+
+    marcados = {empleado_ids[i] for i in np.flatnonzero(matriz[:, columna_de[hoy]])}
+    sin_marcar = [{'id': emp.id, 'nombre': str(emp)} for emp in empleados if emp.id not in marcados]
+    return {
+        'estados': [
+            {
+                **e,
+                'hoy': int(de_hoy[e['id']]),
+                'semana': int(de_semana[e['id']]),
+                'promedio': round(float(promedio[e['id']]), 1),
+                'diferencia': round(float(de_hoy[e['id']] - promedio[e['id']]), 1),
+            }
+            for e in estados
+        ],
+        'total_empleados': len(empleados),
+        'marcados_hoy': len(empleados) - len(sin_marcar),
+        'sin_marcar': sin_marcar,
+        'dias_semana': len(semana),
+        'ventana_dias': len(previos),
+    }
+
+
+def registrar_cambios(celdas):
+    """
+    Punto único a invocar después de modificar registros de asistencia,
+    dentro de la misma transacción. `celdas` es un iterable de
+    (empleado_id, fecha). Actualiza la representación compacta y el índice
+    de huecos y, una vez confirmada la transacción, invalida las cachés
+    derivadas.
+    """
+    celdas = set(celdas)
+    repositorio.sincronizar(celdas)
+    _actualizar_huecos(celdas)
+    claves = {_clave_historial(emp_id, fecha.year) for emp_id, fecha in celdas}
+    if claves:
+        claves.add(_clave_panel_hoy(date.today()))
+        claves.update(_clave_resumen_anual(fecha.year) for _, fecha in celdas)
+        transaction.on_commit(lambda: cache.delete_many(list(claves)))
+
+
+# ─────────────────────────────────────────
+# Índice de huecos
+# ─────────────────────────────────────────
+
+def _hasta_huecos():
+    return IndiceHuecos.objects.values_list('hasta', flat=True).first()
+
+
+def _calcular_huecos(desde, hasta, empleado_ids=None):
+    """
+    Inserta los huecos de [desde, hasta] mes a mes: días hábiles de cada
+    tramo de empleo sin estado en las filas compactas. Devuelve cuántos.
+    """
+    total = 0
+    for mes in repositorio.meses_entre(desde, hasta):
+        inicio = max(desde, mes)
+        fin = min(hasta, mes.replace(day=calendar.monthrange(mes.year, mes.month)[1]))
+        dias = dias_habiles(inicio, fin)
+        tramos = periodos_empleo(inicio, fin, empleado_ids) if dias else {}
+        if not tramos:
+            continue
+        marcadas = repositorio.leer_estados(inicio, fin, list(tramos))
+        filas = [
+            HuecoAsistencia(empleado_id=emp_id, fecha=dia)
+            for emp_id, del_empleado in tramos.items()
+            for primero, ultimo in del_empleado
+            for dia in dias[bisect.bisect_left(dias, primero):bisect.bisect_right(dias, ultimo)]
+            if (emp_id, dia) not in marcadas
+        ]
+        HuecoAsistencia.objects.bulk_create(filas, batch_size=500, ignore_conflicts=True)
+        total += len(filas)
+    return total
+
+
+def _borrar_huecos(celdas):
+    por_fecha = {}
+    for emp_id, fecha in celdas:
+        por_fecha.setdefault(fecha, []).append(emp_id)
+    condiciones = [Q(fecha=fecha, empleado_id__in=ids) for fecha, ids in por_fecha.items()]
+    for i in range(0, len(condiciones), _LOTE_HUECOS):
+        filtro = Q()
+        for condicion in condiciones[i:i + _LOTE_HUECOS]:
+            filtro |= condicion
+        HuecoAsistencia.objects.filter(filtro).delete()
+
+
+def _actualizar_huecos(celdas):
+    """Ajusta el índice para las celdas recién escritas que ya cubre."""
+    hasta = _hasta_huecos()
+    celdas = {(e, f) for e, f in celdas if hasta and f <= hasta and f.weekday() < 5}
+    if not celdas:
+        return
+    desde = min(f for _, f in celdas)
+    fin = max(f for _, f in celdas)
+    empleado_ids = sorted({e for e, _ in celdas})
+    marcadas = repositorio.leer_estados(desde, fin, empleado_ids)
+    tramos = periodos_empleo(desde, fin, empleado_ids)
+    _borrar_huecos([c for c in celdas if c in marcadas])
+    HuecoAsistencia.objects.bulk_create(
+        [
+            HuecoAsistencia(empleado_id=emp_id, fecha=fecha)
+            for emp_id, fecha in celdas
+            if (emp_id, fecha) not in marcadas and en_periodo(tramos.get(emp_id, ()), fecha)
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def reconstruir_huecos(empleado_ids=None, desde=None):
+    """
+    Recalcula los huecos de `empleado_ids` (todos por omisión) desde
+    `desde` (el inicio de sus períodos) hasta donde llega el índice. Se usa
+    al cambiar períodos de empleo, que mueven días dentro o fuera de la
+    plantilla sin tocar registros.
+    """
+    hasta = _hasta_huecos()
+    if hasta is None:
+        return 0
+    huecos = HuecoAsistencia.objects.all()
+    periodos = PeriodoEmpleo.objects.all()
+    if empleado_ids is not None:
+        huecos = huecos.filter(empleado_id__in=empleado_ids)
+        periodos = periodos.filter(empleado_id__in=empleado_ids)
+    if desde is not None:
+        huecos = huecos.filter(fecha__gte=desde)
+    with transaction.atomic():
+        huecos.delete()
+        inicio = desde or periodos.aggregate(inicio=Min('desde'))['inicio']
+        if inicio is None or inicio > hasta:
+            return 0
+        return _calcular_huecos(inicio, hasta, empleado_ids)
+
+
+def huecos_al_dia(hoy):
+    """
+    Extiende el índice hasta `hoy`: agrega solo los días nuevos, o lo
+    calcula completo desde el período de empleo más antiguo si todavía no
+    existe. Lo corre el comando actualizar_huecos (programado una vez por
+    día); las lecturas nunca lo extienden.
+    """
+    with transaction.atomic():
+        indice, _ = IndiceHuecos.objects.select_for_update().get_or_create(pk=1)
+        if indice.hasta is None or indice.hasta < hoy:
+            if indice.hasta is None:
+                desde = PeriodoEmpleo.objects.aggregate(inicio=Min('desde'))['inicio']
+            else:
+                desde = indice.hasta + timedelta(days=1)
+            if desde is not None and desde <= hoy:
+                _calcular_huecos(desde, hoy)
+            indice.hasta = hoy
+            indice.save(update_fields=['hasta', 'actualizado_en'])
+
+
+def reiniciar_huecos(hoy):
+    """Descarta el índice y lo vuelve a calcular hasta `hoy`. Devuelve cuántos huecos hay."""
+    with transaction.atomic():
+        HuecoAsistencia.objects.all().delete()
+        IndiceHuecos.objects.filter(pk=1).update(hasta=None)
+        huecos_al_dia(hoy)
+    return HuecoAsistencia.objects.count()
+
+
+def huecos_de_rango(desde, hasta, empleado_ids=None, limite=None):
+    """
+    Celdas sin registro de [desde, hasta] leídas del índice: `total`,
+    `por_empleado` (de mayor a menor cantidad) y `huecos`, ordenados por
+    fecha, con como mucho `limite`. Solo lee: los días posteriores a
+    `indice_hasta` (None si el índice todavía no se calculó) no se cuentan
+    hasta que corra actualizar_huecos.
+    """
+    indice_hasta = _hasta_huecos()
+    filas = HuecoAsistencia.objects.filter(fecha__gte=desde, fecha__lte=hasta)
+    if empleado_ids is not None:
+        filas = filas.filter(empleado_id__in=empleado_ids)
+    cantidades = list(
+        filas.order_by().values('empleado_id')
+        .annotate(cantidad=Count('id'))
+        .order_by('-cantidad', 'empleado_id')
+    )
+    nombres = {
+        emp.id: str(emp)
+        for emp in Empleado.objects.filter(pk__in=[c['empleado_id'] for c in cantidades])
+    }
+    total = sum(c['cantidad'] for c in cantidades)
+    listado = filas.order_by('fecha', 'empleado_id').values_list('empleado_id', 'fecha')
+    if limite is not None:
+        listado = listado[:limite]
+    return {
+        'total': total,
+        'por_empleado': [
+            {
+                'empleado_id': c['empleado_id'],
+                'empleado': nombres[c['empleado_id']],
+                'cantidad': c['cantidad'],
+            }
+            for c in cantidades
+        ],
+        'huecos': [{'empleado_id': emp_id, 'fecha': fecha} for emp_id, fecha in listado],
+        'truncado': limite is not None and total > limite,
+        'indice_hasta': indice_hasta,
+    }
+
+
+# ─────────────────────────────────────────
+# Guardado por celda
+# ─────────────────────────────────────────
+
+def _escribir_celda(celda):
+    """
+    Escribe la celda solo si su versión sigue siendo la que vio el cliente.
+    Devuelve la versión resultante (0 = celda vacía) o None si otra edición
+    la cambió antes.
+    """
+    filas = RegistroAsistencia.objects.filter(empleado_id=celda['empleado_id'], fecha=celda['fecha'])
+    version = celda['version']
+    if version:
+        filas = filas.filter(version=version)
+
+    if not celda['estado_id']:
+        if version == 0:
+            return None if filas.exists() else 0
+        borradas, _ = filas.delete()
+        return 0 if borradas or version is None else None
+
+    if version != 0 and filas.update(
+        estado_id=celda['estado_id'],
+        observaciones=celda['observaciones'],
+        version=F('version') + 1,
+        updated_at=timezone.now(),
+    ):
+        return version + 1 if version else filas.values_list('version', flat=True).get()
+    if version:
+        return None
+    try:
+        with transaction.atomic():
+            RegistroAsistencia.objects.create(
+                empleado_id=celda['empleado_id'],
+                fecha=celda['fecha'],
+                estado_id=celda['estado_id'],
+                observaciones=celda['observaciones'],
+            )
+    except IntegrityError:
+        return None
+    return 1
+
+
+def celdas_rechazadas(celdas):
+    """
+    {(empleado_id, fecha): motivo} de las celdas de la grilla que no se
+    pueden escribir: las de meses cerrados y las que cargan un estado fuera
+    de los períodos de empleo (vaciarlas sí se permite). Se informan una
+    por una para que el resto del lote se aplique igual.
+    """
+    if not celdas:
+        return {}
+    cerrados = meses_cerrados(c['fecha'] for c in celdas)
+    fechas = [c['fecha'] for c in celdas]
+    tramos = periodos_empleo(min(fechas), max(fechas), {c['empleado_id'] for c in celdas})
+    rechazadas = {}
+    for c in celdas:
+        if (c['fecha'].year, c['fecha'].month) in cerrados:
+            rechazadas[(c['empleado_id'], c['fecha'])] = f"Mes cerrado ({c['fecha']:%m/%Y})."
+        elif c['estado_id'] and not en_periodo(tramos.get(c['empleado_id'], ()), c['fecha']):
+            rechazadas[(c['empleado_id'], c['fecha'])] = 'Fuera del período de empleo.'
+    return rechazadas
+
+
+def celdas_vigentes(claves):
+    """{(empleado_id, fecha): (estado_id, versión)} actual de las celdas pedidas."""
+    claves = list(claves)
+    if not claves:
+        return {}
+    fechas = [fecha for _, fecha in claves]
+    vigentes = {
+        (emp_id, fecha): (estado_id, version)
+        for emp_id, fecha, estado_id, version in RegistroAsistencia.objects.filter(
+            empleado_id__in={emp_id for emp_id, _ in claves},
+            fecha__gte=min(fechas),
+            fecha__lte=max(fechas),
+        ).values_list('empleado_id', 'fecha', 'estado_id', 'version')
+    }
+    return {clave: vigentes.get(clave, (None, 0)) for clave in claves}
+
+
+def aplicar_celdas(celdas, usuario=None):
+    """
+    Aplica celdas de la grilla {'empleado_id', 'fecha', 'estado_id',
+    'observaciones', 'version'} en transacciones de a
+    CELDAS_POR_TRANSACCION. `version` es la que cargó el cliente (0 = celda
+    vacía, None = sin control): si la celda cambió desde entonces no se pisa
+    y se informa como conflicto, salvo que ya tenga el estado pedido (por
+    ejemplo, el reintento de un lote ya aplicado). Las celdas que no se
+    pueden escribir (ver celdas_rechazadas) se descartan; la verificación
+    corre en la misma transacción que escribe, así un cierre de mes
+    simultáneo no deja pasar ediciones al mes cerrado.
+
+    Devuelve (versiones, conflictos, rechazadas): {(empleado_id, fecha):
+    versión} de las celdas aplicadas, {(empleado_id, fecha): (estado_id,
+    versión)} vigente de las que chocaron con otra edición y
+    {(empleado_id, fecha): motivo} de las descartadas.
+    """
+    versiones, conflictos, rechazadas = {}, {}, {}
+    for i in range(0, len(celdas), CELDAS_POR_TRANSACCION):
+        with transaction.atomic():
+            tramo = celdas[i:i + CELDAS_POR_TRANSACCION]
+            rechazadas_tramo = celdas_rechazadas(tramo)
+            rechazadas.update(rechazadas_tramo)
+            tramo = [c for c in tramo if (c['empleado_id'], c['fecha']) not in rechazadas_tramo]
+            anteriores = auditoria.capturar((c['empleado_id'], c['fecha']) for c in tramo)
+            nuevos = {}
+            for celda in tramo:
+                clave = (celda['empleado_id'], celda['fecha'])
+                version = _escribir_celda(celda)
+                if version is None:
+                    estado_id, version = RegistroAsistencia.objects.filter(
+                        empleado_id=celda['empleado_id'], fecha=celda['fecha'],
+                    ).values_list('estado_id', 'version').first() or (None, 0)
+                    if (estado_id or 0) != (celda['estado_id'] or 0):
+                        conflictos[clave] = (estado_id, version)
+                        continue
+                else:
+                    nuevos[clave] = celda['estado_id'] or 0
+                versiones[clave] = version
+            registrar_cambios(nuevos)
+            auditoria.registrar(usuario, CambioAsistencia.ORIGEN_GRILLA, anteriores, nuevos)
+    return versiones, conflictos, rechazadas
+
+
+# ─────────────────────────────────────────
+# Escrituras masivas
+# ─────────────────────────────────────────
+
+def _insertar_vacias(estado_id, dias, empleados):
+    """
+    INSERT … SELECT de `estado_id` en las celdas vacías de `dias` que caen
+    dentro de los períodos de empleo de `empleados` (queryset usado como
+    subconsulta): SQLite arma el producto empleados × días y descarta las
+    celdas ocupadas con ON CONFLICT. Devuelve las celdas realmente insertadas.
+    """
+    ops = connection.ops
+    subconsulta, parametros = empleados.values('pk').query.sql_with_params()
+    ahora = ops.adapt_datetimefield_value(timezone.now())
+    sql = f"""
+        WITH dias(fecha) AS (VALUES {', '.join(['(%s)'] * len(dias))})
+        INSERT INTO {ops.quote_name(RegistroAsistencia._meta.db_table)}
+            (empleado_id, fecha, estado_id, observaciones, version, created_at, updated_at)
+        SELECT p.empleado_id, d.fecha, %s, '', 1, %s, %s
+        FROM {ops.quote_name(PeriodoEmpleo._meta.db_table)} p
+        JOIN dias d ON d.fecha >= p.desde AND (p.hasta IS NULL OR d.fecha <= p.hasta)
+        WHERE p.empleado_id IN ({subconsulta})
+        ON CONFLICT (empleado_id, fecha) DO NOTHING
+        RETURNING empleado_id, fecha
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [
+            *(ops.adapt_datefield_value(dia) for dia in dias),
+            estado_id, ahora, ahora, *parametros,
+        ])
+        # La columna `fecha` es de tipo date: el driver ya la convierte
+        return set(cursor.fetchall())
+
+
+def rellenar_rango(estado_id, desde, hasta, empleado_ids=None, sobrescribir=False, usuario=None):
+    """
+    Asigna `estado_id` a empleados × días hábiles del rango en operaciones de
+    conjunto, sin armar el producto en Python. Sin `sobrescribir` solo
+    completa las celdas vacías; con él, también cambia las ocupadas con otro
+    estado. Solo se escriben los días dentro de los períodos de empleo de
+    cada uno. Los cambios quedan auditados a nombre de `usuario`.
+
+    Devuelve la cantidad de celdas que cambiaron.
+    """
+    dias = dias_habiles(desde, hasta)
+    if not dias:
+        return 0
+    empleados = plantilla(desde, hasta)
+    if empleado_ids is not None:
+        empleados = empleados.filter(pk__in=empleado_ids)
+
+    with transaction.atomic():
+        # Dentro de la transacción que escribe: ver cerrar_mes
+        verificar_meses_abiertos(dias)
+        anteriores = {}
+        if sobrescribir:
+            en_periodo_de_empleo = Exists(
+                PeriodoEmpleo.objects.filter(
+                    empleado_id=OuterRef('empleado_id'), desde__lte=OuterRef('fecha'),
+                ).filter(Q(hasta__isnull=True) | Q(hasta__gte=OuterRef('fecha')))
+            )
+            # Solo las celdas que cambian de estado pasan a otra versión
+            cambian = RegistroAsistencia.objects.filter(
+                en_periodo_de_empleo, empleado__in=empleados, fecha__in=dias,
+            ).exclude(estado_id=estado_id)
+            anteriores = {
+                (emp_id, fecha): anterior
+                for emp_id, fecha, anterior in cambian.values_list('empleado_id', 'fecha', 'estado_id')
+            }
+            actualizadas = cambian.update(
+                estado_id=estado_id, version=F('version') + 1, updated_at=timezone.now(),
+            )
+            if actualizadas != len(anteriores):
+                raise IntegrityError('Las celdas cambiaron durante el relleno; reintente.')
+        celdas = dict.fromkeys(anteriores, estado_id)
+        celdas.update(dict.fromkeys(_insertar_vacias(estado_id, dias, empleados), estado_id))
+        registrar_cambios(celdas)
+        auditoria.registrar(usuario, CambioAsistencia.ORIGEN_RELLENO, anteriores, celdas)
+    return len(celdas)
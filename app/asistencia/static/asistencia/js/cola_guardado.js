@@ -0,0 +1,236 @@
+// Cola de guardado de la grilla.
+//
+// Cada edición se guarda en IndexedDB (o en memoria si no está disponible)
+// hasta que el servidor la confirma. Al guardar, las ediciones pendientes se
+// agrupan en lotes de TAMANIO_LOTE celdas con una clave de idempotencia que
+// se persiste junto al lote: un reintento reenvía la misma clave y el
+// servidor lo descarta si ya lo había aplicado. Cada celda viaja con la
+// versión que cargó la grilla; el servidor no pisa las que cambiaron desde
+// entonces y las devuelve como conflictos, y las que no puede escribir (mes
+// cerrado, fuera del período de empleo) como rechazos, sin frenar el resto.
+//
+// La cantidad de celdas sin confirmar se lleva en memoria (se lee del
+// almacenamiento una sola vez, al abrirlo): contarlas no recorre la cola.
+const ColaGuardado = (function () {
+  const DB_NOMBRE = 'asistencia-grilla';
+  const TAMANIO_LOTE = 250;
+  const memoria = { pendientes: new Map(), lotes: new Map() };
+  // Celda → en cuántos lugares de la cola está (pendientes y cada lote)
+  const enCola = new Map();
+  const idsPendientes = new Set();
+  let dbPromesa = null;
+
+  function idCelda(c) { return c.empleado_id + '|' + c.fecha; }
+
+  function sumar(id) { enCola.set(id, (enCola.get(id) || 0) + 1); }
+
+  function restar(id) {
+    const n = (enCola.get(id) || 0) - 1;
+    if (n > 0) enCola.set(id, n); else enCola.delete(id);
+  }
+
+  // Cuenta lo que quedó en cola de una sesión anterior
+  function contarGuardadas(db) {
+    return new Promise(function (resolve) {
+      const tx = db.transaction(['pendientes', 'lotes']);
+      tx.objectStore('pendientes').getAll().onsuccess = function (e) {
+        e.target.result.forEach(function (c) { idsPendientes.add(c.id); sumar(c.id); });
+      };
+      tx.objectStore('lotes').getAll().onsuccess = function (e) {
+        e.target.result.forEach(function (lote) { lote.registros.map(idCelda).forEach(sumar); });
+      };
+      tx.oncomplete = tx.onerror = tx.onabort = function () { resolve(db); };
+    });
+  }
+
+  function abrir() {
+    if (!dbPromesa) {
+      dbPromesa = new Promise(function (resolve) {
+        if (!window.indexedDB) { resolve(null); return; }
+        const req = indexedDB.open(DB_NOMBRE, 1);
+        req.onupgradeneeded = function () {
+          req.result.createObjectStore('pendientes', { keyPath: 'id' });
+          req.result.createObjectStore('lotes', { keyPath: 'clave' });
+        };
+        req.onsuccess = function () { resolve(contarGuardadas(req.result)); };
+        // Navegación privada o almacenamiento bloqueado: se usa la memoria
+        req.onerror = function () { resolve(null); };
+      });
+    }
+    return dbPromesa;
+  }
+
+  function fin(tx) {
+    return new Promise(function (resolve, reject) {
+      tx.oncomplete = function () { resolve(); };
+      tx.onerror = tx.onabort = function () { reject(tx.error); };
+    });
+  }
+
+  async function todos(almacen) {
+    const db = await abrir();
+    if (!db) return Array.from(memoria[almacen].values());
+    return new Promise(function (resolve, reject) {
+      const req = db.transaction(almacen).objectStore(almacen).getAll();
+      req.onsuccess = function () { resolve(req.result); };
+      req.onerror = function () { reject(req.error); };
+    });
+  }
+
+  function nuevaClave() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    const bytes = crypto.getRandomValues(new Uint8Array(16));
+    return Array.from(bytes, function (b) { return b.toString(16).padStart(2, '0'); }).join('');
+  }
+
+  function armarLotes(pendientes) {
+    const lotes = [];
+    const base = Date.now();
+    for (let i = 0; i < pendientes.length; i += TAMANIO_LOTE) {
+      lotes.push({
+        clave: nuevaClave(),
+        orden: base + lotes.length,
+        registros: pendientes.slice(i, i + TAMANIO_LOTE).map(function (c) {
+          return {
+            empleado_id: c.empleado_id, fecha: c.fecha, estado_id: c.estado_id, version: c.version,
+          };
+        }),
+      });
+    }
+    return lotes;
+  }
+
+  // ── Ediciones ──────────────────────────────────────────
+  // Encola celdas {empleado_id, fecha, estado_id, version} en una sola
+  // transacción (por ejemplo, todas las de «Marcar hoy»).
+  async function encolar(celdas) {
+    celdas = celdas.map(function (c) {
+      return {
+        id: idCelda(c),
+        empleado_id: c.empleado_id,
+        fecha: c.fecha,
+        estado_id: c.estado_id,
+        version: c.version,
+      };
+    });
+    const db = await abrir();
+    if (db) {
+      const tx = db.transaction('pendientes', 'readwrite');
+      const pendientes = tx.objectStore('pendientes');
+      celdas.forEach(function (c) { pendientes.put(c); });
+      await fin(tx);
+    } else {
+      celdas.forEach(function (c) { memoria.pendientes.set(c.id, c); });
+    }
+    // Se cuentan al confirmarse la transacción, en el mismo orden que la cola
+    celdas.forEach(function (c) {
+      if (!idsPendientes.has(c.id)) { idsPendientes.add(c.id); sumar(c.id); }
+    });
+  }
+
+  // Cantidad de celdas distintas sin confirmar
+  async function cantidad() {
+    await abrir();
+    return enCola.size;
+  }
+
+  // Celdas aún no confirmadas, en el orden en que deben aplicarse
+  async function sinConfirmar() {
+    const lotes = (await todos('lotes')).sort(function (a, b) { return a.orden - b.orden; });
+    const celdas = [];
+    lotes.forEach(function (lote) { celdas.push.apply(celdas, lote.registros); });
+    return celdas.concat(await todos('pendientes'));
+  }
+
+  // Pasa las ediciones pendientes a lotes en una única transacción, para
+  // que una edición concurrente no se pierda entre la lectura y el borrado.
+  // Cada celda pasa de pendientes a un lote: su cuenta no cambia.
+  async function cerrarLotes() {
+    const db = await abrir();
+    if (!db) {
+      armarLotes(Array.from(memoria.pendientes.values())).forEach(function (lote) {
+        memoria.lotes.set(lote.clave, lote);
+      });
+      memoria.pendientes.clear();
+      idsPendientes.clear();
+      return;
+    }
+    const tx = db.transaction(['pendientes', 'lotes'], 'readwrite');
+    const pendientes = tx.objectStore('pendientes');
+    let movidas = [];
+    pendientes.getAll().onsuccess = function (e) {
+      movidas = e.target.result;
+      armarLotes(movidas).forEach(function (lote) {
+        tx.objectStore('lotes').put(lote);
+      });
+      pendientes.clear();
+    };
+    await fin(tx);
+    movidas.forEach(function (c) { idsPendientes.delete(c.id); });
+  }
+
+  async function quitarLote(lote) {
+    const db = await abrir();
+    if (db) {
+      const tx = db.transaction('lotes', 'readwrite');
+      tx.objectStore('lotes').delete(lote.clave);
+      await fin(tx);
+    } else {
+      memoria.lotes.delete(lote.clave);
+    }
+    lote.registros.map(idCelda).forEach(restar);
+  }
+
+  // ── Envío ──────────────────────────────────────────────
+  // Envía los lotes en orden. Un corte de red, un error del servidor o una
+  // sesión vencida detienen el envío y dejan el resto en cola. Las celdas
+  // que el servidor no pudo escribir vuelven una por una en `rechazados`
+  // con su valor vigente; el resto del lote queda confirmado. Un lote
+  // rechazado entero (400/409: pedido inválido) no tiene reintento posible:
+  // se descarta y sus celdas vuelven en `descartadas` para señalarlas.
+  async function enviar(url, csrfToken) {
+    await cerrarLotes();
+    const lotes = (await todos('lotes')).sort(function (a, b) { return a.orden - b.orden; });
+    const resultado = {
+      celdas: 0, duplicados: 0, errores: [], versiones: [], conflictos: [],
+      rechazados: [], descartadas: [],
+    };
+
+    for (const lote of lotes) {
+      let resp;
+      try {
+        resp = await fetch(url, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json', 'X-CSRFToken': csrfToken },
+          body: JSON.stringify({ clave: lote.clave, registros: lote.registros }),
+        });
+      } catch (e) {
+        throw new Error('Sin conexión. Los cambios quedan en cola y se reintentarán.');
+      }
+
+      let data = null;
+      try { data = await resp.json(); } catch (e) { data = null; }
+
+      if (resp.ok && data && data.success) {
+        const rechazados = data.rechazados || [];
+        resultado.celdas += lote.registros.length - rechazados.length;
+        if (data.duplicado) resultado.duplicados += 1;
+        resultado.versiones.push.apply(resultado.versiones, data.versiones || []);
+        resultado.conflictos.push.apply(resultado.conflictos, data.conflictos || []);
+        resultado.rechazados.push.apply(resultado.rechazados, rechazados);
+      } else if (data && (resp.status === 400 || resp.status === 409)) {
+        resultado.errores.push(data.error || 'Lote rechazado');
+        resultado.descartadas.push.apply(resultado.descartadas, lote.registros);
+      } else {
+        throw new Error('El servidor no confirmó el guardado (HTTP ' + resp.status + '). '
+          + 'Los cambios quedan en cola y se reintentarán.');
+      }
+      await quitarLote(lote);
+    }
+    return resultado;
+  }
+
+  return {
+    encolar: encolar, cantidad: cantidad, sinConfirmar: sinConfirmar, enviar: enviar,
+  };
+})();
@@ -0,0 +1,279 @@
+// Grilla de asistencia. Las URLs y la fecha de hoy llegan como data-*
+// del propio <script> (ver asistencia_grilla.html y asistencia_rango.html).
+const config = document.currentScript.dataset;
+
+// ── Color de celda: una clase por estado (ver estados.css) ──
+// Solo se cambia la clase de la <td>; no se leen ni escriben estilos.
+const CLASE_ESTADO = /(^|\s)estado-\d+(?=\s|$)/g;
+
+function aplicarEstado(select) {
+  const td = select.closest('td');
+  td.className = td.className.replace(CLASE_ESTADO, '');
+  if (select.value) td.classList.add('estado-' + select.value);
+}
+
+// ── Cola de cambios sin confirmar (ver cola_guardado.js) ──
+function celdaDeSelect(select) {
+  return {
+    empleado_id: parseInt(select.dataset.empleadoId),
+    fecha: select.dataset.fecha,
+    estado_id: select.value ? parseInt(select.value) : null,
+    version: parseInt(select.dataset.version || '0'),
+  };
+}
+
+function encolarCeldas(selects) {
+  return ColaGuardado.encolar(Array.from(selects, celdaDeSelect)).then(actualizarContador);
+}
+
+function selectDeCelda(empleadoId, fecha) {
+  return document.querySelector(
+    `.asistencia-select[data-empleado-id="${empleadoId}"][data-fecha="${fecha}"]`
+  );
+}
+
+// Tras guardar: versiones nuevas de lo aplicado y, en las celdas que otra
+// persona cambió antes o que el servidor rechazó, su valor vigente
+// resaltado. Las de un lote descartado entero solo se resaltan.
+function aplicarRespuesta(resultado) {
+  resultado.versiones.forEach(function (v) {
+    const sel = selectDeCelda(v.empleado_id, v.fecha);
+    if (sel) sel.dataset.version = v.version;
+  });
+  resultado.conflictos.concat(resultado.rechazados).forEach(function (c) {
+    const sel = selectDeCelda(c.empleado_id, c.fecha);
+    if (!sel) return;
+    sel.value = c.estado_id || '';
+    sel.dataset.version = c.version;
+    aplicarEstado(sel);
+    sel.closest('td').classList.add('celda-conflicto');
+  });
+  resultado.descartadas.forEach(function (c) {
+    const sel = selectDeCelda(c.empleado_id, c.fecha);
+    if (sel) sel.closest('td').classList.add('celda-conflicto');
+  });
+}
+
+async function actualizarContador() {
+  const contador = document.getElementById('cola-pendientes');
+  if (!contador) return;
+  const cantidad = await ColaGuardado.cantidad();
+  contador.textContent = cantidad ? `${cantidad} cambios sin guardar` : '';
+}
+
+// Reaplica en la grilla los cambios que quedaron sin confirmar
+async function restaurarPendientes() {
+  const celdas = await ColaGuardado.sinConfirmar();
+  celdas.forEach(function (c) {
+    const sel = selectDeCelda(c.empleado_id, c.fecha);
+    if (sel && !sel.disabled) {
+      sel.value = c.estado_id || '';
+      aplicarEstado(sel);
+    }
+  });
+  await actualizarContador();
+}
+
+// ── Carga por partes: el servidor manda las filas de a páginas ─
+// Cada respuesta trae solo <tr>; la URL de la página siguiente llega en
+// el encabezado X-Pagina-Siguiente (vacío en la última).
+function prepararCargaPorPartes() {
+  const btn = document.getElementById('btn-cargar-mas');
+  const tbody = document.querySelector('.asistencia-table tbody');
+  if (!btn || !tbody) return;
+
+  let siguiente = btn.dataset.url;
+  let cargando = false;
+
+  async function cargar() {
+    if (!siguiente || cargando) return;
+    cargando = true;
+    btn.disabled = true;
+    try {
+      const resp = await fetch(siguiente, { headers: { 'X-Requested-With': 'XMLHttpRequest' } });
+      if (!resp.ok) throw new Error('HTTP ' + resp.status);
+      const contenedor = document.createElement('tbody');
+      contenedor.innerHTML = await resp.text();
+      tbody.append.apply(tbody, Array.from(contenedor.children));
+      await restaurarPendientes();
+      siguiente = resp.headers.get('X-Pagina-Siguiente') || '';
+    } catch (e) {
+      // Tras un error la carga queda en manos del botón
+      if (observador) observador.disconnect();
+      observador = null;
+      alert('No se pudieron cargar más empleados: ' + e.message);
+    } finally {
+      cargando = false;
+      btn.disabled = false;
+    }
+    if (!siguiente) {
+      if (observador) observador.disconnect();
+      btn.parentElement.remove();
+    } else if (observador) {
+      // Si el botón sigue a la vista se vuelve a disparar la carga
+      observador.unobserve(btn);
+      observador.observe(btn);
+    }
+  }
+
+  btn.addEventListener('click', cargar);
+  // Se carga la página siguiente al acercarse al final de la tabla
+  let observador = window.IntersectionObserver
+    ? new IntersectionObserver(function (entradas) {
+        if (entradas.some(function (e) { return e.isIntersecting; })) cargar();
+      }, { rootMargin: '400px' })
+    : null;
+  if (observador) observador.observe(btn);
+}
+
+// Un único listener para todas las celdas, incluidas las cargadas por partes
+document.addEventListener('change', function (e) {
+  if (e.target.classList.contains('asistencia-select')) {
+    e.target.closest('td').classList.remove('celda-conflicto');
+    aplicarEstado(e.target);
+    encolarCeldas([e.target]);
+  }
+});
+
+document.addEventListener('DOMContentLoaded', function () {
+  restaurarPendientes();
+  prepararCargaPorPartes();
+
+  // Scroll suave al día de hoy (columna)
+  const hoyHeader = document.querySelector('th.col-hoy');
+  if (hoyHeader) {
+    hoyHeader.scrollIntoView({ behavior: 'smooth', inline: 'center', block: 'nearest' });
+  }
+
+  // ── Marcar todos los empleados con un estado para hoy ─────
+  const btnMarcarHoy = document.getElementById('btn-marcar-hoy');
+  if (btnMarcarHoy) {
+    btnMarcarHoy.addEventListener('click', function () {
+      const fechaHoy = config.hoy;
+      const selectMasivo = document.getElementById('select-estado-masivo');
+      const estadoId = selectMasivo.value;
+      const selectsHoy = document.querySelectorAll(`.asistencia-select[data-fecha="${fechaHoy}"]`);
+
+      if (selectsHoy.length === 0) {
+        alert('El día de hoy no está visible en la grilla actual.\nNavegá al mes actual o quitá el filtro de semana.');
+        return;
+      }
+
+      selectsHoy.forEach(function (sel) {
+        sel.value = estadoId;
+        aplicarEstado(sel);
+      });
+      // Todas en una sola transacción de la cola
+      encolarCeldas(selectsHoy);
+
+      // Feedback visual breve
+      const original = btnMarcarHoy.innerHTML;
+      btnMarcarHoy.innerHTML = `<i class="bi bi-check-circle me-1"></i>${selectsHoy.length} marcados`;
+      btnMarcarHoy.classList.replace('btn-outline-secondary', 'btn-success');
+      setTimeout(function () {
+        btnMarcarHoy.innerHTML = original;
+        btnMarcarHoy.classList.replace('btn-success', 'btn-outline-secondary');
+      }, 1800);
+    });
+  }
+
+  // ── Relleno masivo de un rango (se resuelve en el servidor) ─
+  const btnRellenar = document.getElementById('btn-rellenar');
+  if (btnRellenar) {
+    btnRellenar.addEventListener('click', async function () {
+      btnRellenar.disabled = true;
+      try {
+        const resp = await fetch(config.urlRellenar, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': getCookie('csrftoken')
+          },
+          body: JSON.stringify({
+            estado_id: parseInt(document.getElementById('rellenar-estado').value),
+            desde: document.getElementById('rellenar-desde').value,
+            hasta: document.getElementById('rellenar-hasta').value,
+            sobrescribir: document.getElementById('rellenar-sobrescribir').checked
+          })
+        });
+        const data = await resp.json();
+        if (!data.success) {
+          throw new Error(data.error || 'Error desconocido');
+        }
+        window.location.reload();
+      } catch (e) {
+        alert('Error al rellenar: ' + e.message);
+        btnRellenar.disabled = false;
+      }
+    });
+  }
+
+  // Botón guardar
+  const btn = document.getElementById('btn-guardar');
+  if (!btn) return;
+
+  let enviando = false;
+
+  async function guardar() {
+    if (enviando) return;
+    enviando = true;
+    const textoOriginal = btn.innerHTML;
+    btn.innerHTML = '<span class="spinner-border spinner-border-sm me-2" role="status"></span>Guardando...';
+    btn.disabled = true;
+
+    try {
+      // Solo viajan las celdas editadas, en lotes con clave de idempotencia
+      const resultado = await ColaGuardado.enviar(config.urlGuardar, getCookie('csrftoken'));
+      await actualizarContador();
+      aplicarRespuesta(resultado);
+      if (resultado.rechazados.length) {
+        const motivos = new Set(resultado.rechazados.map(function (r) { return r.motivo; }));
+        alert(`${resultado.rechazados.length} celdas no se guardaron:\n`
+          + Array.from(motivos).join('\n') + '\nQuedaron resaltadas con su valor actual.');
+      }
+      if (resultado.descartadas.length) {
+        alert(`${resultado.descartadas.length} celdas no se guardaron:\n`
+          + resultado.errores.join('\n') + '\nQuedaron resaltadas; recargá la página para ver su valor actual.');
+      }
+      if (resultado.conflictos.length) {
+        alert(`${resultado.conflictos.length} celdas no se guardaron porque otra persona las cambió mientras `
+          + 'editabas. Quedaron resaltadas con su valor actual.');
+      }
+      btn.innerHTML = '<i class="bi bi-check-circle-fill me-2"></i>Guardado';
+      btn.classList.replace('btn-primary', 'btn-success');
+      setTimeout(function () {
+        btn.innerHTML = textoOriginal;
+        btn.classList.replace('btn-success', 'btn-primary');
+        btn.disabled = false;
+      }, 2200);
+    } catch (e) {
+      await actualizarContador();
+      alert('Error al guardar: ' + e.message);
+      btn.innerHTML = textoOriginal;
+      btn.disabled = false;
+    } finally {
+      enviando = false;
+    }
+  }
+
+  btn.addEventListener('click', guardar);
+
+  // Al recuperar la conexión se reintenta lo que haya quedado en cola
+  window.addEventListener('online', async function () {
+    if (await ColaGuardado.cantidad()) guardar();
+  });
+});
+
+// ── Obtener cookie CSRF ────────────────────────────────────
+function getCookie(name) {
+  let val = null;
+  if (document.cookie) {
+    document.cookie.split(';').forEach(function (c) {
+      c = c.trim();
+      if (c.startsWith(name + '=')) {
+        val = decodeURIComponent(c.slice(name.length + 1));
+      }
+    });
+  }
+  return val;
+}
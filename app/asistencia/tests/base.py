@@ -0,0 +1,58 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from app.asistencia.models import Empleado, EstadoAsistencia, PeriodoEmpleo, RegistroAsistencia
+from app.asistencia.servicios import registrar_cambios
+
+# Inicio de los períodos de empleo de la plantilla de prueba
+INICIO_PLANTILLA = date(2024, 1, 1)
+
+
+# Las pruebas no tocan la caché en archivos del proyecto
+CACHE_PRUEBAS = {'default': {'BACKEND': 'app.asistencia.metricas.CacheLocalConMetricas'}}
+
+# Ni dependen de un collectstatic previo (el manifiesto de producción)
+ESTATICOS_SIN_MANIFIESTO = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+@override_settings(CACHES=CACHE_PRUEBAS, STORAGES=ESTATICOS_SIN_MANIFIESTO)
+class AsistenciaTestCase(TestCase):
+    """
+    Plantilla propia de tres empleados, vigentes desde INICIO_PLANTILLA, en
+    lugar de los sembrados por migración (que ingresan el día en que se
+    migra), y un superusuario con sesión iniciada.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Empleado.objects.all().delete()
+        cls.usuario = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'clave')
+        cls.presente = EstadoAsistencia.objects.get(codigo='P')
+        cls.ausente = EstadoAsistencia.objects.get(codigo='A')
+        cls.empleados = [
+            crear_empleado(nombre, apellido)
+            for nombre, apellido in [('Ana', 'Alvarez'), ('Bruno', 'Benitez'), ('Carla', 'Castro')]
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+
+
+def crear_empleado(nombre, apellido, desde=INICIO_PLANTILLA, hasta=None):
+    empleado = Empleado.objects.create(nombre=nombre, apellido=apellido, activo=hasta is None)
+    PeriodoEmpleo.objects.create(empleado=empleado, desde=desde, hasta=hasta)
+    return empleado
+
+
+def marcar(empleado, fecha, estado):
+    """Carga un registro como lo hacen las vistas: también en las filas mensuales."""
+    registro = RegistroAsistencia.objects.create(empleado=empleado, fecha=fecha, estado=estado)
+    registrar_cambios([(empleado.id, fecha)])
+    return registro
@@ -0,0 +1,76 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from app.asistencia.admin import ConteoEstimadoPaginator
+from app.asistencia.models import RegistroAsistencia
+
+from .base import AsistenciaTestCase
+
+URL_REGISTROS = '/admin/asistencia/registroasistencia/'
+
+
+class ListadoRegistrosTests(AsistenciaTestCase):
+    def setUp(self):
+        super().setUp()
+        RegistroAsistencia.objects.bulk_create([
+            RegistroAsistencia(empleado=emp, fecha=date(2025, 3, 3) + timedelta(days=i), estado=self.presente)
+            for emp in self.empleados
+            for i in range(10)
+        ])
+
+    def test_conteo_exacto_bajo_el_tope(self):
+        # Filas borradas no dejan páginas vacías al final
+        RegistroAsistencia.objects.filter(empleado=self.empleados[0]).delete()
+        respuesta = self.client.get(URL_REGISTROS)
+        self.assertEqual(respuesta.context['cl'].result_count, 20)
+        self.assertFalse(respuesta.context['cl'].paginator.truncado)
+
+    def test_conteo_truncado_se_indica(self):
+        with mock.patch.object(ConteoEstimadoPaginator, 'tope_conteo', 25):
+            respuesta = self.client.get(URL_REGISTROS)
+        self.assertEqual(respuesta.context['cl'].result_count, 25)
+        self.assertContains(respuesta, '25+')
+
+    def test_filtro_por_empleado(self):
+        empleado = self.empleados[1]
+        respuesta = self.client.get(f'{URL_REGISTROS}?empleado__id__exact={empleado.id}')
+        self.assertEqual(respuesta.context['cl'].result_count, 10)
+        self.assertEqual(self.client.get(f'{URL_REGISTROS}?empleado__id__exact=abc').status_code, 302)
+
+    def test_reasignar_estado(self):
+        ids = list(RegistroAsistencia.objects.values_list('pk', flat=True))
+        respuesta = self.client.post(URL_REGISTROS, {
+            'action': 'reasignar_estado', '_selected_action': ids, 'aplicar': '1',
+            'estado': self.ausente.pk, 'fecha_desde': '2025-03-03', 'fecha_hasta': '2025-03-04',
+        })
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertEqual(RegistroAsistencia.objects.filter(estado=self.ausente).count(), 6)
+
+
+class PeriodosEmpleoAdminTests(AsistenciaTestCase):
+    def guardar(self, tramos):
+        empleado = self.empleados[0]
+        periodo = empleado.periodos.get()
+        datos = {
+            'nombre': empleado.nombre, 'apellido': empleado.apellido,
+            'periodos-TOTAL_FORMS': len(tramos), 'periodos-INITIAL_FORMS': 1,
+            'periodos-MIN_NUM_FORMS': 0, 'periodos-MAX_NUM_FORMS': 1000,
+        }
+        for i, (desde, hasta) in enumerate(tramos):
+            datos.update({
+                f'periodos-{i}-id': periodo.pk if i == 0 else '',
+                f'periodos-{i}-empleado': empleado.pk,
+                f'periodos-{i}-desde': desde,
+                f'periodos-{i}-hasta': hasta,
+            })
+        return self.client.post(f'/admin/asistencia/empleado/{empleado.pk}/change/', datos)
+
+    def test_periodos_superpuestos(self):
+        respuesta = self.guardar([('2024-01-01', '2024-06-30'), ('2024-06-01', '')])
+        self.assertContains(respuesta, 'no pueden superponerse')
+        self.assertEqual(self.empleados[0].periodos.count(), 1)
+
+    def test_periodos_consecutivos(self):
+        respuesta = self.guardar([('2024-01-01', '2024-06-30'), ('2024-07-01', '')])
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertEqual(self.empleados[0].periodos.count(), 2)
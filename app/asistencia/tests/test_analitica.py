@@ -0,0 +1,37 @@
+from datetime import date
+
+from app.asistencia.analitica import indicadores_ausentismo
+from app.asistencia.models import EstadoAsistencia
+
+from .base import AsistenciaTestCase, marcar
+
+
+class IndicadoresAusentismoTests(AsistenciaTestCase):
+    def setUp(self):
+        super().setUp()
+        estados = {e.codigo: e for e in EstadoAsistencia.objects.all()}
+        self.ana = self.empleados[0]
+        # Ausencias lun 3, vie 7, lun 10 y mar 11 de marzo (dos episodios) y tres tardanzas
+        for fecha, codigo in [
+            (date(2025, 3, 3), 'A'), (date(2025, 3, 7), 'AS'), (date(2025, 3, 10), 'A'),
+            (date(2025, 3, 11), 'AA'), (date(2025, 3, 4), 'TS'), (date(2025, 3, 5), 'TA'),
+            (date(2025, 3, 6), 'TS'), (date(2025, 3, 12), 'P'),
+        ]:
+            marcar(self.ana, fecha, estados[codigo])
+
+    def test_indicadores(self):
+        resultado = indicadores_ausentismo(date(2025, 1, 1), date(2025, 12, 31))
+        fila = next(f for f in resultado['empleados'] if f['empleado_id'] == self.ana.id)
+        self.assertEqual(fila['dias_ausencia'], 4)
+        self.assertEqual(fila['episodios'], 2)
+        self.assertEqual(fila['bradford'], 2 * 2 * 4)
+        self.assertEqual(fila['racha_ausencia'], 3)
+        self.assertEqual(fila['ausencias_lunes_viernes'], 3)
+        self.assertEqual(fila['tardanzas_ventana'], 3)
+        self.assertIn('Tardanzas reiteradas', fila['alertas'])
+
+    def test_vistas(self):
+        self.assertContains(self.client.get('/estadisticas/ausentismo/?anio=2025'), 'Tardanzas reiteradas')
+        datos = self.client.get('/api/ausentismo/?anio=2025').json()
+        self.assertEqual(datos['empleados'][0]['bradford'], 16)
+        self.assertEqual(self.client.get('/api/ausentismo/?anio=x').status_code, 200)
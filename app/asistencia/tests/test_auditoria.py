@@ -0,0 +1,96 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from app.asistencia import auditoria, views
+from app.asistencia.models import CambioAsistencia, RegistroAsistencia
+from app.asistencia.servicios import registrar_cambios
+
+from .base import AsistenciaTestCase
+
+LUNES = date(2025, 3, 3)
+
+
+class AuditoriaTests(AsistenciaTestCase):
+    def escribir(self, empleado, estado):
+        """Cambia la celda del lunes como lo hacen los servicios."""
+        with self.captureOnCommitCallbacks(execute=True):
+            anteriores = auditoria.capturar([(empleado.id, LUNES)])
+            RegistroAsistencia.objects.update_or_create(
+                empleado=empleado, fecha=LUNES, defaults={'estado': estado},
+            )
+            registrar_cambios([(empleado.id, LUNES)])
+            auditoria.registrar(
+                self.usuario, CambioAsistencia.ORIGEN_GRILLA,
+                anteriores, {(empleado.id, LUNES): estado.id},
+            )
+
+    def test_registra_solo_los_cambios(self):
+        ana = self.empleados[0]
+        self.escribir(ana, self.presente)
+        self.escribir(ana, self.presente)
+        self.escribir(ana, self.ausente)
+        self.assertEqual(
+            list(CambioAsistencia.objects.order_by('id').values_list(
+                'estado_anterior_id', 'estado_nuevo_id', 'usuario_id', 'origen',
+            )),
+            [
+                (None, self.presente.id, self.usuario.id, 'grilla'),
+                (self.presente.id, self.ausente.id, self.usuario.id, 'grilla'),
+            ],
+        )
+
+    def test_rollback_descarta_los_eventos(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    auditoria.registrar(
+                        self.usuario, CambioAsistencia.ORIGEN_GRILLA,
+                        {}, {(self.empleados[0].id, LUNES): self.presente.id},
+                    )
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertFalse(CambioAsistencia.objects.exists())
+
+    def test_un_solo_insert_por_transaccion(self):
+        nuevos = {(emp.id, LUNES): self.presente.id for emp in self.empleados}
+        with self.captureOnCommitCallbacks() as diferidas:
+            self.assertEqual(auditoria.registrar(None, CambioAsistencia.ORIGEN_RELLENO, {}, nuevos), 3)
+        self.assertFalse(CambioAsistencia.objects.exists())
+        self.assertEqual(len(diferidas), 1)
+        with self.assertNumQueries(1):
+            diferidas[0]()
+        self.assertEqual(CambioAsistencia.objects.filter(usuario=None).count(), 3)
+
+
+class VistaAuditoriaTests(AsistenciaTestCase):
+    def setUp(self):
+        super().setUp()
+        CambioAsistencia.objects.bulk_create(
+            CambioAsistencia(
+                empleado=emp, fecha=LUNES, estado_nuevo=self.presente,
+                origen=CambioAsistencia.ORIGEN_GRILLA, usuario=self.usuario,
+            )
+            for emp in self.empleados
+        )
+
+    def test_paginado_por_clave(self):
+        with mock.patch.object(views, 'AUDITORIA_POR_PAGINA', 2):
+            primera = self.client.get('/auditoria/')
+            self.assertEqual(len(primera.context['cambios']), 2)
+            segunda = self.client.get('/auditoria/?' + primera.context['siguiente'])
+        self.assertEqual([c.empleado for c in segunda.context['cambios']], [self.empleados[0]])
+        self.assertIsNone(segunda.context['siguiente'])
+
+    def test_filtros(self):
+        respuesta = self.client.get('/auditoria/', {'empleado': self.empleados[1].id})
+        self.assertEqual([c.empleado for c in respuesta.context['cambios']], [self.empleados[1]])
+        self.assertRedirects(self.client.get('/auditoria/', {'desde': 'ayer'}), '/auditoria/')
+
+    def test_solo_personal(self):
+        comun = get_user_model().objects.create_user('comun', password='clave')
+        self.client.force_login(comun)
+        self.assertRedirects(self.client.get('/auditoria/'), '/')
@@ -0,0 +1,114 @@
+import json
+from datetime import date
+from unittest import mock
+
+from app.asistencia import servicios, views
+from app.asistencia.models import CierreMes, RegistroAsistencia
+
+from .base import AsistenciaTestCase, marcar
+
+URL_REGISTROS = '/admin/asistencia/registroasistencia/'
+
+
+class CierreMesTests(AsistenciaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.registro = marcar(self.empleados[0], date(2025, 3, 3), self.presente)
+
+    def cerrar_marzo(self):
+        return self.client.post('/asistencia/2025/3/cerrar/')
+
+    def test_cierre_congela_la_foto(self):
+        self.assertEqual(self.cerrar_marzo().status_code, 302)
+        cierre = CierreMes.objects.get(anio=2025, mes=3)
+        datos = cierre.datos
+        self.assertEqual(datos['resumen']['total_registros'], 1)
+        # El segundo cierre solo avisa
+        self.assertEqual(self.cerrar_marzo().status_code, 302)
+        self.assertEqual(CierreMes.objects.count(), 1)
+
+    def test_cierre_simultaneo_no_falla(self):
+        cerrar = servicios.cerrar_mes
+
+        def con_competidor(anio, mes, usuario):
+            CierreMes.objects.create(anio=anio, mes=mes, snapshot=b'')
+            return cerrar(anio, mes, usuario)
+
+        with mock.patch.object(views, 'cerrar_mes', con_competidor):
+            self.assertEqual(self.cerrar_marzo().status_code, 302)
+        self.assertEqual(CierreMes.objects.count(), 1)
+
+    def test_mes_cerrado_rechaza_escrituras(self):
+        self.cerrar_marzo()
+        respuesta = self.client.post('/asistencia/guardar/', json.dumps({'registros': [
+            {'empleado_id': self.empleados[1].id, 'fecha': '2025-03-04', 'estado_id': self.presente.id},
+        ]}), content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([r['fecha'] for r in respuesta.json()['rechazados']], ['2025-03-04'])
+        with self.assertRaises(servicios.MesCerradoError):
+            servicios.rellenar_rango(self.presente.id, date(2025, 3, 3), date(2025, 3, 7))
+        self.assertEqual(RegistroAsistencia.objects.count(), 1)
+
+    def test_la_foto_se_arma_con_el_mes_ya_cerrado(self):
+        # Una edición posterior a la foto ya ve el cierre y se rechaza
+        matriz = servicios.matriz_asistencia
+
+        def verificando_cierre(*args):
+            self.assertTrue(CierreMes.objects.filter(anio=2025, mes=3).exists())
+            return matriz(*args)
+
+        with mock.patch.object(servicios, 'matriz_asistencia', verificando_cierre):
+            self.assertEqual(self.cerrar_marzo().status_code, 302)
+        self.assertEqual(len(CierreMes.objects.get().datos['matriz']['empleados']), 3)
+
+    def test_cierre_durante_un_guardado(self):
+        # El mes se cierra después del primer tramo: el segundo ya no se escribe
+        registrar = servicios.registrar_cambios
+
+        def cerrando_marzo(celdas):
+            registrar(celdas)
+            CierreMes.objects.get_or_create(anio=2025, mes=3, defaults={'snapshot': b''})
+
+        with mock.patch.object(servicios, 'CELDAS_POR_TRANSACCION', 1), \
+                mock.patch.object(servicios, 'registrar_cambios', cerrando_marzo):
+            respuesta = self.client.post('/asistencia/guardar/', json.dumps({'registros': [
+                {'empleado_id': emp.id, 'fecha': '2025-03-04', 'estado_id': self.presente.id}
+                for emp in self.empleados[1:]
+            ]}), content_type='application/json')
+        self.assertEqual(len(respuesta.json()['versiones']), 1)
+        self.assertEqual(
+            [(r['empleado_id'], r['motivo']) for r in respuesta.json()['rechazados']],
+            [(self.empleados[2].id, 'Mes cerrado (03/2025).')],
+        )
+        self.assertFalse(RegistroAsistencia.objects.filter(empleado=self.empleados[2]).exists())
+
+    def test_admin_no_edita_meses_cerrados(self):
+        self.cerrar_marzo()
+        url = f'{URL_REGISTROS}{self.registro.pk}/change/'
+        datos = {
+            'empleado': self.registro.empleado_id, 'fecha': '2025-03-03',
+            'estado': self.ausente.pk, 'observaciones': '',
+        }
+        respuesta = self.client.post(url, datos)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, 'meses cerrados')
+        # Tampoco sacarlo del mes cerrado
+        respuesta = self.client.post(url, {**datos, 'fecha': '2025-04-01'})
+        self.assertContains(respuesta, 'meses cerrados')
+        self.registro.refresh_from_db()
+        self.assertEqual((self.registro.fecha, self.registro.estado), (date(2025, 3, 3), self.presente))
+
+    def test_admin_no_borra_meses_cerrados(self):
+        self.cerrar_marzo()
+        self.client.post(f'{URL_REGISTROS}{self.registro.pk}/delete/', {'post': 'yes'})
+        self.client.post(URL_REGISTROS, {
+            'action': 'delete_selected', '_selected_action': [self.registro.pk], 'post': 'yes',
+        })
+        self.assertTrue(RegistroAsistencia.objects.filter(pk=self.registro.pk).exists())
+
+    def test_reabrir(self):
+        self.cerrar_marzo()
+        self.client.post('/asistencia/2025/3/reabrir/')
+        self.assertFalse(CierreMes.objects.exists())
+        self.client.post(f'{URL_REGISTROS}{self.registro.pk}/delete/', {'post': 'yes'})
+        self.assertFalse(RegistroAsistencia.objects.exists())
@@ -0,0 +1,71 @@
+from datetime import date
+from unittest import mock
+
+from app.asistencia import repositorio, servicios
+
+from .base import AsistenciaTestCase, crear_empleado, marcar
+
+
+class ResumenTests(AsistenciaTestCase):
+    def test_resumen_de_un_rango_que_cruza_meses(self):
+        ana = self.empleados[0]
+        marcar(ana, date(2025, 1, 31), self.presente)
+        marcar(ana, date(2025, 2, 3), self.ausente)
+        # Ingresa a mitad del rango: solo cuentan sus días hábiles de empleo
+        nuevo = crear_empleado('Diego', 'Diaz', desde=date(2025, 2, 3))
+
+        resumen = servicios.resumen_periodo(date(2025, 1, 27), date(2025, 2, 7))
+        self.assertEqual(resumen['total_dias_habiles'], 10)
+        self.assertEqual(resumen['total_empleados'], 4)
+        self.assertEqual(resumen['total_posibles'], 3 * 10 + 5)
+        self.assertEqual([m['mes'] for m in resumen['meses']], ['2025-01-01', '2025-02-01'])
+        self.assertEqual([m['posibles'] for m in resumen['meses']], [15, 20])
+        filas = {f['empleado_id']: f for f in resumen['empleados']}
+        self.assertEqual((filas[ana.id]['total_marcados'], filas[ana.id]['cobertura']), (2, 20.0))
+        self.assertEqual(filas[nuevo.id]['dias_posibles'], 5)
+
+    def test_lee_los_conteos_mes_a_mes(self):
+        with mock.patch.object(repositorio, '_contar', wraps=repositorio._contar) as contar:
+            servicios.resumen_periodo(date(2023, 1, 1), date(2025, 12, 31))
+        self.assertEqual(contar.call_count, 36)
+
+    def test_resumen_anual_en_cache_hasta_que_cambia_un_registro(self):
+        hoy = date(2025, 6, 30)
+        self.assertEqual(servicios.resumen_anual(2025, hoy)['total_registros'], 0)
+        with mock.patch.object(servicios, 'resumen_periodo') as calcular:
+            servicios.resumen_anual(2025, hoy)
+        calcular.assert_not_called()
+        with self.captureOnCommitCallbacks(execute=True):
+            marcar(self.empleados[0], date(2025, 3, 3), self.presente)
+        self.assertEqual(servicios.resumen_anual(2025, hoy)['total_registros'], 1)
+        # El año en curso se recalcula al cambiar el día
+        self.assertEqual(servicios.resumen_anual(2025, date(2025, 7, 1))['total_dias_habiles'], 130)
+
+
+class VistasEstadisticasTests(AsistenciaTestCase):
+    def test_rango_de_varios_anios(self):
+        marcar(self.empleados[0], date(2024, 12, 2), self.presente)
+        respuesta = self.client.get('/estadisticas/', {
+            'periodo': 'rango', 'desde': '2024-11-01', 'hasta': '2025-02-28',
+        })
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(
+            respuesta.context['tendencia_data']['etiquetas'], ['Nov 24', 'Dic 24', 'Ene 25', 'Feb 25'],
+        )
+        self.assertEqual(respuesta.context['total_registros'], 1)
+
+    def test_rango_invalido(self):
+        for desde, hasta in (('2025-03-01', '2025-01-01'), ('2010-01-01', '2024-12-31'), ('2024-01-01', '2999-01-01')):
+            respuesta = self.client.get('/estadisticas/', {'periodo': 'rango', 'desde': desde, 'hasta': hasta})
+            self.assertRedirects(respuesta, '/estadisticas/', fetch_redirect_response=False)
+
+    def test_interanual(self):
+        marcar(self.empleados[0], date(2024, 3, 4), self.presente)
+        for dia in (3, 4):
+            marcar(self.empleados[0], date(2025, 3, dia), self.presente)
+        respuesta = self.client.get('/estadisticas/interanual/', {'desde': 2024, 'hasta': 2025})
+        anios = respuesta.context['anios']
+        self.assertEqual([a['anio'] for a in anios], [2024, 2025])
+        self.assertEqual([a['total_registros'] for a in anios], [1, 2])
+        self.assertIsNone(anios[0]['variacion'])
+        self.assertIsNotNone(anios[1]['variacion'])
@@ -0,0 +1,35 @@
+import io
+import os
+import re
+import tempfile
+
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.test import override_settings
+
+from .base import ESTATICOS_SIN_MANIFIESTO, AsistenciaTestCase
+
+ESTATICOS_PRODUCCION = {
+    **ESTATICOS_SIN_MANIFIESTO,
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+
+
+class EstaticosPropiosTests(AsistenciaTestCase):
+    def test_paginas_sin_cdn(self):
+        for url in ['/asistencia/2025/3/', '/estadisticas/?periodo=anual&anio=2025', '/']:
+            html = self.client.get(url).content.decode()
+            self.assertNotIn('cdn.jsdelivr', html)
+            for ruta in re.findall(r'(?:src|href)="/static/([^"?]+)"', html):
+                self.assertIsNotNone(finders.find(ruta), ruta)
+
+    def test_grilla_sin_estilos_en_linea(self):
+        self.assertNotContains(self.client.get('/asistencia/2025/3/'), '<style>')
+
+    def test_collectstatic_genera_nombres_con_hash_y_comprimidos(self):
+        with tempfile.TemporaryDirectory() as destino, \
+                override_settings(STATIC_ROOT=destino, STORAGES=ESTATICOS_PRODUCCION):
+            call_command('collectstatic', '--noinput', stdout=io.StringIO())
+            archivos = os.listdir(os.path.join(destino, 'asistencia', 'js'))
+        self.assertTrue(any(re.fullmatch(r'grilla\.[0-9a-f]{12}\.js', a) for a in archivos))
+        self.assertTrue(any(re.fullmatch(r'grilla\.[0-9a-f]{12}\.js\.(br|gz)', a) for a in archivos))
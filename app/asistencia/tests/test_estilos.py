@@ -0,0 +1,45 @@
+import re
+from datetime import date
+
+from app.asistencia.models import EstadoAsistencia
+from app.asistencia.servicios import version_estados
+
+from .base import AsistenciaTestCase, marcar
+
+URL = '/estados/estilos.css'
+
+
+class EstilosEstadosTests(AsistenciaTestCase):
+    def test_una_clase_por_estado(self):
+        css = self.client.get(URL).content.decode()
+        for estado in EstadoAsistencia.objects.all():
+            self.assertIn(
+                f'.estado-{estado.id},.estado-{estado.id} .asistencia-select'
+                f'{{background-color:{estado.color_fondo};color:{estado.color_texto}}}',
+                css,
+            )
+
+    def test_colores_invalidos_no_se_inyectan(self):
+        EstadoAsistencia.objects.filter(pk=self.presente.pk).update(color_fondo='red}body{display:none')
+        EstadoAsistencia.objects.get(pk=self.presente.pk).save()
+        css = self.client.get(URL).content.decode()
+        self.assertIn(f'.estado-{self.presente.id} .asistencia-select{{background-color:#FFFFFF;', css)
+        self.assertNotIn('display:none', css)
+
+    def test_cache_del_navegador_segun_version(self):
+        version = version_estados()
+        self.assertIn('immutable', self.client.get(URL, {'v': version})['Cache-Control'])
+        self.assertEqual(self.client.get(URL, {'v': 'vieja'})['Cache-Control'], 'private, no-cache')
+        self.presente.descripcion = 'Presente en término'
+        self.presente.save()
+        self.assertNotEqual(version_estados(), version)
+
+    def test_la_grilla_usa_clases_y_no_estilos(self):
+        marcar(self.empleados[0], date(2025, 3, 3), self.presente)
+        respuesta = self.client.get('/asistencia/2025/3/')
+        self.assertContains(respuesta, f'?v={version_estados()}')
+        self.assertContains(respuesta, f'estado-{self.presente.id}"')
+        # Solo la leyenda lleva colores en línea, las celdas no
+        celdas = re.findall(r'<td class="celda-asistencia[^>]*>', respuesta.content.decode())
+        self.assertEqual(len(celdas), 3 * 21)
+        self.assertFalse(any('style=' in td for td in celdas))
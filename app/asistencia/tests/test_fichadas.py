@@ -0,0 +1,140 @@
+import json
+from datetime import date
+from unittest import mock
+
+from django.db.models import F
+from django.test import override_settings
+
+from app.asistencia import fichadas, servicios
+from app.asistencia.models import (
+    AvisoAsistencia,
+    CambioAsistencia,
+    CierreMes,
+    EstadoAsistencia,
+    Fichada,
+    RegistroAsistencia,
+)
+
+from .base import AsistenciaTestCase, marcar
+
+LUNES = date(2025, 3, 3)
+
+
+@override_settings(FICHADAS_HORA_ENTRADA='08:00', FICHADAS_TOLERANCIA_MINUTOS=10)
+class FichadasTests(AsistenciaTestCase):
+    def evento(self, empleado, hora, tipo='E', dia=LUNES):
+        return {'empleado_id': empleado.id, 'momento': f'{dia.isoformat()}T{hora}', 'tipo': tipo}
+
+    def estado(self, empleado, dia=LUNES):
+        return RegistroAsistencia.objects.filter(empleado=empleado, fecha=dia).values_list(
+            'estado__codigo', flat=True,
+        ).first()
+
+    def test_deriva_el_estado_de_la_primera_entrada(self):
+        ana, bruno, carla = self.empleados
+        AvisoAsistencia.objects.create(empleado=carla, fecha=LUNES)
+        with self.captureOnCommitCallbacks(execute=True):
+            resultado = fichadas.ingerir([
+                # La salida temprana no cuenta si hay entradas
+                self.evento(ana, '07:00', tipo='S'),
+                self.evento(ana, '08:10'),
+                self.evento(bruno, '08:11'),
+                self.evento(carla, '09:30'),
+            ])
+        self.assertEqual(resultado, {'recibidas': 4, 'rechazadas': 0, 'celdas': 3})
+        self.assertEqual([self.estado(e) for e in self.empleados], ['P', 'TS', 'TA'])
+        self.assertEqual(
+            CambioAsistencia.objects.filter(origen=CambioAsistencia.ORIGEN_RELOJ).count(), 3,
+        )
+
+    def test_repetidas_e_invalidas(self):
+        ana = self.empleados[0]
+        fichadas.ingerir([self.evento(ana, '08:00')])
+        resultado = fichadas.ingerir([
+            self.evento(ana, '08:00'),
+            {'empleado_id': 999999, 'momento': '2025-03-03T08:00'},
+            {'empleado_id': ana.id, 'momento': 'ayer'},
+            {'empleado_id': ana.id, 'momento': '2025-03-03T08:00', 'tipo': 'X'},
+        ])
+        self.assertEqual((resultado['recibidas'], resultado['rechazadas'], resultado['celdas']), (1, 3, 0))
+        self.assertEqual(Fichada.objects.count(), 1)
+
+    def test_no_pisa_estados_cargados_a_mano(self):
+        ana, bruno, _ = self.empleados
+        licencia = EstadoAsistencia.objects.exclude(codigo__in=fichadas.CODIGOS_DERIVADOS + ('A',)).first()
+        marcar(ana, LUNES, licencia)
+        marcar(bruno, LUNES, EstadoAsistencia.objects.get(codigo='TS'))
+        fichadas.ingerir([self.evento(ana, '07:55'), self.evento(bruno, '07:55')])
+        self.assertEqual(self.estado(ana), licencia.codigo)
+        self.assertEqual(self.estado(bruno), 'P')
+
+    def test_omite_meses_cerrados(self):
+        CierreMes.objects.create(anio=2025, mes=3, snapshot=b'')
+        resultado = fichadas.ingerir([self.evento(self.empleados[0], '07:55')])
+        self.assertEqual((resultado['recibidas'], resultado['celdas']), (1, 0))
+        self.assertFalse(RegistroAsistencia.objects.exists())
+
+    def test_omite_dias_posteriores_a_la_baja(self):
+        ana = self.empleados[0]
+        servicios.cerrar_periodo(ana, date(2025, 2, 28))
+        resultado = fichadas.ingerir([self.evento(ana, '07:55')])
+        self.assertEqual((resultado['recibidas'], resultado['celdas']), (1, 0))
+        self.assertEqual(Fichada.objects.filter(empleado=ana).count(), 1)
+        self.assertFalse(RegistroAsistencia.objects.exists())
+
+    def test_aviso_posterior_rederiva(self):
+        carla = self.empleados[2]
+        fichadas.ingerir([self.evento(carla, '09:30')])
+        AvisoAsistencia.objects.create(empleado=carla, fecha=LUNES)
+        self.assertEqual(fichadas.derivar([(carla.id, LUNES)]), 1)
+        self.assertEqual(self.estado(carla), 'TA')
+
+    def test_la_version_crece_en_la_base(self):
+        ana = self.empleados[0]
+        registro = marcar(ana, LUNES, EstadoAsistencia.objects.get(codigo='TS'))
+        RegistroAsistencia.objects.filter(pk=registro.pk).update(version=5)
+        fichadas.ingerir([self.evento(ana, '07:55')])
+        registro.refresh_from_db()
+        self.assertEqual((registro.estado.codigo, registro.version), ('P', 6))
+
+    def escritura_concurrente(self, empleado, estado):
+        """Simula una edición de la grilla entre la lectura y el upsert."""
+        escribir = fichadas._escribir
+
+        def con_competidor(celdas, derivables):
+            RegistroAsistencia.objects.filter(empleado=empleado, fecha=LUNES).update(
+                estado=estado, version=F('version') + 1,
+            )
+            return escribir(celdas, derivables)
+        return mock.patch.object(fichadas, '_escribir', con_competidor)
+
+    def test_edicion_concurrente_no_pierde_la_version(self):
+        ana = self.empleados[0]
+        marcar(ana, LUNES, EstadoAsistencia.objects.get(codigo='TS'))
+        with self.escritura_concurrente(ana, EstadoAsistencia.objects.get(codigo='TA')):
+            self.assertEqual(fichadas.ingerir([self.evento(ana, '07:55')])['celdas'], 1)
+        # La grilla dejó la versión 2; la derivación, la 3
+        self.assertEqual(
+            RegistroAsistencia.objects.values_list('estado__codigo', 'version').get(), ('P', 3),
+        )
+
+    def test_estado_manual_concurrente_no_se_pisa(self):
+        ana = self.empleados[0]
+        marcar(ana, LUNES, EstadoAsistencia.objects.get(codigo='TS'))
+        with self.escritura_concurrente(ana, self.ausente), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(fichadas.ingerir([self.evento(ana, '07:55')])['celdas'], 0)
+        self.assertEqual(
+            RegistroAsistencia.objects.values_list('estado__codigo', 'version').get(), ('A', 2),
+        )
+        self.assertFalse(CambioAsistencia.objects.filter(origen=CambioAsistencia.ORIGEN_RELOJ).exists())
+
+    @override_settings(FICHADAS_TOKEN='reloj')
+    def test_api(self):
+        cuerpo = json.dumps({'eventos': [self.evento(self.empleados[0], '07:55')]})
+        self.client.logout()
+        respuesta = self.client.post('/api/fichadas/', cuerpo, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 403)
+        respuesta = self.client.post(
+            '/api/fichadas/', cuerpo, content_type='application/json', HTTP_AUTHORIZATION='Bearer reloj',
+        )
+        self.assertEqual(respuesta.json(), {'success': True, 'recibidas': 1, 'rechazadas': 0, 'celdas': 1})
@@ -0,0 +1,48 @@
+import gzip
+import re
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+
+from app.asistencia import middleware
+
+from .base import AsistenciaTestCase, marcar
+
+
+class GrillaTests(AsistenciaTestCase):
+    def test_opciones_con_el_estado_de_cada_celda(self):
+        ana = self.empleados[0]
+        marcar(ana, date(2025, 3, 3), self.presente)
+        html = self.client.get('/asistencia/2025/3/').content.decode()
+        selects = re.findall(r'<select[^>]*data-empleado-id="(\d+)"[^>]*data-fecha="([\d-]+)"[^>]*>(.*?)</select>', html, re.S)
+        self.assertEqual(len(selects), 3 * 21)
+        for emp_id, fecha, opciones in selects:
+            seleccionadas = re.findall(r'<option value="(\d*)" selected>', opciones)
+            if (int(emp_id), fecha) == (ana.id, '2025-03-03'):
+                self.assertEqual(seleccionadas, [str(self.presente.id)])
+            else:
+                self.assertEqual(seleccionadas, [])
+
+    def test_lecturas_de_cache_no_dependen_de_las_celdas(self):
+        with mock.patch.object(cache, 'get', wraps=cache.get) as lecturas:
+            self.client.get('/asistencia/2025/3/?semana=0')
+        por_semana = lecturas.call_count
+        with mock.patch.object(cache, 'get', wraps=cache.get) as lecturas:
+            self.client.get('/asistencia/2025/3/')
+        self.assertEqual(lecturas.call_count, por_semana)
+
+    def test_respuesta_comprimida(self):
+        with mock.patch.object(middleware, 'brotli', None):
+            respuesta = self.client.get('/asistencia/2025/3/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(respuesta['Content-Encoding'], 'gzip')
+        self.assertIn(b'asistencia-select', gzip.decompress(respuesta.content))
+        if middleware.brotli is not None:
+            respuesta = self.client.get('/estados/estilos.css', HTTP_ACCEPT_ENCODING='br, gzip')
+            self.assertEqual(respuesta['Content-Encoding'], 'br')
+
+    def test_paginas_con_token_csrf_sin_brotli(self):
+        # gzip agrega relleno aleatorio contra BREACH; brotli no
+        respuesta = self.client.get('/asistencia/2025/3/', HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(respuesta['Content-Encoding'], 'gzip')
+        self.assertIn(b'csrfmiddlewaretoken', gzip.decompress(respuesta.content))
@@ -0,0 +1,115 @@
+import json
+from datetime import date
+
+from app.asistencia.models import CambioAsistencia, CierreMes, LoteGuardado, RegistroAsistencia
+
+from .base import AsistenciaTestCase, crear_empleado, marcar
+
+LUNES = date(2025, 3, 3)
+
+
+class GuardadoGrillaTests(AsistenciaTestCase):
+    def guardar(self, registros, clave=None):
+        # La auditoría se escribe al confirmar la transacción
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/asistencia/guardar/', json.dumps({
+                'clave': clave, 'registros': registros,
+            }), content_type='application/json')
+
+    def celda(self, empleado, fecha, estado, version=0):
+        return {
+            'empleado_id': empleado.id, 'fecha': fecha.isoformat(),
+            'estado_id': estado.id if estado else None, 'version': version,
+        }
+
+    def test_aplica_y_devuelve_versiones(self):
+        respuesta = self.guardar([self.celda(self.empleados[0], LUNES, self.presente)]).json()
+        self.assertEqual(respuesta['versiones'], [
+            {'empleado_id': self.empleados[0].id, 'fecha': '2025-03-03', 'version': 1},
+        ])
+        self.assertEqual(respuesta['conflictos'], [])
+        self.assertEqual(respuesta['rechazados'], [])
+        self.assertEqual(CambioAsistencia.objects.count(), 1)
+
+    def test_lote_repetido_no_reescribe(self):
+        celdas = [self.celda(self.empleados[0], LUNES, self.presente)]
+        self.guardar(celdas, clave='lote-1')
+        respuesta = self.guardar(celdas, clave='lote-1').json()
+        self.assertTrue(respuesta['duplicado'])
+        self.assertEqual(respuesta['versiones'][0]['version'], 1)
+        self.assertEqual(LoteGuardado.objects.filter(clave='lote-1').count(), 1)
+        self.assertEqual(CambioAsistencia.objects.count(), 1)
+
+    def test_version_vieja_es_conflicto(self):
+        registro = marcar(self.empleados[0], LUNES, self.presente)
+        # Otra persona la cambió después de que la grilla cargó la versión 1
+        RegistroAsistencia.objects.filter(pk=registro.pk).update(estado=self.ausente, version=2)
+        respuesta = self.guardar([
+            self.celda(self.empleados[0], LUNES, None, version=1),
+            self.celda(self.empleados[1], LUNES, self.presente),
+        ]).json()
+        self.assertEqual(respuesta['conflictos'], [{
+            'empleado_id': self.empleados[0].id, 'fecha': '2025-03-03',
+            'estado_id': self.ausente.id, 'version': 2,
+        }])
+        self.assertEqual(len(respuesta['versiones']), 1)
+        self.assertTrue(RegistroAsistencia.objects.filter(pk=registro.pk, estado=self.ausente).exists())
+
+    def test_lote_repetido_devuelve_sus_conflictos(self):
+        # Si se perdió la respuesta al primer intento, el reintento no da
+        # por guardada la celda que chocó con otra edición
+        registro = marcar(self.empleados[0], LUNES, self.presente)
+        RegistroAsistencia.objects.filter(pk=registro.pk).update(estado=self.ausente, version=2)
+        celdas = [
+            self.celda(self.empleados[0], LUNES, None, version=1),
+            self.celda(self.empleados[1], LUNES, self.presente),
+        ]
+        primera = self.guardar(celdas, clave='lote-1').json()
+        reintento = self.guardar(celdas, clave='lote-1').json()
+        self.assertTrue(reintento['duplicado'])
+        self.assertEqual(reintento['conflictos'], primera['conflictos'])
+        self.assertEqual(reintento['versiones'], primera['versiones'])
+        self.assertEqual(len(reintento['conflictos']), 1)
+
+    def test_mes_cerrado_rechaza_solo_sus_celdas(self):
+        marcar(self.empleados[0], date(2025, 2, 28), self.ausente)
+        CierreMes.objects.create(anio=2025, mes=2, snapshot=b'')
+        respuesta = self.guardar([
+            self.celda(self.empleados[0], date(2025, 2, 28), self.presente, version=1),
+            self.celda(self.empleados[1], LUNES, self.presente),
+        ]).json()
+        self.assertEqual(respuesta['rechazados'], [{
+            'empleado_id': self.empleados[0].id, 'fecha': '2025-02-28',
+            'estado_id': self.ausente.id, 'version': 1, 'motivo': 'Mes cerrado (02/2025).',
+        }])
+        # El resto del lote se aplicó
+        self.assertEqual(respuesta['versiones'][0]['empleado_id'], self.empleados[1].id)
+        self.assertEqual(
+            dict(RegistroAsistencia.objects.values_list('fecha', 'estado')),
+            {date(2025, 2, 28): self.ausente.id, LUNES: self.presente.id},
+        )
+
+    def test_fuera_del_periodo_de_empleo(self):
+        nuevo = crear_empleado('Diego', 'Diaz', desde=date(2025, 3, 4))
+        respuesta = self.guardar([
+            self.celda(nuevo, LUNES, self.presente),
+            self.celda(nuevo, date(2025, 3, 4), self.presente),
+        ]).json()
+        self.assertEqual(respuesta['rechazados'], [{
+            'empleado_id': nuevo.id, 'fecha': '2025-03-03',
+            'estado_id': None, 'version': 0, 'motivo': 'Fuera del período de empleo.',
+        }])
+        self.assertEqual(list(RegistroAsistencia.objects.values_list('fecha', flat=True)), [date(2025, 3, 4)])
+
+    def test_vaciar_fuera_del_periodo(self):
+        # Un registro que quedó afuera al acortar el período se puede borrar
+        nuevo = crear_empleado('Diego', 'Diaz', desde=date(2025, 3, 4))
+        marcar(nuevo, LUNES, self.presente)
+        respuesta = self.guardar([self.celda(nuevo, LUNES, None, version=1)]).json()
+        self.assertEqual(respuesta['rechazados'], [])
+        self.assertFalse(RegistroAsistencia.objects.exists())
+
+    def test_lote_invalido(self):
+        respuesta = self.guardar([self.celda(self.empleados[0], LUNES, self.presente, version=-1)])
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertFalse(RegistroAsistencia.objects.exists())
@@ -0,0 +1,47 @@
+import json
+import tempfile
+from datetime import date
+
+from app.asistencia import servicios
+from app.asistencia.metricas import CacheArchivosConMetricas
+
+from .base import AsistenciaTestCase, marcar
+
+
+class HistorialEmpleadoTests(AsistenciaTestCase):
+    def test_historial_por_anio(self):
+        ana = self.empleados[0]
+        marcar(ana, date(2024, 5, 6), self.ausente)
+        marcar(ana, date(2025, 3, 3), self.presente)
+        historial = servicios.historial_empleado(ana.id, 2024, 2025)
+        self.assertEqual(historial, {
+            2024: [(date(2024, 5, 6).toordinal(), self.ausente.id)],
+            2025: [(date(2025, 3, 3).toordinal(), self.presente.id)],
+        })
+        respuesta = self.client.get(f'/empleados/{ana.id}/historial/?desde=2024&hasta=2025')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([a['registros'] for a in respuesta.context['anios']], [1, 1])
+
+    def test_guardar_invalida_el_historial(self):
+        ana = self.empleados[0]
+        self.assertEqual(servicios.historial_empleado(ana.id, 2025, 2025), {2025: []})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/asistencia/guardar/', json.dumps({'registros': [
+                {'empleado_id': ana.id, 'fecha': '2025-03-03', 'estado_id': self.presente.id},
+            ]}), content_type='application/json')
+        self.assertEqual(
+            servicios.historial_empleado(ana.id, 2025, 2025),
+            {2025: [(date(2025, 3, 3).toordinal(), self.presente.id)]},
+        )
+
+
+class CacheCompartidaTests(AsistenciaTestCase):
+    def test_el_borrado_llega_a_otro_proceso(self):
+        # Dos instancias sobre el mismo directorio hacen de dos workers
+        with tempfile.TemporaryDirectory() as directorio:
+            uno = CacheArchivosConMetricas(directorio, {})
+            otro = CacheArchivosConMetricas(directorio, {})
+            uno.set('asistencia:historial:1:2025', [1])
+            self.assertEqual(otro.get('asistencia:historial:1:2025'), [1])
+            otro.delete('asistencia:historial:1:2025')
+            self.assertIsNone(uno.get('asistencia:historial:1:2025'))
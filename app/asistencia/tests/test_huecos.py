@@ -0,0 +1,57 @@
+import io
+from datetime import date, timedelta
+
+from django.core.management import call_command
+
+from app.asistencia import servicios
+from app.asistencia.models import HuecoAsistencia, IndiceHuecos
+
+from .base import INICIO_PLANTILLA, AsistenciaTestCase, marcar
+
+
+class IndiceHuecosTests(AsistenciaTestCase):
+    def esperados(self, hasta):
+        """Anti-join de referencia: días hábiles de empleo sin registro."""
+        tramos = servicios.periodos_empleo(INICIO_PLANTILLA, hasta)
+        marcadas = {(r.empleado_id, r.fecha) for r in self.registros}
+        return {
+            (emp_id, dia)
+            for emp_id, del_empleado in tramos.items()
+            for dia in servicios.dias_habiles(INICIO_PLANTILLA, hasta)
+            if servicios.en_periodo(del_empleado, dia) and (emp_id, dia) not in marcadas
+        }
+
+    def actuales(self):
+        return set(HuecoAsistencia.objects.values_list('empleado_id', 'fecha'))
+
+    def setUp(self):
+        super().setUp()
+        self.registros = [marcar(self.empleados[0], date(2024, 1, 2), self.presente)]
+
+    def test_el_comando_extiende_el_indice(self):
+        hasta = date(2024, 2, 29)
+        servicios.huecos_al_dia(hasta - timedelta(days=10))
+        servicios.huecos_al_dia(hasta)
+        self.assertEqual(self.actuales(), self.esperados(hasta))
+        call_command('actualizar_huecos', stdout=io.StringIO())
+        self.assertEqual(IndiceHuecos.objects.get().hasta, date.today())
+
+    def test_escrituras_mantienen_el_indice(self):
+        hasta = date(2024, 3, 31)
+        servicios.huecos_al_dia(hasta)
+        self.registros.append(marcar(self.empleados[1], date(2024, 3, 4), self.presente))
+        self.assertEqual(self.actuales(), self.esperados(hasta))
+        servicios.cerrar_periodo(self.empleados[2], date(2024, 2, 29))
+        self.assertEqual(self.actuales(), self.esperados(hasta))
+
+    def test_las_lecturas_no_extienden_el_indice(self):
+        respuesta = self.client.get('/')
+        self.assertFalse(IndiceHuecos.objects.exists())
+        self.assertIsNone(respuesta.context['huecos']['indice_hasta'])
+        self.assertContains(respuesta, 'todavía no se calculó')
+
+        servicios.huecos_al_dia(date(2024, 1, 31))
+        datos = self.client.get('/api/huecos/', {'desde': '2024-01-01', 'hasta': '2024-03-31'}).json()
+        self.assertEqual(IndiceHuecos.objects.get().hasta, date(2024, 1, 31))
+        self.assertEqual(datos['indice_hasta'], '2024-01-31')
+        self.assertEqual(datos['total'], len(self.esperados(date(2024, 1, 31))))
@@ -0,0 +1,83 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from unittest import skipIf
+
+from django.test import SimpleTestCase, override_settings
+
+from app.asistencia import metricas
+
+from .base import AsistenciaTestCase
+
+
+def pid_terminado():
+    proceso = subprocess.Popen([sys.executable, '-c', ''])
+    proceso.wait()
+    return proceso.pid
+
+
+def foto(valor):
+    return json.dumps({
+        'contadores': [['asistencia_sqlite_bloqueos_total', [['base', 'prueba']], valor]],
+        'histogramas': [],
+    })
+
+
+class VolcadoTests(SimpleTestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = Path(directorio.name)
+        ajustes = override_settings(METRICAS_DIR=directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def bloqueos(self):
+        valor = re.search(
+            r'asistencia_sqlite_bloqueos_total\{base="prueba"\} (\d+)', metricas.exportar(),
+        )
+        return int(valor.group(1)) if valor else 0
+
+    def test_suma_las_fotos_de_otros_procesos(self):
+        (self.directorio / f'metricas-{os.getppid()}-1.json').write_text(foto(2))
+        (self.directorio / f'metricas-{os.getppid()}-2.json').write_text(foto(3))
+        self.assertEqual(self.bloqueos(), 5)
+
+    @skipIf(metricas.fcntl is None, 'sin fcntl no se podan las fotos')
+    def test_fotos_de_procesos_terminados_pasan_al_acumulado(self):
+        muerto = self.directorio / f'metricas-{pid_terminado()}-1.json'
+        muerto.write_text(foto(4))
+        (self.directorio / f'metricas-{os.getppid()}-1.json').write_text(foto(1))
+        self.assertEqual(self.bloqueos(), 5)
+        self.assertFalse(muerto.exists())
+        self.assertTrue((self.directorio / metricas.ACUMULADO).exists())
+        # El contador no retrocede ni se suma dos veces
+        self.assertEqual(self.bloqueos(), 5)
+        otro = self.directorio / f'metricas-{pid_terminado()}-2.json'
+        otro.write_text(foto(2))
+        self.assertEqual(self.bloqueos(), 7)
+        self.assertEqual(
+            sorted(ruta.name for ruta in self.directorio.glob('metricas-*.json')),
+            sorted([metricas.ACUMULADO, f'metricas-{os.getppid()}-1.json']),
+        )
+
+
+class EndpointTests(AsistenciaTestCase):
+    def test_requiere_staff_o_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+        self.client.logout()
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with override_settings(METRICAS_TOKEN='secreto'):
+            self.assertEqual(
+                self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto').status_code, 200,
+            )
+
+    def test_exporta_los_requests(self):
+        self.client.get('/')
+        texto = self.client.get('/metrics').content.decode()
+        self.assertIn('asistencia_requests_total{codigo="200",metodo="GET",vista="dashboard"}', texto)
+        self.assertIn('# TYPE asistencia_request_segundos histogram', texto)
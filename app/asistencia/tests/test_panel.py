@@ -0,0 +1,42 @@
+from datetime import date
+
+from app.asistencia import servicios
+
+from .base import AsistenciaTestCase, marcar
+
+MIERCOLES = date(2025, 3, 5)
+
+
+class PanelHoyTests(AsistenciaTestCase):
+    def por_codigo(self, panel):
+        return {e['codigo']: e for e in panel['estados']}
+
+    def test_conteos_de_hoy_y_de_la_semana(self):
+        ana, bruno, carla = self.empleados
+        for dia in (3, 4, 5):
+            marcar(ana, date(2025, 3, dia), self.presente)
+        marcar(bruno, MIERCOLES, self.ausente)
+        # Doce presentes en los veinte días hábiles previos: diez de Carla en
+        # febrero más el lunes y el martes de Ana
+        for dia in servicios.dias_habiles(date(2025, 2, 1), date(2025, 2, 28))[-10:]:
+            marcar(carla, dia, self.presente)
+
+        panel = servicios.panel_hoy(MIERCOLES)
+        estados = self.por_codigo(panel)
+        self.assertEqual((estados['P']['hoy'], estados['P']['semana']), (1, 3))
+        self.assertEqual((estados['A']['hoy'], estados['A']['semana']), (1, 1))
+        self.assertEqual(estados['P']['promedio'], 0.6)
+        self.assertEqual(panel['sin_marcar'], [{'id': carla.id, 'nombre': str(carla)}])
+        self.assertEqual((panel['total_empleados'], panel['marcados_hoy']), (3, 2))
+        self.assertEqual((panel['dias_semana'], panel['ventana_dias']), (3, 20))
+
+    def test_guardar_invalida_el_panel_de_hoy(self):
+        self.assertEqual(self.por_codigo(servicios.panel_hoy(date.today()))['P']['hoy'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            marcar(self.empleados[0], date.today(), self.presente)
+        self.assertEqual(self.por_codigo(servicios.panel_hoy(date.today()))['P']['hoy'], 1)
+
+    def test_dashboard(self):
+        respuesta = self.client.get('/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['panel']['total_empleados'], 3)
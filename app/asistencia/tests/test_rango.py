@@ -0,0 +1,65 @@
+from datetime import date
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+
+from app.asistencia import servicios, views
+from app.asistencia.models import CierreMes
+
+from .base import AsistenciaTestCase, marcar
+
+URL = '/asistencia/rango/'
+
+
+class QuincenaTests(SimpleTestCase):
+    def test_rango_quincena(self):
+        self.assertEqual(servicios.rango_quincena(2024, 2, 1), (date(2024, 2, 1), date(2024, 2, 15)))
+        self.assertEqual(servicios.rango_quincena(2024, 2, 2), (date(2024, 2, 16), date(2024, 2, 29)))
+        with self.assertRaises(ValueError):
+            servicios.rango_quincena(2024, 2, 3)
+
+    def test_quincena_de(self):
+        self.assertEqual(servicios.quincena_de(date(2025, 3, 15)), (2025, 3, 1))
+        self.assertEqual(servicios.quincena_de(date(2025, 3, 16)), (2025, 3, 2))
+
+
+class GrillaRangoTests(AsistenciaTestCase):
+    def test_quincena(self):
+        respuesta = self.client.get(URL, {'quincena': '2025-3-2'})
+        self.assertEqual(respuesta.context['desde'], date(2025, 3, 16))
+        self.assertEqual(len(respuesta.context['columnas']), 11)
+        self.assertEqual(respuesta.context['quincena_anterior'], '2025-3-1')
+        self.assertEqual(respuesta.context['quincena_siguiente'], '2025-4-1')
+
+    def test_rango_que_cruza_meses(self):
+        marcar(self.empleados[0], date(2025, 2, 28), self.presente)
+        CierreMes.objects.create(anio=2025, mes=2, snapshot=b'')
+        respuesta = self.client.get(URL, {'desde': '2025-02-27', 'hasta': '2025-03-04'})
+        self.assertEqual(len(respuesta.context['columnas']), 4)
+        self.assertEqual(respuesta.context['meses_cerrados'], ['Febrero 2025'])
+        self.assertContains(respuesta, 'data-fecha="2025-02-28"')
+
+    def test_rango_invalido(self):
+        for params in ({'desde': '2025-03-10', 'hasta': '2025-03-01'},
+                       {'desde': '2024-01-01', 'hasta': '2025-03-01'},
+                       {'quincena': '2025-3-9'}):
+            self.assertRedirects(self.client.get(URL, params), URL)
+
+    def test_consultas_no_crecen_con_el_rango(self):
+        def consultas(desde, hasta):
+            with CaptureQueriesContext(connection) as capturadas:
+                self.client.get(URL, {'desde': desde, 'hasta': hasta})
+            return len(capturadas)
+
+        self.assertEqual(consultas('2025-03-03', '2025-03-14'), consultas('2025-01-01', '2025-12-31'))
+
+    def test_carga_por_partes(self):
+        with mock.patch.object(views, 'MAX_CELDAS_PAGINA', 22):
+            respuesta = self.client.get(URL, {'quincena': '2025-3-2'})
+            self.assertEqual(len(respuesta.context['grid']), 2)
+            siguiente = respuesta.context['pagina_siguiente']
+            parcial = self.client.get(siguiente)
+        self.assertEqual(parcial['X-Pagina-Siguiente'], '')
+        self.assertContains(parcial, f'data-empleado-id="{self.empleados[2].id}"')
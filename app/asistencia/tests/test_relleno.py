@@ -0,0 +1,68 @@
+import json
+from datetime import date
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from app.asistencia import servicios
+from app.asistencia.models import CambioAsistencia, PeriodoEmpleo, RegistroAsistencia
+
+from .base import AsistenciaTestCase, crear_empleado
+
+
+class RellenarRangoTests(AsistenciaTestCase):
+    # Lunes 3 a domingo 9 de marzo de 2025: cinco días hábiles
+    desde = date(2025, 3, 3)
+    hasta = date(2025, 3, 9)
+
+    def rellenar(self, **extra):
+        with self.captureOnCommitCallbacks(execute=True):
+            return servicios.rellenar_rango(self.presente.id, self.desde, self.hasta, usuario=self.usuario, **extra)
+
+    def test_completa_solo_vacias(self):
+        ana = self.empleados[0]
+        RegistroAsistencia.objects.create(empleado=ana, fecha=date(2025, 3, 3), estado=self.ausente)
+        self.assertEqual(self.rellenar(), 3 * 5 - 1)
+        self.assertEqual(RegistroAsistencia.objects.get(empleado=ana, fecha=date(2025, 3, 3)).estado, self.ausente)
+        self.assertEqual(CambioAsistencia.objects.filter(origen=CambioAsistencia.ORIGEN_RELLENO).count(), 14)
+        # Repetirlo no escribe nada
+        self.assertEqual(self.rellenar(), 0)
+
+    def test_consultas_independientes_de_la_plantilla(self):
+        with CaptureQueriesContext(connection) as pocos:
+            self.rellenar()
+        RegistroAsistencia.objects.all().delete()
+        for i in range(20):
+            crear_empleado('Extra', f'E{i:02d}')
+        with CaptureQueriesContext(connection) as muchos:
+            self.rellenar()
+        self.assertEqual(len(pocos), len(muchos))
+
+    def test_sobrescribir_solo_versiona_lo_que_cambia(self):
+        ana, bruno = self.empleados[:2]
+        igual = RegistroAsistencia.objects.create(empleado=ana, fecha=date(2025, 3, 3), estado=self.presente)
+        distinto = RegistroAsistencia.objects.create(empleado=bruno, fecha=date(2025, 3, 3), estado=self.ausente)
+        self.assertEqual(self.rellenar(sobrescribir=True), 3 * 5 - 1)
+        igual.refresh_from_db()
+        distinto.refresh_from_db()
+        self.assertEqual(igual.version, 1)
+        self.assertEqual((distinto.estado, distinto.version), (self.presente, 2))
+        self.assertEqual(self.rellenar(sobrescribir=True), 0)
+
+    def test_respeta_periodos_de_empleo(self):
+        carla = self.empleados[2]
+        PeriodoEmpleo.objects.filter(empleado=carla).update(hasta=date(2025, 3, 4))
+        fuera = RegistroAsistencia.objects.create(empleado=carla, fecha=date(2025, 3, 5), estado=self.ausente)
+        self.assertEqual(self.rellenar(sobrescribir=True), 2 * 5 + 2)
+        fuera.refresh_from_db()
+        self.assertEqual((fuera.estado, fuera.version), (self.ausente, 1))
+
+    def test_endpoint(self):
+        def post(**datos):
+            return self.client.post('/asistencia/rellenar/', json.dumps(datos), content_type='application/json')
+
+        respuesta = post(estado_id=self.presente.id, desde='2025-03-03', hasta='2025-03-09',
+                         empleado_ids=[self.empleados[0].id])
+        self.assertEqual(respuesta.json(), {'success': True, 'celdas': 5})
+        self.assertEqual(post(estado_id=999, desde='2025-03-03', hasta='2025-03-09').status_code, 400)
+        self.assertEqual(post(estado_id=self.presente.id, desde='2025-03-10', hasta='2025-03-09').status_code, 400)
@@ -0,0 +1,45 @@
+from datetime import date
+from unittest import mock
+
+from app.asistencia import repositorio, routers, servicios
+from app.asistencia.models import RegistroAsistencia
+
+from .base import AsistenciaTestCase
+
+
+class ReplicaTests(AsistenciaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.router = routers.ReportesRouter()
+        self.antiguedad = mock.patch.object(routers, 'antiguedad_replica')
+        self.addCleanup(self.antiguedad.stop)
+        self.antiguedad.start().return_value = 60
+
+    def destino(self):
+        return self.router.db_for_read(RegistroAsistencia)
+
+    def test_ruteo_segun_antiguedad(self):
+        self.assertIsNone(self.destino())
+        with routers.usando_replica(300):
+            self.assertEqual(self.destino(), routers.ALIAS_REPLICA)
+            with routers.en_principal():
+                self.assertIsNone(self.destino())
+        with routers.usando_replica(30):
+            self.assertIsNone(self.destino())
+        self.assertEqual(self.router.db_for_write(RegistroAsistencia), 'default')
+
+    def test_la_cache_compartida_se_llena_desde_la_principal(self):
+        destinos = []
+
+        def registrando(funcion):
+            def envoltura(*args, **kwargs):
+                destinos.append(self.destino())
+                return funcion(*args, **kwargs)
+            return envoltura
+
+        with mock.patch.object(repositorio, 'leer_estados', registrando(repositorio.leer_estados)), \
+                mock.patch.object(servicios, 'resumen_periodo', registrando(servicios.resumen_periodo)):
+            with routers.usando_replica(300):
+                servicios.historial_empleado(self.empleados[0].id, 2025, 2025)
+                servicios.resumen_anual(2025, date(2025, 12, 31))
+        self.assertEqual(destinos, [None, None])
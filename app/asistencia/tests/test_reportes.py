@@ -0,0 +1,58 @@
+import io
+import os
+import tempfile
+from datetime import date
+
+from django.core.management import call_command
+
+from .base import AsistenciaTestCase, crear_empleado, marcar
+
+
+class GenerarReportesTests(AsistenciaTestCase):
+    def generar(self, salida, *extra):
+        call_command(
+            'generar_reportes', '--anio', '2025', '--mes', '3', '--procesos', '1',
+            '--salida', salida, *extra, stdout=io.StringIO(),
+        )
+
+    def test_un_reporte_por_empleado_y_reanudable(self):
+        ana = self.empleados[0]
+        marcar(ana, date(2025, 3, 3), self.presente)
+        with tempfile.TemporaryDirectory() as salida:
+            self.generar(salida)
+            archivos = sorted(os.listdir(salida))
+            self.assertEqual(archivos, sorted(
+                [f'empleado_{emp.id:05d}.html' for emp in self.empleados] + ['index.html']
+            ))
+            ruta = os.path.join(salida, f'empleado_{ana.id:05d}.html')
+            with open(ruta, encoding='utf-8') as f:
+                self.assertIn(str(ana), f.read())
+
+            # Una segunda corrida no reescribe lo ya generado, salvo con --forzar
+            os.utime(ruta, (0, 0))
+            self.generar(salida)
+            self.assertEqual(os.path.getmtime(ruta), 0)
+            self.generar(salida, '--forzar')
+            self.assertNotEqual(os.path.getmtime(ruta), 0)
+
+    def test_cobertura_sobre_los_dias_del_periodo_de_empleo(self):
+        # Ingresa el lunes 17: de los 21 días hábiles de marzo le tocan 11
+        nuevo = crear_empleado('Diego', 'Diaz', desde=date(2025, 3, 17))
+        for dia in range(17, 22):
+            marcar(nuevo, date(2025, 3, dia), self.presente)
+        marcar(nuevo, date(2025, 3, 22), self.presente)  # sábado: no cuenta
+        with tempfile.TemporaryDirectory() as salida:
+            self.generar(salida)
+            with open(os.path.join(salida, f'empleado_{nuevo.id:05d}.html'), encoding='utf-8') as f:
+                reporte = f.read()
+            with open(os.path.join(salida, 'index.html'), encoding='utf-8') as f:
+                indice = f.read()
+        self.assertIn('(11 dentro del período de empleo)', reporte)
+        self.assertIn('cobertura 45,5%', reporte)
+        self.assertIn('<td>6</td>', reporte)  # sin registro
+        self.assertEqual(reporte.count('Fuera del período de empleo'), 10)
+        self.assertInHTML(
+            f'<tr><td><a href="empleado_{nuevo.id:05d}.html">{nuevo}</a></td>'
+            '<td class="num">5</td><td class="num">45,5%</td></tr>',
+            indice,
+        )
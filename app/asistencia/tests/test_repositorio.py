@@ -0,0 +1,56 @@
+import importlib
+from datetime import date
+
+from django.apps import apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from app.asistencia import repositorio
+from app.asistencia.models import MesAsistencia, ObservacionAsistencia, RegistroAsistencia
+
+from .base import AsistenciaTestCase, marcar
+
+migracion_meses = importlib.import_module(
+    'app.asistencia.migrations.0006_mesasistencia_observacionasistencia',
+)
+
+
+class CompactoTests(AsistenciaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ana, self.bruno, _ = self.empleados
+        marcar(self.ana, date(2024, 1, 10), self.presente)
+        marcar(self.ana, date(2024, 6, 3), self.ausente)
+        marcar(self.bruno, date(2025, 3, 3), self.presente)
+
+    def filas(self):
+        return {
+            (emp_id, inicio): repositorio.decodificar(estados)
+            for emp_id, inicio, estados in MesAsistencia.objects.values_list('empleado_id', 'inicio', 'estados')
+        }
+
+    def test_sincronizar_lee_solo_los_meses_tocados(self):
+        RegistroAsistencia.objects.filter(empleado=self.ana, fecha=date(2024, 1, 10)).update(
+            estado=self.ausente, observaciones='Tarde',
+        )
+        with CaptureQueriesContext(connection) as consultas:
+            repositorio.sincronizar([(self.ana.id, date(2024, 1, 10)), (self.bruno.id, date(2025, 3, 3))])
+        lecturas = [
+            q['sql'] for q in consultas.captured_queries
+            if q['sql'].startswith('SELECT') and 'registroasistencia' in q['sql']
+        ]
+        self.assertEqual(len(lecturas), 2)
+        self.assertFalse(any('2024-06' in sql for sql in lecturas))
+        self.assertEqual(self.filas()[(self.ana.id, date(2024, 1, 1))][9], self.ausente.id)
+        self.assertEqual(ObservacionAsistencia.objects.get().texto, 'Tarde')
+
+    def test_migracion_carga_mes_a_mes(self):
+        esperadas = self.filas()
+        MesAsistencia.objects.all().delete()
+        RegistroAsistencia.objects.filter(fecha=date(2024, 6, 3)).update(observaciones='Médico')
+        migracion_meses.cargar_meses(apps, None)
+        self.assertEqual(self.filas(), esperadas)
+        self.assertEqual(
+            list(ObservacionAsistencia.objects.values_list('fecha', 'texto')),
+            [(date(2024, 6, 3), 'Médico')],
+        )
@@ -12,18 +12,37 @@ urlpatterns = [
     path('empleados/<int:pk>/editar/', views.empleados_editar, name='empleados_editar'),
     path('empleados/<int:pk>/eliminar/', views.empleados_eliminar, name='empleados_eliminar'),
     path('empleados/<int:pk>/activar/', views.empleados_activar, name='empleados_activar'),
+    path('empleados/<int:pk>/historial/', views.empleados_historial, name='empleados_historial'),
 
     # Estados de Asistencia
     path('estados/', views.estados_lista, name='estados_lista'),
     path('estados/crear/', views.estados_crear, name='estados_crear'),
     path('estados/<int:pk>/editar/', views.estados_editar, name='estados_editar'),
     path('estados/<int:pk>/eliminar/', views.estados_eliminar, name='estados_eliminar'),
+    path('estados/estilos.css', views.estados_css, name='estados_css'),
 
     # Estadísticas
     path('estadisticas/', views.estadisticas, name='estadisticas'),
+    path('estadisticas/interanual/', views.estadisticas_interanual, name='estadisticas_interanual'),
+    path('estadisticas/ausentismo/', views.estadisticas_ausentismo, name='estadisticas_ausentismo'),
+    path('api/ausentismo/', views.api_ausentismo, name='api_ausentismo'),
+    path('api/huecos/', views.api_huecos, name='api_huecos'),
+
+    # Fichadas del reloj
+    path('api/fichadas/', views.api_fichadas, name='api_fichadas'),
+
+    # Auditoría
+    path('auditoria/', views.auditoria_cambios, name='auditoria_cambios'),
+
+    # Métricas (Prometheus)
+    path('metrics', views.metricas_exportar, name='metricas'),
 
     # Asistencia
     path('asistencia/', views.asistencia_redirigir, name='asistencia'),
     path('asistencia/guardar/', views.asistencia_guardar, name='asistencia_guardar'),
+    path('asistencia/rellenar/', views.asistencia_rellenar, name='asistencia_rellenar'),
+    path('asistencia/rango/', views.asistencia_rango, name='asistencia_rango'),
     path('asistencia/<int:anio>/<int:mes>/', views.asistencia_grilla, name='asistencia_grilla'),
+    path('asistencia/<int:anio>/<int:mes>/cerrar/', views.asistencia_cerrar_mes, name='asistencia_cerrar_mes'),
+    path('asistencia/<int:anio>/<int:mes>/reabrir/', views.asistencia_reabrir_mes, name='asistencia_reabrir_mes'),
 ]
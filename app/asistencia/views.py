@@ -1,17 +1,64 @@
 import calendar
+import hashlib
 import json
 from datetime import date, timedelta
 
+from django.conf import settings
 from django.contrib import messages
+from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
-from django.db.models import Count, Min
-from django.http import JsonResponse
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.db.models import Min
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.crypto import constant_time_compare
+from django.utils.html import format_html, format_html_join
+from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 
+from . import fichadas, metricas, repositorio
+from .analitica import BRADFORD_ALTO, indicadores_ausentismo
 from .forms import EmpleadoForm, EstadoAsistenciaForm
-from .models import Empleado, EstadoAsistencia, RegistroAsistencia
+from .models import (
+    CambioAsistencia,
+    CierreMes,
+    Empleado,
+    EstadoAsistencia,
+    LoteGuardado,
+    RegistroAsistencia,
+)
+from .routers import en_principal, lectura_replica
+from .servicios import (
+    CODIGO_PRESENTE,
+    CODIGOS_AUSENCIA,
+    MAX_DIAS_RELLENO,
+    MesCerradoError,
+    abrir_periodo,
+    aplicar_celdas,
+    celdas_rechazadas,
+    celdas_vigentes,
+    cerrar_mes,
+    cerrar_periodo,
+    dias_habiles,
+    en_periodo,
+    estado_a_dict,
+    historial_empleado,
+    hoja_estilos_estados,
+    huecos_de_rango,
+    invalidar_panel_hoy,
+    matriz_asistencia,
+    panel_hoy,
+    periodos_empleo,
+    plantilla,
+    quincena_de,
+    rango_mes,
+    rango_quincena,
+    rellenar_rango,
+    resumen_anual,
+    resumen_periodo,
+    version_estados,
+)
 
 MESES_ES = {
     1: 'Enero', 2: 'Febrero', 3: 'Marzo', 4: 'Abril',
@@ -21,6 +68,28 @@ MESES_ES = {
 
 DIAS_CORTOS = ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']
 
+# Años que puede abarcar el historial de un empleado
+HISTORIAL_MAX_ANIOS = 10
+
+# Celdas por lote en asistencia_guardar (el cliente envía lotes menores)
+MAX_CELDAS_LOTE = 1000
+
+# Celdas por página de grilla; el resto de los empleados se carga por partes
+MAX_CELDAS_PAGINA = 3000
+
+# Días corridos que puede abarcar la grilla por rango
+MAX_DIAS_RANGO = 366
+
+# Años que puede abarcar la estadística por rango o la comparación interanual
+MAX_ANIOS_ESTADISTICAS = 10
+
+# Filas por página en la auditoría de cambios
+AUDITORIA_POR_PAGINA = 100
+
+# Huecos listados uno por uno en api_huecos y en el dashboard (los totales van completos)
+MAX_HUECOS_RESPUESTA = 5000
+HUECOS_DASHBOARD = 200
+
 
 # ─────────────────────────────────────────
 # Dashboard
@@ -28,12 +97,27 @@ DIAS_CORTOS = ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']
 
 @login_required
 def dashboard(request):
-    empleados_activos = Empleado.objects.filter(activo=True).count()
+    empleados_activos = plantilla(date.today(), date.today()).count()
     estados_activos = EstadoAsistencia.objects.filter(activo=True).count()
     hoy = date.today()
+    try:
+        huecos_desde, huecos_hasta = _rango_huecos(request, prefijo='huecos_')
+    except ValueError:
+        messages.error(request, 'Rango de días sin marcar inválido: se muestra el mes en curso.')
+        huecos_desde, huecos_hasta = hoy.replace(day=1), hoy
+    huecos = huecos_de_rango(huecos_desde, huecos_hasta, limite=HUECOS_DASHBOARD)
+    fechas_por_empleado = {}
+    for hueco in huecos['huecos']:
+        fechas_por_empleado.setdefault(hueco['empleado_id'], []).append(hueco['fecha'])
+    for fila in huecos['por_empleado']:
+        fila['fechas'] = fechas_por_empleado.get(fila['empleado_id'], [])
     return render(request, 'asistencia/dashboard.html', {
         'empleados_activos': empleados_activos,
         'estados_activos': estados_activos,
+        'panel': panel_hoy(hoy),
+        'huecos': huecos,
+        'huecos_desde': huecos_desde,
+        'huecos_hasta': huecos_hasta,
         'hoy': hoy,
         'mes_actual_anio': hoy.year,
         'mes_actual_mes': hoy.month,
@@ -41,6 +125,21 @@ def dashboard(request):
     })
 
 
+def _rango_huecos(request, prefijo=''):
+    """
+    Rango de `?<prefijo>desde=&<prefijo>hasta=` (ISO); por omisión, el mes
+    en curso hasta hoy. Lanza ValueError si es inválido.
+    """
+    hoy = date.today()
+    desde = request.GET.get(f'{prefijo}desde')
+    hasta = request.GET.get(f'{prefijo}hasta')
+    desde = date.fromisoformat(desde) if desde else hoy.replace(day=1)
+    hasta = date.fromisoformat(hasta) if hasta else hoy
+    if desde > hasta:
+        raise ValueError('El rango debe empezar antes de su fin.')
+    return desde, hasta
+
+
 # ─────────────────────────────────────────
 # Empleados
 # ─────────────────────────────────────────
@@ -56,7 +155,9 @@ def empleados_crear(request):
     if request.method == 'POST':
         form = EmpleadoForm(request.POST)
         if form.is_valid():
-            form.save()
+            empleado = form.save()
+            abrir_periodo(empleado, form.cleaned_data['fecha_ingreso'])
+            invalidar_panel_hoy()
             messages.success(request, 'Empleado creado exitosamente.')
             return redirect('empleados_lista')
     else:
@@ -74,6 +175,7 @@ def empleados_editar(request, pk):
         form = EmpleadoForm(request.POST, instance=empleado)
         if form.is_valid():
             form.save()
+            invalidar_panel_hoy()
             messages.success(request, 'Empleado actualizado exitosamente.')
             return redirect('empleados_lista')
     else:
@@ -89,8 +191,8 @@ def empleados_editar(request, pk):
 @require_POST
 def empleados_eliminar(request, pk):
     empleado = get_object_or_404(Empleado, pk=pk)
-    empleado.activo = False
-    empleado.save()
+    cerrar_periodo(empleado, date.today())
+    invalidar_panel_hoy()
     messages.success(request, f'Empleado "{empleado}" desactivado.')
     return redirect('empleados_lista')
 
@@ -99,12 +201,78 @@ def empleados_eliminar(request, pk):
 @require_POST
 def empleados_activar(request, pk):
     empleado = get_object_or_404(Empleado, pk=pk)
-    empleado.activo = True
-    empleado.save()
+    abrir_periodo(empleado, date.today())
+    invalidar_panel_hoy()
     messages.success(request, f'Empleado "{empleado}" reactivado.')
     return redirect('empleados_lista')
 
 
+@login_required
+@lectura_replica
+def empleados_historial(request, pk):
+    empleado = get_object_or_404(Empleado, pk=pk)
+    hoy = date.today()
+
+    # Rango de años (máximo HISTORIAL_MAX_ANIOS)
+    try:
+        anio_hasta = int(request.GET.get('hasta', hoy.year))
+        anio_desde = int(request.GET.get('desde', anio_hasta - 2))
+    except ValueError:
+        return redirect('empleados_historial', pk=pk)
+    anio_hasta = max(1, min(anio_hasta, hoy.year))
+    anio_desde = max(1, anio_hasta - HISTORIAL_MAX_ANIOS + 1, min(anio_desde, anio_hasta))
+
+    historial = historial_empleado(empleado.id, anio_desde, anio_hasta)
+    estados = {e.id: e for e in EstadoAsistencia.objects.all()}
+
+    # ── Totales y rachas sobre días hábiles ────────────────
+    totales = {}
+    racha_presente = racha_ausente = 0
+    mejor_presente = mejor_ausente = 0
+    anios = []
+    for anio in range(anio_desde, anio_hasta + 1):
+        por_fecha = dict(historial[anio])
+        semanas = []
+        semana = [None] * 5
+        for dia in dias_habiles(date(anio, 1, 1), min(date(anio, 12, 31), hoy)):
+            estado = estados.get(por_fecha.get(dia.toordinal()))
+            if estado:
+                totales[estado.id] = totales.get(estado.id, 0) + 1
+            codigo = estado.codigo if estado else None
+            racha_presente = racha_presente + 1 if codigo == CODIGO_PRESENTE else 0
+            racha_ausente = racha_ausente + 1 if codigo in CODIGOS_AUSENCIA else 0
+            mejor_presente = max(mejor_presente, racha_presente)
+            mejor_ausente = max(mejor_ausente, racha_ausente)
+
+            if dia.weekday() == 0 and any(semana):
+                semanas.append(semana)
+                semana = [None] * 5
+            semana[dia.weekday()] = {'fecha': dia, 'estado': estado}
+        if any(semana):
+            semanas.append(semana)
+        anios.append({
+            'anio': anio,
+            'semanas': semanas,
+            'registros': len(por_fecha),
+        })
+
+    return render(request, 'asistencia/empleados/historial.html', {
+        'empleado': empleado,
+        'anios': list(reversed(anios)),
+        'anio_desde': anio_desde,
+        'anio_hasta': anio_hasta,
+        'anios_opciones': list(range(hoy.year - 20, hoy.year + 1)),
+        'totales': [
+            {'estado': e, 'cantidad': totales[e.id]}
+            for e in estados.values() if e.id in totales
+        ],
+        'racha_presente_actual': racha_presente,
+        'racha_presente_maxima': mejor_presente,
+        'racha_ausente_maxima': mejor_ausente,
+        'dias_cortos': DIAS_CORTOS[:5],
+    })
+
+
 # ─────────────────────────────────────────
 # Estados de Asistencia
 # ─────────────────────────────────────────
@@ -165,10 +333,118 @@ def estados_eliminar(request, pk):
     return redirect('estados_lista')
 
 
+@login_required
+def estados_css(request):
+    """
+    Hoja de estilos de los estados. Las páginas la piden con `?v=<versión>`:
+    con la versión vigente se cachea en el navegador sin revalidar, y al
+    editar un estado la URL cambia.
+    """
+    version = version_estados()
+    respuesta = HttpResponse(hoja_estilos_estados(version), content_type='text/css; charset=utf-8')
+    if request.GET.get('v') == version:
+        respuesta['Cache-Control'] = 'private, max-age=31536000, immutable'
+    else:
+        respuesta['Cache-Control'] = 'private, no-cache'
+    return respuesta
+
+
 # ─────────────────────────────────────────
 # Asistencia – Grilla mensual
 # ─────────────────────────────────────────
 
+def _pagina_grilla(request, dias):
+    """
+    (pagina, inicio, fin) de la página pedida en `?pagina=`. Cada página
+    trae tantos empleados como entren en MAX_CELDAS_PAGINA celdas.
+    """
+    por_pagina = max(1, MAX_CELDAS_PAGINA // max(len(dias), 1))
+    try:
+        pagina = max(int(request.GET.get('pagina', 1)), 1)
+    except ValueError:
+        pagina = 1
+    inicio = (pagina - 1) * por_pagina
+    return pagina, inicio, inicio + por_pagina
+
+
+def _url_pagina(request, pagina):
+    """URL del fragmento con las filas de `pagina`, con los mismos filtros."""
+    params = request.GET.copy()
+    params['pagina'] = pagina
+    params['parcial'] = 1
+    return f'{request.path}?{params.urlencode()}'
+
+
+def _filas_grilla(matriz, dias, hoy, meses_cerrados=(), versiones=None, tramos=None):
+    """
+    Filas de la grilla. Con `tramos` (ver servicios.periodos_empleo) los días
+    fuera del período de empleo de cada uno quedan de solo lectura.
+    """
+    versiones = versiones or {}
+    opciones = _opciones_estados(matriz['estados'])
+    grid = []
+    for emp, celdas in zip(matriz['empleados'], matriz['celdas']):
+        grid.append({
+            'empleado_id': emp['id'],
+            'nombre': emp['nombre'],
+            'dias': [
+                {
+                    'fecha': dia,
+                    'fecha_str': dia.strftime('%Y-%m-%d'),
+                    'estado_id': estado_id,
+                    'version': versiones.get((emp['id'], dia), 0),
+                    'opciones': opciones.get(estado_id, opciones[0]),
+                    'es_hoy': dia == hoy,
+                    'bloqueada': (dia.year, dia.month) in meses_cerrados or (
+                        tramos is not None and not en_periodo(tramos.get(emp['id'], ()), dia)
+                    ),
+                }
+                for dia, estado_id in zip(dias, celdas)
+            ],
+        })
+    return grid
+
+
+def _opciones_estados(estados):
+    """
+    <option> de la grilla ya renderizadas, una variante por estado
+    seleccionado (0 = celda vacía). Se arman una vez por página y cada
+    celda reutiliza la suya en lugar de renderizar la lista.
+    """
+    def opciones(seleccionado):
+        return format_html(
+            '<option value="">—</option>{}',
+            format_html_join('', '<option value="{}"{}>{}</option>', (
+                (e['id'], ' selected' if e['id'] == seleccionado else '', e['codigo'])
+                for e in estados
+            )),
+        )
+    return {estado_id: opciones(estado_id) for estado_id in [0] + [e['id'] for e in estados]}
+
+
+def _columnas_grilla(dias, hoy):
+    return [
+        {
+            'fecha': dia,
+            'fecha_str': dia.strftime('%Y-%m-%d'),
+            'dia_num': dia.day,
+            'dia_nombre': DIAS_CORTOS[dia.weekday()],
+            'es_hoy': dia == hoy,
+        }
+        for dia in dias
+    ]
+
+
+def _filas_parciales(request, grid, cierre, pagina_siguiente):
+    """Solo las <tr> de una página; la URL de la siguiente va en un encabezado."""
+    response = render(request, 'asistencia/asistencia_grilla_filas.html', {
+        'grid': grid,
+        'cierre': cierre,
+    })
+    response['X-Pagina-Siguiente'] = pagina_siguiente
+    return response
+
+
 @login_required
 def asistencia_redirigir(request):
     hoy = date.today()
@@ -181,26 +457,18 @@ def asistencia_grilla(request, anio, mes):
 
     # Validar año y mes
     try:
-        primer_dia = date(anio, mes, 1)
+        primer_dia, ultimo_dia = rango_mes(anio, mes)
     except ValueError:
-        return redirect('asistencia_redirigir')
-
-    ultimo_dia_num = calendar.monthrange(anio, mes)[1]
-    ultimo_dia = date(anio, mes, ultimo_dia_num)
+        return redirect('asistencia')
 
     # Días hábiles del mes (Lun–Vie)
-    dias_habiles = []
-    dia = primer_dia
-    while dia <= ultimo_dia:
-        if dia.weekday() < 5:
-            dias_habiles.append(dia)
-        dia += timedelta(days=1)
+    dias_mes = dias_habiles(primer_dia, ultimo_dia)
 
     # Agrupar por semana ISO
     semanas = []
     semana_actual = []
     current_week_num = None
-    for dia in dias_habiles:
+    for dia in dias_mes:
         wnum = dia.isocalendar()[1]
         if current_week_num is None:
             current_week_num = wnum
@@ -221,52 +489,40 @@ def asistencia_grilla(request, anio, mes):
             semana_idx = idx
             dias_a_mostrar = semanas[idx]
         else:
-            dias_a_mostrar = dias_habiles
+            dias_a_mostrar = dias_mes
     else:
-        dias_a_mostrar = dias_habiles
-
-    # Empleados y estados activos
-    empleados = Empleado.objects.filter(activo=True)
-    estados = EstadoAsistencia.objects.filter(activo=True)
-
-    # Registros del período visible
-    if dias_a_mostrar:
-        registros_qs = RegistroAsistencia.objects.filter(
-            fecha__gte=dias_a_mostrar[0],
-            fecha__lte=dias_a_mostrar[-1],
-        ).select_related('estado')
-        registro_dict = {(r.empleado_id, r.fecha): r.estado for r in registros_qs}
+        dias_a_mostrar = dias_mes
+
+    # Mes cerrado: se sirve la foto guardada; si no, se arma desde los registros
+    pagina, inicio, fin = _pagina_grilla(request, dias_a_mostrar)
+    cierre = CierreMes.objects.select_related('cerrado_por').filter(anio=anio, mes=mes).first()
+    if cierre:
+        matriz = cierre.datos['matriz']
+        hay_mas = len(matriz['empleados']) > fin
+        posiciones = {d: i for i, d in enumerate(matriz['dias'])}
+        indices = [posiciones[dia.isoformat()] for dia in dias_a_mostrar]
+        matriz['empleados'] = matriz['empleados'][inicio:fin]
+        matriz['celdas'] = [[fila[i] for i in indices] for fila in matriz['celdas'][inicio:fin]]
     else:
-        registro_dict = {}
-
-    # Construir grilla
-    grid = []
-    for emp in empleados:
-        fila = {
-            'empleado': emp,
-            'dias': [
-                {
-                    'fecha': dia,
-                    'fecha_str': dia.strftime('%Y-%m-%d'),
-                    'estado': registro_dict.get((emp.id, dia)),
-                    'es_hoy': dia == hoy,
-                }
-                for dia in dias_a_mostrar
-            ],
-        }
-        grid.append(fila)
-
-    # Encabezados de columnas
-    columnas = [
-        {
-            'fecha': dia,
-            'fecha_str': dia.strftime('%Y-%m-%d'),
-            'dia_num': dia.day,
-            'dia_nombre': DIAS_CORTOS[dia.weekday()],
-            'es_hoy': dia == hoy,
-        }
-        for dia in dias_a_mostrar
-    ]
+        empleados = list(plantilla(primer_dia, ultimo_dia)[inicio:fin + 1])
+        hay_mas = len(empleados) > fin - inicio
+        matriz = matriz_asistencia(empleados[:fin - inicio], dias_a_mostrar)
+    estados = matriz['estados']
+    # Clave de la leyenda en caché, que depende de los estados
+    clave_estados = hashlib.md5(repr(estados).encode()).hexdigest()
+
+    # Versiones y períodos de empleo por celda; un mes cerrado no se edita
+    versiones = tramos = None
+    if not cierre and dias_a_mostrar:
+        ids = [emp['id'] for emp in matriz['empleados']]
+        versiones = repositorio.leer_versiones(dias_a_mostrar[0], dias_a_mostrar[-1], ids)
+        tramos = periodos_empleo(dias_a_mostrar[0], dias_a_mostrar[-1], ids)
+    grid = _filas_grilla(matriz, dias_a_mostrar, hoy, versiones=versiones, tramos=tramos)
+    pagina_siguiente = _url_pagina(request, pagina + 1) if hay_mas else ''
+    if request.GET.get('parcial'):
+        return _filas_parciales(request, grid, cierre, pagina_siguiente)
+
+    columnas = _columnas_grilla(dias_a_mostrar, hoy)
 
     # Información de semanas para el filtro
     semanas_info = []
@@ -300,8 +556,13 @@ def asistencia_grilla(request, anio, mes):
         'columnas': columnas,
         'grid': grid,
         'estados': estados,
+        'clave_estados': clave_estados,
+        'version_estados': version_estados(),
         'semanas_info': semanas_info,
         'semana_idx': semana_idx,
+        'pagina_siguiente': pagina_siguiente,
+        'cierre': cierre,
+        'puede_cerrar': request.user.is_staff and ultimo_dia < hoy,
         'mes_ant_anio': mes_ant_anio,
         'mes_ant_mes': mes_ant_mes,
         'mes_sig_anio': mes_sig_anio,
@@ -309,6 +570,124 @@ def asistencia_grilla(request, anio, mes):
     })
 
 
+@login_required
+def asistencia_rango(request):
+    """
+    Grilla de un rango arbitrario: una quincena (`?quincena=AAAA-MM-N`) o
+    fechas libres (`?desde=&hasta=`), que puede cruzar meses. Las celdas de
+    meses cerrados se muestran de solo lectura.
+    """
+    hoy = date.today()
+    quincena = None
+    try:
+        if request.GET.get('quincena'):
+            anio, mes, numero = (int(p) for p in request.GET['quincena'].split('-'))
+            desde, hasta = rango_quincena(anio, mes, numero)
+            quincena = (anio, mes, numero)
+        elif request.GET.get('desde') or request.GET.get('hasta'):
+            desde = date.fromisoformat(request.GET.get('desde', ''))
+            hasta = date.fromisoformat(request.GET.get('hasta', ''))
+        else:
+            quincena = quincena_de(hoy)
+            desde, hasta = rango_quincena(*quincena)
+    except ValueError:
+        messages.error(request, 'El rango pedido no es válido.')
+        return redirect('asistencia_rango')
+    if desde > hasta:
+        messages.error(request, 'La fecha de inicio es posterior a la de fin.')
+        return redirect('asistencia_rango')
+    if (hasta - desde).days >= MAX_DIAS_RANGO:
+        messages.error(request, f'El rango no puede superar {MAX_DIAS_RANGO} días.')
+        return redirect('asistencia_rango')
+
+    dias = dias_habiles(desde, hasta)
+    pagina, inicio, fin = _pagina_grilla(request, dias)
+    empleados = list(plantilla(desde, hasta)[inicio:fin + 1])
+    hay_mas = len(empleados) > fin - inicio
+    matriz = matriz_asistencia(empleados[:fin - inicio], dias)
+    estados = matriz['estados']
+    clave_estados = hashlib.md5(repr(estados).encode()).hexdigest()
+
+    meses = {(dia.year, dia.month) for dia in dias}
+    meses_cerrados = sorted(
+        (a, m)
+        for a, m in CierreMes.objects.filter(
+            anio__in={a for a, _ in meses},
+        ).values_list('anio', 'mes')
+        if (a, m) in meses
+    )
+    versiones = tramos = None
+    if dias:
+        ids = [emp['id'] for emp in matriz['empleados']]
+        versiones = repositorio.leer_versiones(dias[0], dias[-1], ids)
+        tramos = periodos_empleo(dias[0], dias[-1], ids)
+    grid = _filas_grilla(matriz, dias, hoy, set(meses_cerrados), versiones, tramos)
+    pagina_siguiente = _url_pagina(request, pagina + 1) if hay_mas else ''
+    if request.GET.get('parcial'):
+        return _filas_parciales(request, grid, None, pagina_siguiente)
+
+    # Quincenas vecinas para la navegación
+    quincena_anterior = quincena_siguiente = None
+    if quincena:
+        quincena_anterior = '{}-{}-{}'.format(*quincena_de(desde - timedelta(days=1)))
+        quincena_siguiente = '{}-{}-{}'.format(*quincena_de(hasta + timedelta(days=1)))
+
+    return render(request, 'asistencia/asistencia_rango.html', {
+        'desde': desde,
+        'hasta': hasta,
+        'quincena': quincena,
+        'quincena_anterior': quincena_anterior,
+        'quincena_siguiente': quincena_siguiente,
+        'hoy': hoy,
+        'columnas': _columnas_grilla(dias, hoy),
+        'grid': grid,
+        'estados': estados,
+        'clave_estados': clave_estados,
+        'version_estados': version_estados(),
+        'meses_cerrados': [f'{MESES_ES[m]} {a}' for a, m in meses_cerrados],
+        'pagina_siguiente': pagina_siguiente,
+        'max_dias': MAX_DIAS_RANGO,
+    })
+
+
+@login_required
+@require_POST
+def asistencia_cerrar_mes(request, anio, mes):
+    if not request.user.is_staff:
+        messages.error(request, 'Solo el personal autorizado puede cerrar meses.')
+        return redirect('asistencia_grilla', anio=anio, mes=mes)
+    try:
+        _, ultimo_dia = rango_mes(anio, mes)
+    except ValueError:
+        return redirect('asistencia')
+
+    if ultimo_dia >= date.today():
+        messages.error(request, 'Solo se pueden cerrar meses ya finalizados.')
+    elif CierreMes.objects.filter(anio=anio, mes=mes).exists():
+        messages.warning(request, f'{MESES_ES[mes]} {anio} ya estaba cerrado.')
+    else:
+        try:
+            cerrar_mes(anio, mes, request.user)
+        except IntegrityError:
+            # Otro cierre simultáneo del mismo mes ganó la carrera
+            messages.warning(request, f'{MESES_ES[mes]} {anio} ya estaba cerrado.')
+        else:
+            messages.success(request, f'{MESES_ES[mes]} {anio} cerrado. La planilla queda en solo lectura.')
+    return redirect('asistencia_grilla', anio=anio, mes=mes)
+
+
+@login_required
+@require_POST
+def asistencia_reabrir_mes(request, anio, mes):
+    if not request.user.is_staff:
+        messages.error(request, 'Solo el personal autorizado puede reabrir meses.')
+        return redirect('asistencia_grilla', anio=anio, mes=mes)
+    borrados, _ = CierreMes.objects.filter(anio=anio, mes=mes).delete()
+    if borrados:
+        messages.success(request, f'{MESES_ES[mes]} {anio} reabierto para edición.')
+    return redirect('asistencia_grilla', anio=anio, mes=mes)
+
+
 # ─────────────────────────────────────────
 # Asistencia – Guardado AJAX
 # ─────────────────────────────────────────
@@ -316,44 +695,302 @@ def asistencia_grilla(request, anio, mes):
 @login_required
 @require_POST
 def asistencia_guardar(request):
+    """
+    Aplica un lote de celdas en transacciones cortas (ver
+    servicios.aplicar_celdas). Cada celda trae la `version` que cargó la
+    grilla; las que otra edición cambió antes vuelven en `conflictos` con
+    su estado vigente en lugar de pisarse. Las que no se pueden escribir
+    (mes cerrado, fuera del período de empleo) vuelven en `rechazados` con
+    su estado vigente y el motivo, sin frenar el resto del lote. Con `clave`
+    (idempotencia) un lote ya procesado se descarta: el reintento tras un
+    corte no reescribe nada y responde con el estado vigente de sus celdas:
+    las que no tienen el valor pedido vuelven como conflicto, aunque la
+    respuesta al primer intento se haya perdido.
+    """
     try:
         data = json.loads(request.body)
         registros = data.get('registros', [])
+        clave = data.get('clave') or None
+        if len(registros) > MAX_CELDAS_LOTE:
+            raise ValueError(f'Un lote no puede superar {MAX_CELDAS_LOTE} celdas.')
+        if clave is not None and (not isinstance(clave, str) or len(clave) > 64):
+            raise ValueError('Clave de lote inválida.')
+
+        celdas = []
+        for r in registros:
+            if not (r.get('empleado_id') and r.get('fecha')):
+                continue
+            version = r.get('version')
+            if version is not None and (type(version) is not int or version < 0):
+                raise ValueError('Versión de celda inválida.')
+            celdas.append({
+                'empleado_id': int(r['empleado_id']),
+                'fecha': date.fromisoformat(r['fecha']),
+                'estado_id': int(r['estado_id']) if r.get('estado_id') else None,
+                'observaciones': r.get('observaciones', ''),
+                'version': version,
+            })
+
+        if clave and LoteGuardado.objects.filter(clave=clave).exists():
+            rechazadas = celdas_rechazadas(celdas)
+            versiones, conflictos = _resultado_vigente(
+                [c for c in celdas if (c['empleado_id'], c['fecha']) not in rechazadas]
+            )
+            return JsonResponse({
+                'success': True,
+                'duplicado': True,
+                'versiones': _versiones_json(versiones),
+                'conflictos': _conflictos_json(conflictos),
+                'rechazados': _rechazados_json(rechazadas),
+            })
+
+        versiones, conflictos, rechazadas = aplicar_celdas(celdas, request.user)
+        if clave:
+            # Al final: si el lote se corta a mitad, el reintento lo completa
+            # y las celdas ya aplicadas no cuentan como conflicto
+            try:
+                LoteGuardado.objects.create(clave=clave, usuario=request.user, celdas=len(registros))
+            except IntegrityError:
+                pass
+
+        metricas.observar('asistencia_celdas_guardadas', len(celdas) - len(rechazadas))
+        if conflictos:
+            metricas.incrementar('asistencia_conflictos_total', len(conflictos))
+        return JsonResponse({
+            'success': True,
+            'versiones': _versiones_json(versiones),
+            'conflictos': _conflictos_json(conflictos),
+            'rechazados': _rechazados_json(rechazadas),
+        })
+    except MesCerradoError as e:
+        return JsonResponse({'error': str(e)}, status=409)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+def _conflictos_json(conflictos):
+    return [
+        {'empleado_id': emp_id, 'fecha': fecha.isoformat(), 'estado_id': estado_id, 'version': version}
+        for (emp_id, fecha), (estado_id, version) in conflictos.items()
+    ]
+
+
+def _rechazados_json(rechazadas):
+    """Celdas rechazadas {(empleado_id, fecha): motivo} con su estado vigente."""
+    return [
+        {
+            'empleado_id': emp_id,
+            'fecha': fecha.isoformat(),
+            'estado_id': estado_id,
+            'version': version,
+            'motivo': rechazadas[(emp_id, fecha)],
+        }
+        for (emp_id, fecha), (estado_id, version) in celdas_vigentes(rechazadas).items()
+    ]
+
+
+def _resultado_vigente(celdas):
+    """
+    (versiones, conflictos) de un lote ya procesado, como los devuelve
+    aplicar_celdas, según el estado vigente de cada celda: las que tienen el
+    valor pedido quedaron aplicadas; las demás, en conflicto.
+    """
+    vigentes = celdas_vigentes((c['empleado_id'], c['fecha']) for c in celdas)
+    versiones, conflictos = {}, {}
+    for celda in celdas:
+        clave = (celda['empleado_id'], celda['fecha'])
+        estado_id, version = vigentes[clave]
+        if (estado_id or 0) == (celda['estado_id'] or 0):
+            versiones[clave] = version
+        else:
+            conflictos[clave] = (estado_id, version)
+    return versiones, conflictos
+
 
-        with transaction.atomic():
-            for r in registros:
-                empleado_id = r.get('empleado_id')
-                fecha = r.get('fecha')
-                estado_id = r.get('estado_id')
-
-                if not empleado_id or not fecha:
-                    continue
-
-                if estado_id:
-                    RegistroAsistencia.objects.update_or_create(
-                        empleado_id=empleado_id,
-                        fecha=fecha,
-                        defaults={
-                            'estado_id': estado_id,
-                            'observaciones': r.get('observaciones', ''),
-                        },
-                    )
-                else:
-                    RegistroAsistencia.objects.filter(
-                        empleado_id=empleado_id,
-                        fecha=fecha,
-                    ).delete()
-
-        return JsonResponse({'success': True})
+def _versiones_json(versiones):
+    return [
+        {'empleado_id': emp_id, 'fecha': fecha.isoformat(), 'version': version}
+        for (emp_id, fecha), version in versiones.items()
+    ]
+
+
+@login_required
+@require_POST
+def asistencia_rellenar(request):
+    """
+    Relleno masivo: un estado para varios empleados en un rango de días
+    hábiles, resuelto en el servidor sin enviar la grilla completa.
+    """
+    try:
+        data = json.loads(request.body)
+        desde = date.fromisoformat(data.get('desde', ''))
+        hasta = date.fromisoformat(data.get('hasta', ''))
+        if desde > hasta:
+            raise ValueError('La fecha de inicio es posterior a la de fin.')
+        if (hasta - desde).days >= MAX_DIAS_RELLENO:
+            raise ValueError(f'El rango no puede superar {MAX_DIAS_RELLENO} días.')
+
+        estado = EstadoAsistencia.objects.get(pk=data.get('estado_id'), activo=True)
+        empleado_ids = data.get('empleado_ids')
+        if empleado_ids is not None and not isinstance(empleado_ids, list):
+            raise ValueError('empleado_ids debe ser una lista.')
+
+        escritas = rellenar_rango(
+            estado.id, desde, hasta,
+            empleado_ids=empleado_ids,
+            sobrescribir=bool(data.get('sobrescribir')),
+            usuario=request.user,
+        )
+        return JsonResponse({'success': True, 'celdas': escritas})
+    except EstadoAsistencia.DoesNotExist:
+        return JsonResponse({'error': 'Estado inexistente o inactivo.'}, status=400)
+    except MesCerradoError as e:
+        return JsonResponse({'error': str(e)}, status=409)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
 
 
+# ─────────────────────────────────────────
+# Fichadas del reloj
+# ─────────────────────────────────────────
+
+@csrf_exempt
+@require_POST
+def api_fichadas(request):
+    """
+    Ingesta de fichadas desde el reloj, autenticada con
+    `Authorization: Bearer <FICHADAS_TOKEN>`. Cuerpo: {'eventos': [...]}
+    (ver fichadas.ingerir).
+    """
+    token = settings.FICHADAS_TOKEN
+    if not token or not constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {token}',
+    ):
+        return JsonResponse({'error': 'No autorizado.'}, status=403)
+    try:
+        data = json.loads(request.body)
+        eventos = data.get('eventos')
+        if not isinstance(eventos, list):
+            raise ValueError('eventos debe ser una lista.')
+        return JsonResponse({'success': True, **fichadas.ingerir(eventos)})
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@login_required
+def api_huecos(request):
+    """
+    Días hábiles sin registro dentro de los períodos de empleo, leídos del
+    índice de huecos: `?desde=&hasta=` (ISO, por omisión el mes en curso) y
+    opcionalmente `empleado=<id>`. Lista hasta MAX_HUECOS_RESPUESTA huecos;
+    los totales por empleado son completos. `indice_hasta` indica hasta qué
+    día llega el índice (lo extiende el comando actualizar_huecos).
+    """
+    try:
+        desde, hasta = _rango_huecos(request)
+        empleado = request.GET.get('empleado')
+        empleado_ids = [int(empleado)] if empleado else None
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    huecos = huecos_de_rango(desde, hasta, empleado_ids, limite=MAX_HUECOS_RESPUESTA)
+    return JsonResponse({
+        'desde': desde.isoformat(),
+        'hasta': hasta.isoformat(),
+        **huecos,
+        'huecos': [
+            {'empleado_id': h['empleado_id'], 'fecha': h['fecha'].isoformat()}
+            for h in huecos['huecos']
+        ],
+    })
+
+
+# ─────────────────────────────────────────
+# Auditoría
+# ─────────────────────────────────────────
+
+@login_required
+def auditoria_cambios(request):
+    """
+    Cambios de asistencia, del más reciente al más antiguo. Se pagina por
+    clave (`?antes=<id>`) para no contar ni saltear filas en una tabla que
+    solo crece.
+    """
+    if not request.user.is_staff:
+        messages.error(request, 'Solo el personal autorizado puede ver la auditoría.')
+        return redirect('dashboard')
+
+    cambios = CambioAsistencia.objects.select_related(
+        'usuario', 'empleado', 'estado_anterior', 'estado_nuevo',
+    )
+    filtros = {
+        'empleado': request.GET.get('empleado', ''),
+        'usuario': request.GET.get('usuario', ''),
+        'origen': request.GET.get('origen', ''),
+        'desde': request.GET.get('desde', ''),
+        'hasta': request.GET.get('hasta', ''),
+    }
+    try:
+        if filtros['empleado']:
+            cambios = cambios.filter(empleado_id=int(filtros['empleado']))
+        if filtros['usuario']:
+            cambios = cambios.filter(usuario_id=int(filtros['usuario']))
+        if filtros['origen']:
+            cambios = cambios.filter(origen=filtros['origen'])
+        if filtros['desde']:
+            cambios = cambios.filter(fecha__gte=date.fromisoformat(filtros['desde']))
+        if filtros['hasta']:
+            cambios = cambios.filter(fecha__lte=date.fromisoformat(filtros['hasta']))
+        if request.GET.get('antes'):
+            cambios = cambios.filter(pk__lt=int(request.GET['antes']))
+    except ValueError:
+        messages.error(request, 'Filtro inválido.')
+        return redirect('auditoria_cambios')
+
+    pagina = list(cambios.order_by('-id')[:AUDITORIA_POR_PAGINA + 1])
+    siguiente = None
+    if len(pagina) > AUDITORIA_POR_PAGINA:
+        pagina = pagina[:AUDITORIA_POR_PAGINA]
+        params = request.GET.copy()
+        params['antes'] = pagina[-1].pk
+        siguiente = params.urlencode()
+
+    return render(request, 'asistencia/auditoria.html', {
+        'cambios': pagina,
+        'filtros': filtros,
+        'siguiente': siguiente,
+        'es_primera': not request.GET.get('antes'),
+        'empleados': Empleado.objects.all(),
+        'usuarios': get_user_model().objects.order_by('username'),
+        'origenes': CambioAsistencia.ORIGENES,
+    })
+
+
+# ─────────────────────────────────────────
+# Métricas
+# ─────────────────────────────────────────
+
+def metricas_exportar(request):
+    """
+    Métricas en formato de texto de Prometheus. Requiere una sesión de
+    staff o, para el recolector, `Authorization: Bearer <METRICAS_TOKEN>`.
+    """
+    token = settings.METRICAS_TOKEN
+    autorizado = request.user.is_staff or (
+        token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    )
+    if not autorizado:
+        return HttpResponse('No autorizado.\n', status=403, content_type='text/plain; charset=utf-8')
+    return HttpResponse(
+        metricas.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
 # ─────────────────────────────────────────
 # Estadísticas
 # ─────────────────────────────────────────
 
 @login_required
+@lectura_replica
 def estadisticas(request):
     hoy = date.today()
 
@@ -395,6 +1032,18 @@ def estadisticas(request):
             fecha_fin = date(anio, 12, 31)
             titulo_periodo = str(anio)
 
+        elif periodo == 'rango':
+            fecha_inicio = date.fromisoformat(request.GET.get('desde', ''))
+            fecha_fin = date.fromisoformat(request.GET.get('hasta', ''))
+            if fecha_inicio > min(fecha_fin, hoy):
+                messages.error(request, 'El rango debe empezar antes de su fin y no después de hoy.')
+                return redirect('estadisticas')
+            if fecha_fin.year - fecha_inicio.year >= MAX_ANIOS_ESTADISTICAS:
+                messages.error(request, f'El rango no puede abarcar más de {MAX_ANIOS_ESTADISTICAS} años.')
+                return redirect('estadisticas')
+            anio = fecha_inicio.year
+            titulo_periodo = f"{fecha_inicio:%d/%m/%Y} – {fecha_fin:%d/%m/%Y}"
+
         else:  # mensual (default)
             periodo = 'mensual'
             mes_param = int(request.GET.get('mes', mes_param))
@@ -409,119 +1058,56 @@ def estadisticas(request):
     # Límite real: nunca más allá de hoy
     fecha_fin_real = min(fecha_fin, hoy)
 
-    # ── Días hábiles en el período (hasta hoy) ─────────────
-    dias_habiles = []
-    d = fecha_inicio
-    while d <= fecha_fin_real:
-        if d.weekday() < 5:
-            dias_habiles.append(d)
-        d += timedelta(days=1)
-    total_dias_habiles = len(dias_habiles)
-
-    # ── Empleados y estados activos ────────────────────────
-    empleados = list(Empleado.objects.filter(activo=True))
-    estados = list(EstadoAsistencia.objects.filter(activo=True))
-    total_empleados = len(empleados)
-
-    # ── Registros del período ──────────────────────────────
-    registros_qs = RegistroAsistencia.objects.filter(
-        fecha__gte=fecha_inicio,
-        fecha__lte=fecha_fin_real,
-        empleado__activo=True,
-    ).select_related('estado', 'empleado')
-
-    total_registros = registros_qs.count()
-    total_posibles = total_dias_habiles * total_empleados
-    cobertura_global = round(total_registros / total_posibles * 100, 1) if total_posibles > 0 else 0
-
-    # ── Distribución global por estado ────────────────────
-    dist_raw = (
-        registros_qs
-        .values('estado__id', 'estado__codigo', 'estado__descripcion',
-                'estado__color_fondo', 'estado__color_texto', 'estado__orden')
-        .annotate(total=Count('id'))
-        .order_by('estado__orden')
-    )
-    dist_estados = []
-    for item in dist_raw:
-        pct = round(item['total'] / total_registros * 100, 1) if total_registros > 0 else 0
-        dist_estados.append({**item, 'pct': pct})
-
-    # ── Estadísticas por empleado (sin N+1) ────────────────
-    registros_por_emp = {}
-    for r in registros_qs:
-        registros_por_emp.setdefault(r.empleado_id, []).append(r)
-
-    stats_por_empleado = []
-    for emp in empleados:
-        regs = registros_por_emp.get(emp.id, [])
-        conteo = {e.codigo: 0 for e in estados}
-        for r in regs:
-            if r.estado.codigo in conteo:
-                conteo[r.estado.codigo] += 1
-        # Lista ordenada igual que `estados` para iterar en template
-        conteo_lista = [
-            {'estado': e, 'cantidad': conteo.get(e.codigo, 0)}
-            for e in estados
-        ]
-        total_marcados = len(regs)
-        sin_registro = max(total_dias_habiles - total_marcados, 0)
-        cobertura = round(total_marcados / total_dias_habiles * 100, 1) if total_dias_habiles > 0 else 0
-        stats_por_empleado.append({
-            'empleado': emp,
-            'conteo_lista': conteo_lista,
-            'total_marcados': total_marcados,
-            'sin_registro': sin_registro,
-            'cobertura': cobertura,
-        })
+    # ── Totales del período ────────────────────────────────
+    # Un mes cerrado se sirve desde su foto, sin consultas de agregación
+    cierre = None
+    if periodo == 'mensual':
+        cierre = CierreMes.objects.filter(anio=anio, mes=mes_param).first()
+    if cierre:
+        resumen = cierre.datos['resumen']
+    elif periodo == 'anual':
+        resumen = resumen_anual(anio, hoy)
+    else:
+        resumen = resumen_periodo(fecha_inicio, fecha_fin_real)
 
-    stats_por_empleado.sort(key=lambda x: x['cobertura'], reverse=True)
-    sin_registro_total = sum(s['sin_registro'] for s in stats_por_empleado)
+    estados = resumen['estados']
+    total_empleados = resumen['total_empleados']
+    stats_por_empleado = [
+        {
+            **fila,
+            # Lista ordenada igual que `estados` para iterar en template
+            'conteo_lista': [
+                {'estado': e, 'cantidad': cantidad}
+                for e, cantidad in zip(estados, fila['conteos'])
+            ],
+        }
+        for fila in resumen['empleados']
+    ]
 
     # ── Tendencia mensual por estado (períodos > 1 mes) ────
+    # Sale de los totales por mes del resumen, sin consultas adicionales
     tendencia_data = None
-    if periodo in ('trimestral', 'semestral', 'anual'):
+    if periodo in ('trimestral', 'semestral', 'anual', 'rango') and len(resumen['meses']) > 1:
         etiquetas = []
-        por_estado_mes = {e.codigo: [] for e in estados}
-
-        cur = date(fecha_inicio.year, fecha_inicio.month, 1)
-        while cur <= fecha_fin and cur <= hoy:
-            dias_h_mes = sum(
-                1 for i in range(1, calendar.monthrange(cur.year, cur.month)[1] + 1)
-                if date(cur.year, cur.month, i).weekday() < 5
-                and date(cur.year, cur.month, i) <= hoy
-            )
-            posibles_mes = dias_h_mes * total_empleados
-            etiquetas.append(f"{MESES_ES[cur.month][:3]} {str(cur.year)[2:]}")
-
-            regs_mes_qs = registros_qs.filter(
-                fecha__year=cur.year,
-                fecha__month=cur.month,
-            )
-            for estado in estados:
-                count = regs_mes_qs.filter(estado=estado).count()
+        por_estado_mes = {e['codigo']: [] for e in estados}
+        for mes in resumen['meses']:
+            inicio_mes = date.fromisoformat(mes['mes'])
+            posibles_mes = mes['posibles']
+            etiquetas.append(f"{MESES_ES[inicio_mes.month][:3]} {str(inicio_mes.year)[2:]}")
+            for estado, count in zip(estados, mes['conteos']):
                 pct = round(count / posibles_mes * 100, 1) if posibles_mes > 0 else 0
-                por_estado_mes[estado.codigo].append(pct)
-
-            cur = date(cur.year + (cur.month == 12), (cur.month % 12) + 1, 1)
+                por_estado_mes[estado['codigo']].append(pct)
 
         tendencia_data = {
             'etiquetas': etiquetas,
             'estados': [
-                {
-                    'codigo': e.codigo,
-                    'descripcion': e.descripcion,
-                    'color_fondo': e.color_fondo,
-                    'color_texto': e.color_texto,
-                    'datos': por_estado_mes[e.codigo],
-                }
+                {**e, 'datos': por_estado_mes[e['codigo']]}
                 for e in estados
             ],
         }
 
     # ── Años disponibles ───────────────────────────────────
-    primera_fecha = RegistroAsistencia.objects.aggregate(primera=Min('fecha'))['primera']
-    min_year = primera_fecha.year if primera_fecha else hoy.year
+    min_year = cache.get_or_set('asistencia:primer_anio', lambda: _primer_anio(hoy), 3600)
     anios_disponibles = list(range(min_year, hoy.year + 1))
 
     return render(request, 'asistencia/estadisticas.html', {
@@ -530,16 +1116,17 @@ def estadisticas(request):
         'titulo_periodo': titulo_periodo,
         'fecha_inicio': fecha_inicio,
         'fecha_fin_real': fecha_fin_real,
-        'total_dias_habiles': total_dias_habiles,
+        'total_dias_habiles': resumen['total_dias_habiles'],
         'total_empleados': total_empleados,
-        'total_registros': total_registros,
-        'total_posibles': total_posibles,
-        'cobertura_global': cobertura_global,
-        'dist_estados': dist_estados,
+        'total_registros': resumen['total_registros'],
+        'total_posibles': resumen['total_posibles'],
+        'cobertura_global': resumen['cobertura_global'],
+        'dist_estados': resumen['dist_estados'],
         'stats_por_empleado': stats_por_empleado,
         'estados': estados,
         'tendencia_data': tendencia_data,
-        'sin_registro_total': sin_registro_total,
+        'sin_registro_total': resumen['sin_registro_total'],
+        'cierre': cierre,
         'anios_disponibles': anios_disponibles,
         'MESES_ES': MESES_ES,
         'hoy': hoy,
@@ -547,4 +1134,116 @@ def estadisticas(request):
         'mes_param': mes_param,
         'trimestre_param': trimestre_param,
         'semestre_param': semestre_param,
+        'max_anios': MAX_ANIOS_ESTADISTICAS,
+    })
+
+
+@login_required
+@lectura_replica
+def estadisticas_interanual(request):
+    """
+    Comparación año a año (`?desde=AAAA&hasta=AAAA`) sobre los resúmenes
+    anuales en caché: cada año se calcula una sola vez.
+    """
+    hoy = date.today()
+    min_year = cache.get_or_set('asistencia:primer_anio', lambda: _primer_anio(hoy), 3600)
+    try:
+        desde = int(request.GET.get('desde', max(min_year, hoy.year - 2)))
+        hasta = int(request.GET.get('hasta', hoy.year))
+    except ValueError:
+        return redirect('estadisticas_interanual')
+    desde, hasta = max(desde, min_year), min(hasta, hoy.year)
+    if desde > hasta:
+        desde = hasta
+    desde = max(desde, hasta - MAX_ANIOS_ESTADISTICAS + 1)
+
+    estados = [estado_a_dict(e) for e in EstadoAsistencia.objects.filter(activo=True)]
+    anios = []
+    anterior = None
+    for anio in range(desde, hasta + 1):
+        resumen = resumen_anual(anio, hoy)
+        totales = {d['estado__id']: d['total'] for d in resumen['dist_estados']}
+        posibles = resumen['total_posibles']
+        fila = {
+            'anio': anio,
+            'total_dias_habiles': resumen['total_dias_habiles'],
+            'total_empleados': resumen['total_empleados'],
+            'total_registros': resumen['total_registros'],
+            'cobertura_global': resumen['cobertura_global'],
+            'sin_registro_total': resumen['sin_registro_total'],
+            # % de los días-persona posibles, alineado con `estados`
+            'pcts': [
+                round(totales.get(e['id'], 0) / posibles * 100, 1) if posibles else 0
+                for e in estados
+            ],
+        }
+        if anterior:
+            fila['variacion'] = round(fila['cobertura_global'] - anterior['cobertura_global'], 1)
+            fila['pcts'] = [
+                {'pct': pct, 'variacion': round(pct - previo['pct'], 1)}
+                for pct, previo in zip(fila['pcts'], anterior['pcts'])
+            ]
+        else:
+            fila['variacion'] = None
+            fila['pcts'] = [{'pct': pct, 'variacion': None} for pct in fila['pcts']]
+        anios.append(fila)
+        anterior = fila
+
+    return render(request, 'asistencia/estadisticas_interanual.html', {
+        'desde': desde,
+        'hasta': hasta,
+        'estados': estados,
+        'anios': anios,
+        'anios_disponibles': list(range(min_year, hoy.year + 1)),
+        'max_anios': MAX_ANIOS_ESTADISTICAS,
+    })
+
+
+def _primer_anio(hoy):
+    # Va a la caché compartida: se lee de la principal (ver routers.en_principal)
+    with en_principal():
+        primera_fecha = RegistroAsistencia.objects.aggregate(primera=Min('fecha'))['primera']
+    return primera_fecha.year if primera_fecha else hoy.year
+
+
+# ─────────────────────────────────────────
+# Estadísticas – Ausentismo
+# ─────────────────────────────────────────
+
+def _periodo_ausentismo(request):
+    hoy = date.today()
+    try:
+        anio = int(request.GET.get('anio', hoy.year))
+        desde = date(anio, 1, 1)
+    except ValueError:
+        anio = hoy.year
+        desde = date(anio, 1, 1)
+    return anio, desde, min(date(anio, 12, 31), hoy)
+
+
+@login_required
+@lectura_replica
+def estadisticas_ausentismo(request):
+    anio, desde, hasta = _periodo_ausentismo(request)
+    hoy = date.today()
+    min_year = cache.get_or_set('asistencia:primer_anio', lambda: _primer_anio(hoy), 3600)
+    return render(request, 'asistencia/estadisticas_ausentismo.html', {
+        'anio': anio,
+        'fecha_inicio': desde,
+        'fecha_fin_real': hasta,
+        'indicadores': indicadores_ausentismo(desde, hasta),
+        'anios_disponibles': list(range(min_year, hoy.year + 1)),
+        'bradford_alto': BRADFORD_ALTO,
+    })
+
+
+@login_required
+@lectura_replica
+def api_ausentismo(request):
+    anio, desde, hasta = _periodo_ausentismo(request)
+    return JsonResponse({
+        'anio': anio,
+        'desde': desde.isoformat(),
+        'hasta': hasta.isoformat(),
+        **indicadores_ausentismo(desde, hasta),
     })
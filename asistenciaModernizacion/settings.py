@@ -48,6 +48,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "app.asistencia.middleware.MetricasMiddleware",
+    "app.asistencia.middleware.CompresionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -62,17 +65,26 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [],
-        "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
             ],
+            "loaders": [
+                "django.template.loaders.filesystem.Loader",
+                "django.template.loaders.app_directories.Loader",
+            ],
         },
     },
 ]
 
+# En producción las plantillas compiladas se guardan en memoria
+if not DEBUG:
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [
+        ("django.template.loaders.cached.Loader", TEMPLATES[0]["OPTIONS"]["loaders"]),
+    ]
+
 WSGI_APPLICATION = "asistenciaModernizacion.wsgi.application"
 
 
@@ -83,9 +95,62 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
-    }
+    },
+    # Réplica de solo lectura para reportes (manage.py actualizar_replica)
+    "reportes": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db_reportes.sqlite3",
+        "OPTIONS": {"init_command": "PRAGMA query_only = ON;"},
+        "TEST": {"MIRROR": "default"},
+    },
 }
 
+DATABASE_ROUTERS = ["app.asistencia.routers.ReportesRouter"]
+
+# Antigüedad máxima (segundos) de la réplica aceptada por cada vista de reportes
+REPLICA_ANTIGUEDAD_MAXIMA = {
+    "estadisticas": int(os.getenv("REPLICA_MAX_ESTADISTICAS", 15 * 60)),
+    "estadisticas_ausentismo": int(os.getenv("REPLICA_MAX_AUSENTISMO", 60 * 60)),
+    "api_ausentismo": int(os.getenv("REPLICA_MAX_AUSENTISMO", 60 * 60)),
+    "empleados_historial": int(os.getenv("REPLICA_MAX_HISTORIAL", 15 * 60)),
+    "generar_reportes": int(os.getenv("REPLICA_MAX_REPORTES", 60 * 60)),
+}
+
+
+# Caché compartida entre procesos. registrar_cambios borra las claves del
+# historial, del resumen anual y del panel del día al guardar, y ese borrado
+# tiene que llegar a todos los workers: con una caché en memoria por proceso
+# los demás seguirían sirviendo datos viejos hasta que venzan. Con
+# CACHE_REDIS_URL se usa Redis (requiere el paquete `redis`); si no, una
+# caché en archivos bajo CACHE_DIR, suficiente para un único servidor, que
+# es el despliegue que ya impone SQLite. Ambas cuentan aciertos y fallos
+# para /metrics.
+if os.getenv("CACHE_REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "app.asistencia.metricas.CacheRedisConMetricas",
+            "LOCATION": os.getenv("CACHE_REDIS_URL"),
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "app.asistencia.metricas.CacheArchivosConMetricas",
+            "LOCATION": os.getenv("CACHE_DIR", str(BASE_DIR / "cache")),
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        },
+    }
+
+# Métricas: directorio compartido donde cada worker vuelca las suyas (vacío:
+# solo las del proceso que responde) y token del recolector de Prometheus
+METRICAS_DIR = os.getenv("METRICAS_DIR", "")
+METRICAS_TOKEN = os.getenv("METRICAS_TOKEN", "")
+
+# Fichadas del reloj: token de la API de ingesta y reglas de tardanza
+FICHADAS_TOKEN = os.getenv("FICHADAS_TOKEN", "")
+FICHADAS_HORA_ENTRADA = os.getenv("FICHADAS_HORA_ENTRADA", "08:00")
+FICHADAS_TOLERANCIA_MINUTOS = int(os.getenv("FICHADAS_TOLERANCIA_MINUTOS", 10))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -122,6 +187,24 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = "static/"
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# Con STATIC_MANIFIESTO=True collectstatic genera nombres con hash y
+# variantes .gz/.br, y WhiteNoise las sirve con Cache-Control inmutable.
+# Requiere haber corrido collectstatic: sin el manifiesto las páginas fallan.
+STATIC_MANIFIESTO = os.getenv("STATIC_MANIFIESTO", "False") == "True"
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": (
+            "whitenoise.storage.CompressedManifestStaticFilesStorage"
+            if STATIC_MANIFIESTO
+            else "django.contrib.staticfiles.storage.StaticFilesStorage"
+        ),
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field